@@ -0,0 +1,100 @@
+import uuid
+
+import filetype
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import UploadedFile
+from drf_extra_fields.fields import Base64ImageField
+from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS
+
+# Сколько первых байт нужно filetype для определения формата.
+FILETYPE_HEADER_SIZE = 262
+
+
+class ImageVariantField(serializers.ReadOnlyField):
+    """
+    Абсолютный URL уменьшенной копии изображения.
+
+    Пока фоновая обработка не построила копию, отдаётся URL оригинала.
+    """
+
+    def __init__(self, image_field, variants_field, variant, **kwargs):
+        self.image_field = image_field
+        self.variants_field = variants_field
+        self.variant = variant
+        kwargs["source"] = "*"
+        super().__init__(**kwargs)
+
+    def to_representation(self, instance):
+        name = getattr(instance, self.variants_field).get(self.variant)
+        image = getattr(instance, self.image_field)
+        if name:
+            url = default_storage.url(name)
+        elif image:
+            url = image.url
+        else:
+            return None
+        request = self.context.get("request")
+        return request.build_absolute_uri(url) if request else url
+
+
+class StreamedBase64ImageField(Base64ImageField):
+    """
+    Base64ImageField, принимающий и уже декодированный файл.
+
+    Base64StreamingJSONParser подставляет в данные объект файла вместо
+    base64-строки; для него определяется формат по первым байтам и
+    выполняется обычная проверка изображения. Строки (например, при
+    другом парсере) обрабатываются как раньше.
+    """
+
+    def to_internal_value(self, data):
+        if not isinstance(data, UploadedFile):
+            return super().to_internal_value(data)
+        header = data.read(FILETYPE_HEADER_SIZE)
+        data.seek(0)
+        extension = filetype.guess_extension(header)
+        if extension == "jpeg":
+            extension = "jpg"
+        if extension not in self.ALLOWED_TYPES:
+            raise serializers.ValidationError(self.INVALID_TYPE_MESSAGE)
+        data.name = f"{uuid.uuid4()}.{extension}"
+        return serializers.ImageField.to_internal_value(self, data)
+
+
+class BulkManyRelatedField(serializers.ManyRelatedField):
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            self.child_relation.preload(data)
+        return super().to_internal_value(data)
+
+
+class BulkPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    PrimaryKeyRelatedField, который загружает объекты списка id одним
+    запросом, а не запросом на каждый id: со many=True — сам, во
+    вложенном сериализаторе — после preload() из его ListSerializer.
+    Ошибки для отсутствующих и неверных id — как у родителя.
+    """
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {"child_relation": cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return BulkManyRelatedField(**list_kwargs)
+
+    def preload(self, pks):
+        pks = {
+            pk
+            for pk in pks
+            if isinstance(pk, int) and not isinstance(pk, bool)
+        }
+        self.preloaded = self.get_queryset().in_bulk(pks) if pks else {}
+
+    def to_internal_value(self, data):
+        preloaded = getattr(self, "preloaded", {})
+        if isinstance(data, int) and data in preloaded:
+            return preloaded[data]
+        return super().to_internal_value(data)
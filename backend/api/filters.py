@@ -1,19 +1,103 @@
+from django import forms
+from django.db.models import Exists, OuterRef
 from django_filters import rest_framework as filters
 
+from recipes.cache import get_tag_ids_by_slug
 from recipes.models import Recipe
 
+TAGS_MODE_ANY = "any"
+TAGS_MODE_ALL = "all"
+
+
+class MultipleValueField(forms.Field):
+    """Поле для повторяющегося параметра: ?tags=a&tags=b."""
+
+    widget = forms.MultipleHiddenInput
+
+    def to_python(self, value):
+        return [item for item in value or () if item]
+
+
+class TagSlugFilter(filters.Filter):
+    """
+    Фильтр по slug тегов через EXISTS без JOIN и DISTINCT.
+
+    Slug'и переводятся в id по закэшированному словарю тегов, поэтому
+    запрос вариантов значений (SELECT DISTINCT) не нужен. По умолчанию
+    рецепт подходит, если у него есть хотя бы один из тегов; при
+    tags_mode=all — все перечисленные теги.
+    """
+
+    field_class = MultipleValueField
+
+    def filter(self, qs, value):
+        if not value:
+            return qs
+        tag_ids_by_slug = get_tag_ids_by_slug()
+        tag_ids = {
+            tag_ids_by_slug[slug] for slug in value if slug in tag_ids_by_slug
+        }
+        mode = self.parent.form.cleaned_data.get("tags_mode")
+        if mode == TAGS_MODE_ALL:
+            if len(tag_ids) < len(set(value)):
+                return qs.none()
+            for tag_id in tag_ids:
+                qs = qs.filter(self._tags_exist([tag_id]))
+            return qs
+        if not tag_ids:
+            return qs.none()
+        return qs.filter(self._tags_exist(tag_ids))
+
+    def _tags_exist(self, tag_ids):
+        return Exists(
+            Recipe.tags.through.objects.filter(
+                recipe_id=OuterRef("pk"), tag_id__in=tag_ids
+            )
+        )
+
+
+class StableOrderingFilter(filters.OrderingFilter):
+    """Сортировка с добавлением -id, чтобы страницы не пересекались."""
+
+    def filter(self, qs, value):
+        qs = super().filter(qs, value)
+        if value:
+            qs = qs.order_by(*qs.query.order_by, "-id")
+        return qs
+
 
 class RecipeFilter(filters.FilterSet):
-    tags = filters.AllValuesMultipleFilter(field_name="tags__slug")
+    tags = TagSlugFilter()
+    tags_mode = filters.ChoiceFilter(
+        choices=(
+            (TAGS_MODE_ANY, "Любой из тегов"),
+            (TAGS_MODE_ALL, "Все теги"),
+        ),
+        method="filter_tags_mode",
+    )
     is_favorited = filters.BooleanFilter(method="filter_is_favorited")
     is_in_shopping_cart = filters.BooleanFilter(
         method="filter_is_in_shopping_cart"
     )
+    search = filters.CharFilter(method="filter_search")
+    ordering = StableOrderingFilter(
+        fields=("favorites_count", "in_carts_count"),
+    )
 
     class Meta:
         model = Recipe
         fields = ["tags", "author", "is_favorited", "is_in_shopping_cart"]
 
+    def filter_tags_mode(self, queryset, name, value):
+        """Режим учитывается в фильтре tags."""
+        return queryset
+
+    def filter_search(self, queryset, name, value):
+        """Полнотекстовый поиск; явный ?ordering= применяется после."""
+        if not value.strip():
+            return queryset
+        return queryset.search(value)
+
     def filter_is_favorited(self, queryset, name, value):
         user = self.request.user
         if value and user.is_authenticated:
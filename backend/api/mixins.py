@@ -0,0 +1,223 @@
+import hashlib
+from abc import ABCMeta, abstractmethod
+from functools import partial
+
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.http import HttpResponse
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+)
+from django.utils.http import http_date, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+from common.metrics import get_request_metrics
+
+
+def hash_etag(*parts):
+    """Короткий ETag из произвольного набора значений."""
+    return hashlib.md5(
+        "|".join(map(str, parts)).encode(), usedforsecurity=False
+    ).hexdigest()
+
+
+class ConditionalResponseMixin:
+    """
+    Условные GET-запросы (ETag / Last-Modified / 304) для viewset'ов.
+
+    Валидаторы строятся по полю updated_at, поэтому при совпадении
+    If-None-Match или If-Modified-Since ответ 304 отдаётся без
+    сериализации.
+    """
+
+    # Сколько секунд общий кэш (nginx) может отдавать ответ
+    # без перепроверки; 0 — перепроверять каждый запрос.
+    cache_max_age = 0
+
+    def _set_validators(self, response, etag, last_modified):
+        response.headers["ETag"] = quote_etag(etag)
+        if last_modified:
+            response.headers["Last-Modified"] = http_date(
+                last_modified.timestamp()
+            )
+        patch_cache_control(response, max_age=self.cache_max_age)
+        if self.request.user.is_authenticated:
+            patch_cache_control(response, private=True)
+        else:
+            patch_cache_control(response, public=True)
+        patch_vary_headers(response, ["Authorization"])
+
+    def conditional_response(self, etag, last_modified, render):
+        """Ответ 304, если клиент прислал актуальные валидаторы,
+        иначе результат render() с заголовками ETag/Last-Modified."""
+        headers = HttpResponse()
+        self._set_validators(headers, etag, last_modified)
+        response = get_conditional_response(
+            self.request,
+            etag=quote_etag(etag),
+            last_modified=(
+                int(last_modified.timestamp()) if last_modified else None
+            ),
+            response=headers,
+        )
+        if response is not headers:
+            return response
+        response = render()
+        self._set_validators(response, etag, last_modified)
+        return response
+
+
+class ConditionalListMixin(ConditionalResponseMixin):
+    """Валидаторы списка: число записей и последний updated_at таблицы."""
+
+    def get_list_validators(self):
+        stats = self.queryset.order_by().aggregate(
+            count=Count("pk"), last_modified=Max("updated_at")
+        )
+        last_modified = stats["last_modified"]
+        timestamp = last_modified.timestamp() if last_modified else 0
+        return f"{stats['count']}-{timestamp}", last_modified
+
+    def list(self, request, *args, **kwargs):
+        etag, last_modified = self.get_list_validators()
+        return self.conditional_response(
+            etag,
+            last_modified,
+            partial(super().list, request, *args, **kwargs),
+        )
+
+
+class ConditionalRetrieveMixin(ConditionalResponseMixin):
+    """Валидаторы объекта: его pk и updated_at."""
+
+    def get_object_validators(self, instance):
+        return (
+            hash_etag(instance.pk, instance.updated_at.timestamp()),
+            instance.updated_at,
+        )
+
+    def prepare_for_render(self, instance):
+        """Дозагрузка данных, нужных только для полного ответа (не 304)."""
+
+    def render_object(self, instance):
+        self.prepare_for_render(instance)
+        return Response(self.get_serializer(instance).data)
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        etag, last_modified = self.get_object_validators(instance)
+        return self.conditional_response(
+            etag, last_modified, partial(self.render_object, instance)
+        )
+
+
+class AnonymousListCacheMixin(metaclass=ABCMeta):
+    """
+    Кэш страниц списка для анонимных пользователей.
+
+    Для анонимов флаги избранного и корзины всегда ложны, поэтому ответ
+    зависит только от параметров запроса. Ключ строится из
+    нормализованных параметров фильтра и пагинации и текущего поколения
+    данных (get_cache_generation), так что увеличение поколения сразу
+    делает весь кэш недействительным. Запросы с неизвестными параметрами
+    не кэшируются.
+    """
+
+    list_cache_prefix = None
+    list_cache_timeout = None
+
+    @abstractmethod
+    def get_cache_generation(self):
+        """Поколение данных, из которых собраны страницы списка."""
+
+    def get_list_cache_params(self):
+        params = set(self.filterset_class.base_filters)
+        paginator = self.paginator
+        if paginator is not None:
+            params.update(
+                filter(
+                    None,
+                    (
+                        getattr(paginator, "page_query_param", None),
+                        getattr(paginator, "page_size_query_param", None),
+                        getattr(paginator, "cursor_query_param", None),
+                    ),
+                )
+            )
+        return params
+
+    def get_list_cache_key(self):
+        allowed = self.get_list_cache_params()
+        query_params = self.request.query_params
+        if not set(query_params) <= allowed:
+            return None
+        normalized = sorted(
+            (name, tuple(sorted(set(query_params.getlist(name)))))
+            for name in query_params
+        )
+        return "{}:{}:{}".format(
+            self.list_cache_prefix,
+            self.get_cache_generation(),
+            hash_etag(self.request.build_absolute_uri("/"), normalized),
+        )
+
+    def list(self, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return super().list(request, *args, **kwargs)
+        key = self.get_list_cache_key()
+        if key is None:
+            return super().list(request, *args, **kwargs)
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data, self.list_cache_timeout)
+        return response
+
+
+def _timed(method, metrics):
+    def wrapper(*args, **kwargs):
+        with metrics.serialization():
+            return method(*args, **kwargs)
+
+    return wrapper
+
+
+class MetricsMixin:
+    """
+    Метрики viewset'а для RequestMetricsMiddleware: эндпоинт
+    "basename.action" и время сериализации — to_representation()
+    сериализаторов из get_serializer() и рендеринг ответа.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        metrics = get_request_metrics(request)
+        if metrics is not None:
+            metrics.endpoint = "{}.{}".format(
+                self.basename or type(self).__name__, self.action or "other"
+            )
+        super().initial(request, *args, **kwargs)
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        metrics = get_request_metrics(self.request)
+        if metrics is not None:
+            # Вложенные сериализаторы вызываются внутри to_representation
+            # корневого, поэтому время не считается дважды.
+            serializer.to_representation = _timed(
+                serializer.to_representation, metrics
+            )
+        return serializer
+
+    def perform_content_negotiation(self, request, force=False):
+        renderer, media_type = super().perform_content_negotiation(
+            request, force
+        )
+        metrics = get_request_metrics(request)
+        if metrics is not None:
+            renderer.render = _timed(renderer.render, metrics)
+        return renderer, media_type
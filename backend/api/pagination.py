@@ -1,10 +1,315 @@
-from rest_framework.pagination import PageNumberPagination
+import json
 
-from common.constants import DEFAULT_PAGE_SIZE, PAGE_SIZE_QUERY_PARAM
+from django.core.exceptions import FieldDoesNotExist
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Max, Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import (
+    BasePagination,
+    Cursor,
+    CursorPagination,
+    PageNumberPagination,
+)
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from common.constants import (
+    CURSOR_QUERY_PARAM,
+    DEFAULT_PAGE_SIZE,
+    FEED_CURSOR_QUERY_PARAM,
+    FEED_MAX_PAGE_SIZE,
+    PAGE_SIZE_QUERY_PARAM,
+)
+
+
+class IdCursorPagination(CursorPagination):
+    """
+    Keyset-пагинация без COUNT(*) в порядке самого queryset'а
+    (?ordering=, ранг поиска), по умолчанию — новые записи сначала.
+
+    Позиция в курсоре — значения всех полей сортировки последней записи,
+    а id в конце делает её уникальной, поэтому смещение не нужно, а
+    страницы не пересекаются и при совпадающих значениях.
+    """
+
+    page_size = DEFAULT_PAGE_SIZE
+    page_size_query_param = PAGE_SIZE_QUERY_PARAM
+    cursor_query_param = CURSOR_QUERY_PARAM
+    ordering = "-id"
+
+    def get_ordering(self, request, queryset, view):
+        query = queryset.query
+        ordering = list(
+            query.order_by
+            or (query.default_ordering and queryset.model._meta.ordering)
+            or ()
+        )
+        if not all(isinstance(field, str) for field in ordering):
+            return (self.ordering,)
+        if not ordering or ordering[-1].lstrip("-") not in ("id", "pk"):
+            ordering.append(self.ordering)
+        return tuple(ordering)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor is not None and self.cursor.reverse
+        ordering = self.ordering
+        if reverse:
+            ordering = tuple(
+                field[1:] if field.startswith("-") else f"-{field}"
+                for field in ordering
+            )
+        queryset = queryset.order_by(*ordering)
+        positioned = self.cursor is not None and self.cursor.position
+        if positioned:
+            values = self._decode_position(queryset)
+            try:
+                queryset = queryset.filter(self._after(ordering, values))
+            except (TypeError, ValueError, DjangoValidationError):
+                raise NotFound(self.invalid_cursor_message)
+        results = list(queryset[: self.page_size + 1])
+        self.page = results[: self.page_size]
+        has_more = len(results) > self.page_size
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = bool(positioned), has_more
+        else:
+            self.has_next, self.has_previous = has_more, bool(positioned)
+        self.display_page_controls = self.has_next or self.has_previous
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self._link(reverse=False, item=self.page[-1:])
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self._link(reverse=True, item=self.page[:1])
+
+    def _link(self, reverse, item):
+        # Пустая страница возможна, если записи удалили между запросами.
+        position = (
+            self._encode_position(item[0]) if item else self.cursor.position
+        )
+        return self.encode_cursor(
+            Cursor(offset=0, reverse=reverse, position=position)
+        )
+
+    def _encode_position(self, item):
+        values = [
+            item[field] if isinstance(item, dict) else getattr(item, field)
+            for field in (field.lstrip("-") for field in self.ordering)
+        ]
+        return json.dumps(values, cls=DjangoJSONEncoder)
+
+    def _decode_position(self, queryset):
+        """Значения позиции, приведённые к типам полей сортировки;
+        подделанный курсор — 404, а не ошибка в запросе."""
+        try:
+            values = json.loads(self.cursor.position)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        try:
+            values = [
+                self._get_field(queryset, field.lstrip("-")).to_python(value)
+                for field, value in zip(self.ordering, values)
+            ]
+        except (FieldDoesNotExist, DjangoValidationError, TypeError):
+            raise NotFound(self.invalid_cursor_message)
+        # Поля сортировки не бывают NULL, а сравнение с NULL невозможно.
+        if None in values:
+            raise NotFound(self.invalid_cursor_message)
+        return values
+
+    @staticmethod
+    def _get_field(queryset, name):
+        """Поле модели или выражение аннотации (ранг поиска)."""
+        annotation = queryset.query.annotations.get(name)
+        if annotation is not None:
+            return annotation.output_field
+        if name == "pk":
+            return queryset.model._meta.pk
+        return queryset.model._meta.get_field(name)
+
+    @staticmethod
+    def _after(ordering, values):
+        """Записи после позиции: (a, b, id) < (va, vb, vid) с учётом
+        направления каждого поля."""
+        condition = Q()
+        equal = Q()
+        for field, value in zip(ordering, values):
+            name = field.lstrip("-")
+            lookup = "lt" if field.startswith("-") else "gt"
+            condition |= equal & Q(**{f"{name}__{lookup}": value})
+            equal &= Q(**{name: value})
+        return condition
 
 
 class LimitPageNumberPagination(PageNumberPagination):
-    """Кастомный пагинатор с фильтрации и параметру limit."""
+    """
+    Кастомный пагинатор с фильтрации и параметру limit.
+
+    Если в запросе есть параметр cursor (для первой страницы — пустой),
+    используется IdCursorPagination: страницы стабильны при вставке
+    новых записей, а запрос на подсчёт не выполняется. Порядок тот же,
+    что без курсора.
+    """
+
+    page_size = DEFAULT_PAGE_SIZE
+    page_size_query_param = PAGE_SIZE_QUERY_PARAM
+    cursor_query_param = CURSOR_QUERY_PARAM
+    cursor_pagination_class = IdCursorPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = None
+        if self.cursor_query_param in request.query_params:
+            self.cursor_paginator = self.cursor_pagination_class()
+            return self.cursor_paginator.paginate_queryset(
+                queryset, request, view
+            )
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+
+class RankPagination(PageNumberPagination):
+    """
+    Страницы заранее ранжированного списка (ранги 1, 2, 3, ...).
+
+    Страница выбирается условием rank BETWEEN по индексу, а не OFFSET,
+    поэтому время ответа не зависит от номера страницы; число записей
+    берётся как максимальный ранг.
+    """
 
     page_size = DEFAULT_PAGE_SIZE
     page_size_query_param = PAGE_SIZE_QUERY_PARAM
+    rank_field = "rank"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size_value = self.get_page_size(request)
+        try:
+            self.page_number = int(
+                request.query_params.get(self.page_query_param, 1)
+            )
+        except ValueError:
+            raise NotFound("Неверная страница.")
+        if self.page_number < 1:
+            raise NotFound("Неверная страница.")
+        self.count = queryset.aggregate(last=Max(self.rank_field))["last"] or 0
+        start = (self.page_number - 1) * self.page_size_value
+        if start and start >= self.count:
+            raise NotFound("Неверная страница.")
+        return list(
+            queryset.filter(
+                **{
+                    f"{self.rank_field}__gt": start,
+                    f"{self.rank_field}__lte": start + self.page_size_value,
+                }
+            ).order_by(self.rank_field)
+        )
+
+    def get_next_link(self):
+        if self.page_number * self.page_size_value >= self.count:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.page_query_param,
+            self.page_number + 1,
+        )
+
+    def get_previous_link(self):
+        if self.page_number == 1:
+            return None
+        url = self.request.build_absolute_uri()
+        if self.page_number == 2:
+            return remove_query_param(url, self.page_query_param)
+        return replace_query_param(
+            url, self.page_query_param, self.page_number - 1
+        )
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "count": self.count,
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+
+class TrendingPagination(RankPagination):
+    rank_field = "trending_score__rank"
+
+
+class MatchesPagination(PageNumberPagination):
+    """
+    Постраничный вывод результатов поиска по индексу в памяти:
+    курсорного режима нет, так как это не queryset.
+    """
+
+    page_size = DEFAULT_PAGE_SIZE
+    page_size_query_param = PAGE_SIZE_QUERY_PARAM
+
+
+class FeedPagination(BasePagination):
+    """
+    Keyset-пагинация ленты по id: ?before=<id последнего рецепта>&limit=.
+
+    Страницу id выбирает переданная функция fetch_ids(before, size),
+    так что пагинатор не зависит от способа сборки ленты.
+    """
+
+    page_size = DEFAULT_PAGE_SIZE
+    max_page_size = FEED_MAX_PAGE_SIZE
+    page_size_query_param = PAGE_SIZE_QUERY_PARAM
+    cursor_query_param = FEED_CURSOR_QUERY_PARAM
+
+    def _get_positive_int(self, request, name, default):
+        value = request.query_params.get(name)
+        if value is None:
+            return default
+        if not value.isdigit() or int(value) < 1:
+            raise ValidationError(
+                {name: ["Ожидается целое положительное число."]}
+            )
+        return int(value)
+
+    def paginate_ids(self, request, fetch_ids):
+        self.request = request
+        before = self._get_positive_int(request, self.cursor_query_param, None)
+        size = min(
+            self._get_positive_int(
+                request, self.page_size_query_param, self.page_size
+            ),
+            self.max_page_size,
+        )
+        ids = fetch_ids(before, size + 1)
+        self.has_next = len(ids) > size
+        self.ids = ids[:size]
+        return self.ids
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            self.ids[-1],
+        )
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.get_next_link(), "results": data})
@@ -0,0 +1,306 @@
+import base64
+import binascii
+import codecs
+import json
+import re
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.uploadedfile import (
+    InMemoryUploadedFile,
+    TemporaryUploadedFile,
+)
+from django.utils.datastructures import MultiValueDict
+from rest_framework.exceptions import ParseError, ValidationError
+from rest_framework.parsers import BaseParser, JSONParser
+from rest_framework.utils import json as drf_json
+
+from api.renderers import ORJSONRenderer
+from common.constants import (
+    BASE64_HEADER_MAX_LENGTH,
+    MAX_UPLOAD_IMAGE_SIZE,
+    UPLOAD_STREAM_CHUNK_SIZE,
+)
+
+try:
+    import orjson
+except ImportError:  # ORJSONParser доступен, только если есть orjson
+    orjson = None
+
+QUOTE, BACKSLASH, COMMA, COLON = b'"\\,:'
+OPENING, CLOSING = b"{[", b"}]"
+STRING_SPECIAL = re.compile(rb'["\\]')
+
+
+class Base64FileSink:
+    """
+    Потоковый декодер base64 в загруженный файл.
+
+    Текст декодируется блоками, кратными 4 символам; результат пишется
+    в память, а после FILE_UPLOAD_MAX_MEMORY_SIZE — во временный файл
+    на диске, как при обычной multipart-загрузке Django.
+    """
+
+    def __init__(self, field_name, max_size=MAX_UPLOAD_IMAGE_SIZE):
+        self.field_name = field_name
+        self.max_size = max_size
+        self.size = 0
+        self.content_type = None
+        self._head = bytearray()
+        self._tail = b""
+        self._file = BytesIO()
+        self._temporary = None
+
+    def write(self, text):
+        if self._head is not None:
+            self._head += text
+            if b"," not in self._head and (
+                len(self._head) <= BASE64_HEADER_MAX_LENGTH
+            ):
+                return
+            text = self._strip_header()
+        data = self._tail + text
+        cut = len(data) - len(data) % 4
+        self._tail = data[cut:]
+        self._decode(data[:cut])
+
+    def _strip_header(self):
+        """Отрезает заголовок data:<тип>;base64, если он есть."""
+        head, self._head = bytes(self._head), None
+        header, separator, body = head.partition(b",")
+        if separator and header.startswith(b"data:"):
+            self.content_type = (
+                header[5:].partition(b";")[0].decode("ascii", "replace")
+                or None
+            )
+            return body
+        return head
+
+    def _decode(self, text):
+        try:
+            data = base64.b64decode(text, validate=True)
+        except (binascii.Error, ValueError):
+            raise ValidationError(
+                {self.field_name: ["Некорректные данные base64."]}
+            )
+        self.size += len(data)
+        if self.size > self.max_size:
+            raise ValidationError(
+                {
+                    self.field_name: [
+                        "Размер файла не должен превышать "
+                        f"{self.max_size // (1024 * 1024)} МБ."
+                    ]
+                }
+            )
+        if self._temporary is None and (
+            self.size > settings.FILE_UPLOAD_MAX_MEMORY_SIZE
+        ):
+            self._temporary = TemporaryUploadedFile(
+                self.field_name, self.content_type, 0, None
+            )
+            self._temporary.write(self._file.getvalue())
+            self._file = self._temporary
+        self._file.write(data)
+
+    def finish(self):
+        """Файл с декодированным содержимым или "" для пустого значения."""
+        if self._head is not None:
+            self._decode_rest(self._strip_header())
+        else:
+            self._decode_rest(b"")
+        if not self.size:
+            return ""
+        self._file.seek(0)
+        if self._temporary is not None:
+            self._temporary.size = self.size
+            return self._temporary
+        return InMemoryUploadedFile(
+            self._file,
+            self.field_name,
+            self.field_name,
+            self.content_type,
+            self.size,
+            None,
+        )
+
+    def _decode_rest(self, text):
+        data = self._tail + text
+        if len(data) % 4:
+            # Клиенты иногда не дописывают выравнивание "=".
+            data += b"=" * (-len(data) % 4)
+        self._tail = b""
+        self._decode(data)
+
+
+class _JSONFileScanner:
+    """
+    Копирует JSON-тело в буфер, вырезая строковые значения файловых
+    полей верхнего уровня и передавая их в Base64FileSink.
+
+    Вместо вырезанного значения в буфер пишется null, а готовые файлы
+    собираются в словарь files.
+    """
+
+    def __init__(self, file_fields):
+        self.file_fields = file_fields
+        self.body = bytearray()
+        self.files = {}
+        self._depth = 0
+        self._is_object = False
+        self._expect_key = False
+        self._in_string = False
+        self._escape = False
+        self._key_buffer = None
+        self._key = None
+        self._sink = None
+        self._sink_escape = False
+
+    def close(self):
+        if self._sink is not None or self._in_string:
+            raise ParseError("JSON parse error - незавершённая строка.")
+        return bytes(self.body)
+
+    def feed(self, chunk):
+        position = 0
+        while position < len(chunk):
+            if self._sink is not None:
+                position = self._feed_file(chunk, position)
+            else:
+                position = self._feed_json(chunk, position)
+        max_size = settings.DATA_UPLOAD_MAX_MEMORY_SIZE
+        if max_size is not None and len(self.body) > max_size:
+            raise ParseError("Тело запроса слишком большое.")
+
+    def _feed_json(self, chunk, position):
+        byte = chunk[position]
+        self.body.append(byte)
+        if self._in_string:
+            if self._key_buffer is not None:
+                self._key_buffer.append(byte)
+            if self._escape:
+                self._escape = False
+            elif byte == BACKSLASH:
+                self._escape = True
+            elif byte == QUOTE:
+                self._in_string = False
+                if self._key_buffer is not None:
+                    self._key = json.loads(b'"' + self._key_buffer)
+                    self._key_buffer = None
+            return position + 1
+
+        at_top = self._depth == 1 and self._is_object
+        if byte == QUOTE:
+            if at_top and self._expect_key:
+                self._key_buffer = bytearray()
+            elif at_top and self._key in self.file_fields:
+                self.body[-1:] = b"null"
+                self._sink = Base64FileSink(self._key)
+                return position + 1
+            self._in_string = True
+        elif byte in OPENING:
+            self._depth += 1
+            if self._depth == 1:
+                self._is_object = byte == OPENING[0]
+                self._expect_key = True
+        elif byte in CLOSING:
+            self._depth -= 1
+        elif at_top and byte == COMMA:
+            self._expect_key = True
+            self._key = None
+        elif at_top and byte == COLON:
+            self._expect_key = False
+        return position + 1
+
+    def _feed_file(self, chunk, position):
+        if self._sink_escape:
+            self._sink_escape = False
+            byte = chunk[position]
+            if byte == b"/"[0]:
+                self._sink.write(b"/")
+            elif byte not in b"nrt":
+                raise ValidationError(
+                    {self._key: ["Некорректные данные base64."]}
+                )
+            return position + 1
+        match = STRING_SPECIAL.search(chunk, position)
+        end = match.start() if match else len(chunk)
+        if end > position:
+            self._sink.write(chunk[position:end])
+        if match is None:
+            return end
+        if chunk[end] == QUOTE:
+            self.files[self._key] = self._sink.finish()
+            self._sink = None
+        else:
+            self._sink_escape = True
+        return end + 1
+
+
+class Base64StreamingJSONParser(BaseParser):
+    """
+    JSON-парсер, который не держит в памяти base64-картинки целиком.
+
+    Тело читается блоками по UPLOAD_STREAM_CHUNK_SIZE; значения полей
+    из file_fields декодируются на лету во временный файл с проверкой
+    размера (MAX_UPLOAD_IMAGE_SIZE) уже во время чтения, а в request.data
+    попадает готовый объект файла. Остальная часть тела разбирается
+    обычным json.loads и ограничена DATA_UPLOAD_MAX_MEMORY_SIZE.
+
+    Наследовать JSONParser нельзя: для него DRF заранее читает всё тело
+    запроса в память.
+    """
+
+    media_type = "application/json"
+    file_fields = ("image", "avatar")
+    strict = True
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        scanner = _JSONFileScanner(self.file_fields)
+        for chunk in iter(lambda: stream.read(UPLOAD_STREAM_CHUNK_SIZE), b""):
+            scanner.feed(chunk)
+        parse_constant = drf_json.strict_constant if self.strict else None
+        try:
+            data = json.loads(
+                scanner.close().decode(encoding),
+                parse_constant=parse_constant,
+            )
+        except ValueError as exc:
+            raise ParseError(f"JSON parse error - {exc}")
+        if not isinstance(data, dict):
+            return data
+        data.update(scanner.files)
+        files = MultiValueDict(
+            {name: [file] for name, file in scanner.files.items() if file}
+        )
+        request = parser_context.get("request")
+        if request is not None:
+            # Django закроет файлы (и удалит временные) в конце запроса.
+            request._request._files = files
+        return data
+
+
+class ORJSONParser(JSONParser):
+    """
+    JSONParser на orjson: тело разбирается целиком из байтов, без
+    промежуточной декодированной строки. NaN и бесконечность orjson не
+    принимает, поэтому при STRICT_JSON = False разбор остаётся за
+    родительским классом.
+    """
+
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if not self.strict:
+            return super().parse(stream, media_type, parser_context)
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        try:
+            data = stream.read()
+            if codecs.lookup(encoding).name != "utf-8":
+                data = data.decode(encoding)
+            return orjson.loads(data)
+        except ValueError as exc:
+            raise ParseError(f"JSON parse error - {exc}")
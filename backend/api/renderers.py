@@ -0,0 +1,187 @@
+import csv
+from abc import ABCMeta, abstractmethod
+from tempfile import SpooledTemporaryFile
+
+from django.conf import settings
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+from common.constants import (
+    SHOPPING_LIST_FILE_CHUNK_SIZE,
+    SHOPPING_LIST_SPOOL_MAX_SIZE,
+)
+from recipes.units import humanize_amount
+
+try:
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+    from reportlab.pdfgen import canvas
+except ImportError:  # PDF-выгрузка доступна, только если есть reportlab
+    canvas = None
+
+try:
+    import orjson
+except ImportError:  # ORJSONRenderer/ORJSONParser требуют orjson
+    orjson = None
+
+# Типы, которые orjson передаёт кодировщику DRF, чтобы их представление
+# совпадало с JSONRenderer (например, миллисекунды и "Z" у datetime).
+ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME if orjson else 0
+
+SHOPPING_LIST_RENDERERS = []
+
+
+def register_shopping_list_renderer(renderer_class):
+    """Добавляет формат в список доступных для выгрузки списка покупок."""
+    SHOPPING_LIST_RENDERERS.append(renderer_class)
+    return renderer_class
+
+
+def format_ingredient_line(row):
+    amount, unit = humanize_amount(row["amount"], row["base_unit"])
+    return f"{row['name']} ({unit}) — {amount}"
+
+
+class ShoppingListRenderer(BaseRenderer, metaclass=ABCMeta):
+    """
+    Базовый рендерер списка покупок.
+
+    Формат выбирается стандартным механизмом DRF (?format= или Accept),
+    а сам файл отдаётся потоком через stream(), поэтому объём памяти
+    не зависит от размера корзины.
+    """
+
+    charset = "utf-8"
+
+    @abstractmethod
+    def stream(self, rows):
+        """
+        Генератор байтовых фрагментов файла по строкам агрегации
+        (словари name, base_unit и amount в базовых единицах).
+        """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Рендер ответов об ошибках (401, 404 и т.п.) простым текстом."""
+        if data is None:
+            return b""
+        if isinstance(data, dict):
+            data = "\n".join(f"{key}: {value}" for key, value in data.items())
+        return str(data).encode(self.charset or "utf-8")
+
+
+@register_shopping_list_renderer
+class TextShoppingListRenderer(ShoppingListRenderer):
+    media_type = "text/plain"
+    format = "txt"
+
+    def stream(self, rows):
+        separator = ""
+        for row in rows:
+            yield f"{separator}{format_ingredient_line(row)}".encode(
+                self.charset
+            )
+            separator = "\n"
+
+
+class _Echo:
+    """Псевдо-буфер для csv.writer: возвращает строку вместо записи."""
+
+    def write(self, value):
+        return value
+
+
+@register_shopping_list_renderer
+class CSVShoppingListRenderer(ShoppingListRenderer):
+    media_type = "text/csv"
+    format = "csv"
+    header = ("Ингредиент", "Единица измерения", "Количество")
+
+    def stream(self, rows):
+        writer = csv.writer(_Echo())
+        yield writer.writerow(self.header).encode(self.charset)
+        for row in rows:
+            amount, unit = humanize_amount(row["amount"], row["base_unit"])
+            yield writer.writerow((row["name"], unit, amount)).encode(
+                self.charset
+            )
+
+
+class PDFShoppingListRenderer(ShoppingListRenderer):
+    """
+    PDF-выгрузка через reportlab.
+
+    PDF нельзя отдать до построения таблицы ссылок, поэтому документ
+    собирается во временный файл (на диске, если он крупнее
+    SHOPPING_LIST_SPOOL_MAX_SIZE) и затем отдаётся частями.
+    """
+
+    media_type = "application/pdf"
+    format = "pdf"
+    charset = None
+    font_name = "ShoppingListFont"
+    font_size = 12
+    margin = 50
+
+    def stream(self, rows):
+        if self.font_name not in pdfmetrics.getRegisteredFontNames():
+            pdfmetrics.registerFont(
+                TTFont(self.font_name, settings.SHOPPING_LIST_PDF_FONT)
+            )
+        buffer = SpooledTemporaryFile(max_size=SHOPPING_LIST_SPOOL_MAX_SIZE)
+        pdf = canvas.Canvas(buffer, pagesize=A4)
+        _, height = A4
+        line_height = self.font_size * 1.5
+        y = height - self.margin
+        pdf.setFont(self.font_name, self.font_size)
+        for row in rows:
+            if y < self.margin:
+                pdf.showPage()
+                pdf.setFont(self.font_name, self.font_size)
+                y = height - self.margin
+            pdf.drawString(self.margin, y, format_ingredient_line(row))
+            y -= line_height
+        pdf.save()
+        buffer.seek(0)
+        with buffer:
+            yield from iter(
+                lambda: buffer.read(SHOPPING_LIST_FILE_CHUNK_SIZE), b""
+            )
+
+
+if canvas is not None:
+    register_shopping_list_renderer(PDFShoppingListRenderer)
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer на orjson с тем же результатом для ответов API.
+
+    Типы, которых нет в JSON (datetime, Decimal, ленивые строки
+    перевода), кодирует encoder_class DRF. Отступы (Accept: ...;
+    indent=) и нестандартные UNICODE_JSON/COMPACT_JSON, а также данные,
+    которые orjson не принимает (ключи не-строки, целые больше 64 бит),
+    рендерит родительский класс. В отличие от него NaN и бесконечность
+    выводятся как null, а не вызывают ошибку.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        if (
+            self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(
+                data,
+                default=self.encoder_class().default,
+                option=ORJSON_OPTIONS,
+            )
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Как JSONRenderer: JSON должен оставаться подмножеством JS.
+        return ret.replace("\u2028".encode(), b"\\u2028").replace(
+            "\u2029".encode(), b"\\u2029"
+        )
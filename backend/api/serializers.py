@@ -1,8 +1,18 @@
+from collections import defaultdict
+
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import F, prefetch_related_objects
 from djoser.serializers import UserSerializer as DjoserUserSerializer
-from drf_extra_fields.fields import Base64ImageField
 from rest_framework import serializers
 
+from api.fields import (
+    BulkPrimaryKeyRelatedField,
+    ImageVariantField,
+    StreamedBase64ImageField,
+)
 from common.constants import (
+    MAX_BULK_RECIPES,
     MAX_COOKING_TIME,
     MAX_INGREDIENT_AMOUNT,
     MIN_COOKING_TIME,
@@ -12,6 +22,8 @@ from recipes.models import (
     Ingredient,
     Recipe,
     RecipeIngredient,
+    RecipeQuerySet,
+    ShoppingCartItemTotal,
     Tag,
 )
 from users.models import User
@@ -20,7 +32,8 @@ from users.models import User
 class UserSerializer(DjoserUserSerializer):
     """Сериализатор пользователя."""
 
-    avatar = Base64ImageField(required=False)
+    avatar = StreamedBase64ImageField(required=False)
+    avatar_thumb = ImageVariantField("avatar", "avatar_variants", "thumb")
     is_subscribed = serializers.SerializerMethodField()
 
     class Meta(DjoserUserSerializer.Meta):
@@ -32,10 +45,13 @@ class UserSerializer(DjoserUserSerializer):
             "last_name",
             "email",
             "avatar",
+            "avatar_thumb",
             "is_subscribed",
         )
 
     def get_is_subscribed(self, obj):
+        if hasattr(obj, "is_subscribed"):
+            return obj.is_subscribed
         user = getattr(self.context.get("request"), "user", None)
         return (
             user.is_authenticated
@@ -69,13 +85,15 @@ class SubscriptionSerializer(UserSerializer):
         ).data
 
     def get_recipes_count(self, obj):
+        if hasattr(obj, "recipes_count"):
+            return obj.recipes_count
         return obj.recipes.count()
 
 
 class AvatarSerializer(serializers.ModelSerializer):
     """Сериализатор для изменения аватара."""
 
-    avatar = Base64ImageField()
+    avatar = StreamedBase64ImageField()
 
     class Meta:
         model = User
@@ -109,10 +127,12 @@ class RecipeSerializer(serializers.ModelSerializer):
         many=True, read_only=True, source="recipe_ingredients"
     )
     tags = TagSerializer(many=True)
-    author = UserSerializer(read_only=True)
+    author = serializers.SerializerMethodField()
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
-    image = Base64ImageField()
+    image = StreamedBase64ImageField()
+    image_thumb = ImageVariantField("image", "image_variants", "thumb")
+    image_card = ImageVariantField("image", "image_variants", "card")
 
     class Meta:
         model = Recipe
@@ -125,17 +145,26 @@ class RecipeSerializer(serializers.ModelSerializer):
             "is_in_shopping_cart",
             "name",
             "image",
+            "image_thumb",
+            "image_card",
             "text",
             "cooking_time",
+            "favorites_count",
+            "in_carts_count",
         ]
 
     def get_author(self, obj):
         """Возвращает информацию об авторе для рецепта."""
+        author = obj.author
+        if hasattr(obj, "author_is_subscribed"):
+            author.is_subscribed = obj.author_is_subscribed
         request = self.context.get("request")
-        return UserSerializer(obj.author, context={"request": request}).data
+        return UserSerializer(author, context={"request": request}).data
 
     def get_is_favorited(self, obj):
         """True, если рецепт в избранном у пользователя."""
+        if hasattr(obj, "is_favorited"):
+            return obj.is_favorited
         user = getattr(self.context.get("request"), "user", None)
         return (
             user
@@ -145,6 +174,8 @@ class RecipeSerializer(serializers.ModelSerializer):
 
     def get_is_in_shopping_cart(self, obj):
         """True, если рецепт в корзине у пользователя."""
+        if hasattr(obj, "is_in_shopping_cart"):
+            return obj.is_in_shopping_cart
         user = getattr(self.context.get("request"), "user", None)
         return (
             user
@@ -153,10 +184,207 @@ class RecipeSerializer(serializers.ModelSerializer):
         )
 
 
+class RecipeReadListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        return self.child.represent(list(data))
+
+
+class RecipeReadSerializer(serializers.BaseSerializer):
+    """
+    Быстрое чтение рецептов: JSON совпадает с RecipeSerializer байт в
+    байт, но строится напрямую из строк values() (или готовых объектов)
+    без вложенных сериализаторов и диспетчеризации полей. Теги и
+    ингредиенты всей страницы загружаются двумя запросами.
+
+    Флаги пользователя должны быть аннотированы
+    (RecipeQuerySet.with_user_flags).
+    """
+
+    # Поля рецепта и аннотации with_user_flags() берутся как есть,
+    # поля автора — под псевдонимами.
+    row_fields = (
+        "id",
+        "name",
+        "image",
+        "image_variants",
+        "text",
+        "cooking_time",
+        "favorites_count",
+        "in_carts_count",
+        "author_id",
+        "is_favorited",
+        "is_in_shopping_cart",
+        "author_is_subscribed",
+    )
+    author_row_fields = (
+        "username",
+        "first_name",
+        "last_name",
+        "email",
+        "avatar",
+        "avatar_variants",
+    )
+
+    class Meta:
+        list_serializer_class = RecipeReadListSerializer
+
+    @classmethod
+    def rows(cls, queryset):
+        """Queryset строк для represent(); фильтры и пагинация
+        применяются к нему как к обычному."""
+        return queryset.values(
+            *cls.row_fields,
+            **{
+                f"author_{name}": F(f"author__{name}")
+                for name in cls.author_row_fields
+            },
+        )
+
+    @staticmethod
+    def row_from_instance(recipe):
+        author = recipe.author
+        return {
+            "id": recipe.pk,
+            "name": recipe.name,
+            "image": recipe.image.name,
+            "image_variants": recipe.image_variants,
+            "text": recipe.text,
+            "cooking_time": recipe.cooking_time,
+            "favorites_count": recipe.favorites_count,
+            "in_carts_count": recipe.in_carts_count,
+            "is_favorited": recipe.is_favorited,
+            "is_in_shopping_cart": recipe.is_in_shopping_cart,
+            "author_is_subscribed": recipe.author_is_subscribed,
+            "author_id": author.pk,
+            "author_username": author.username,
+            "author_first_name": author.first_name,
+            "author_last_name": author.last_name,
+            "author_email": author.email,
+            "author_avatar": author.avatar.name,
+            "author_avatar_variants": author.avatar_variants,
+        }
+
+    def to_representation(self, instance):
+        if isinstance(instance, Recipe):
+            instance = self.row_from_instance(instance)
+        return self.represent([instance])[0]
+
+    def represent(self, rows):
+        rows = [
+            self.row_from_instance(row) if isinstance(row, Recipe) else row
+            for row in rows
+        ]
+        tags, ingredients = self._load_related([row["id"] for row in rows])
+        request = self.context.get("request")
+        absolute_url = request.build_absolute_uri if request else str
+        recipe_storage = Recipe.image.field.storage
+        avatar_storage = User.avatar.field.storage
+
+        # Те же правила, что у ImageField и ImageVariantField.
+        def file_url(storage, name):
+            return absolute_url(storage.url(name)) if name else None
+
+        def variant_url(storage, name, variants, variant):
+            variant_name = variants.get(variant)
+            if variant_name:
+                return absolute_url(default_storage.url(variant_name))
+            return file_url(storage, name)
+
+        return [
+            {
+                "id": row["id"],
+                "tags": tags.get(row["id"], []),
+                "author": {
+                    "id": row["author_id"],
+                    "username": row["author_username"],
+                    "first_name": row["author_first_name"],
+                    "last_name": row["author_last_name"],
+                    "email": row["author_email"],
+                    "avatar": file_url(avatar_storage, row["author_avatar"]),
+                    "avatar_thumb": variant_url(
+                        avatar_storage,
+                        row["author_avatar"],
+                        row["author_avatar_variants"],
+                        "thumb",
+                    ),
+                    "is_subscribed": row["author_is_subscribed"],
+                },
+                "ingredients": ingredients.get(row["id"], []),
+                "is_favorited": row["is_favorited"],
+                "is_in_shopping_cart": row["is_in_shopping_cart"],
+                "name": row["name"],
+                "image": file_url(recipe_storage, row["image"]),
+                "image_thumb": variant_url(
+                    recipe_storage,
+                    row["image"],
+                    row["image_variants"],
+                    "thumb",
+                ),
+                "image_card": variant_url(
+                    recipe_storage,
+                    row["image"],
+                    row["image_variants"],
+                    "card",
+                ),
+                "text": row["text"],
+                "cooking_time": row["cooking_time"],
+                "favorites_count": row["favorites_count"],
+                "in_carts_count": row["in_carts_count"],
+            }
+            for row in rows
+        ]
+
+    @staticmethod
+    def _load_related(recipe_ids):
+        """Теги и ингредиенты рецептов в порядке RecipeSerializer."""
+        tags, ingredients = defaultdict(list), defaultdict(list)
+        if not recipe_ids:
+            return tags, ingredients
+        for recipe_id, tag_id, name, slug in (
+            Recipe.tags.through.objects.filter(recipe_id__in=recipe_ids)
+            .order_by("tag__name")
+            .values_list("recipe_id", "tag_id", "tag__name", "tag__slug")
+        ):
+            tags[recipe_id].append({"id": tag_id, "name": name, "slug": slug})
+        for (
+            recipe_id,
+            ingredient_id,
+            name,
+            unit,
+            amount,
+        ) in RecipeIngredient.objects.filter(
+            recipe_id__in=recipe_ids
+        ).values_list(
+            "recipe_id",
+            "ingredient_id",
+            "ingredient__name",
+            "ingredient__measurement_unit",
+            "amount",
+        ):
+            ingredients[recipe_id].append(
+                {
+                    "id": ingredient_id,
+                    "name": name,
+                    "measurement_unit": unit,
+                    "amount": amount,
+                }
+            )
+        return tags, ingredients
+
+
+class RecipeIngredientWriteListSerializer(serializers.ListSerializer):
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            self.child.fields["id"].preload(
+                item.get("id") for item in data if isinstance(item, dict)
+            )
+        return super().to_internal_value(data)
+
+
 class RecipeIngredientWriteSerializer(serializers.ModelSerializer):
     """Сериализатор для ингредиентов при создании рецепта."""
 
-    id = serializers.PrimaryKeyRelatedField(queryset=Ingredient.objects.all())
+    id = BulkPrimaryKeyRelatedField(queryset=Ingredient.objects.all())
     amount = serializers.IntegerField(
         min_value=MIN_INGREDIENT_AMOUNT, max_value=MAX_INGREDIENT_AMOUNT
     )
@@ -164,24 +392,25 @@ class RecipeIngredientWriteSerializer(serializers.ModelSerializer):
     class Meta:
         model = RecipeIngredient
         fields = ("id", "amount")
+        list_serializer_class = RecipeIngredientWriteListSerializer
 
 
 class ShortRecipeSerializer(serializers.ModelSerializer):
     """Короткий сериализатор для избранного/корзины."""
 
+    image_thumb = ImageVariantField("image", "image_variants", "thumb")
+
     class Meta:
         model = Recipe
-        fields = ["id", "name", "image", "cooking_time"]
+        fields = ["id", "name", "image", "image_thumb", "cooking_time"]
 
 
 class RecipeCreateSerializer(serializers.ModelSerializer):
     """Сериализатор для создания/обновления рецепта."""
 
     ingredients = RecipeIngredientWriteSerializer(many=True)
-    tags = serializers.PrimaryKeyRelatedField(
-        queryset=Tag.objects.all(), many=True
-    )
-    image = Base64ImageField(required=True)
+    tags = BulkPrimaryKeyRelatedField(queryset=Tag.objects.all(), many=True)
+    image = StreamedBase64ImageField(required=True)
     cooking_time = serializers.IntegerField(
         min_value=MIN_COOKING_TIME,
         max_value=MAX_COOKING_TIME,
@@ -252,6 +481,7 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
         ]
         RecipeIngredient.objects.bulk_create(recipe_ingredients)
 
+    @transaction.atomic
     def create(self, validated_data):
         ingredients_data = validated_data.pop("ingredients")
         tags = validated_data.pop("tags")
@@ -261,18 +491,91 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
         self._create_ingredients(recipe, ingredients_data)
         return recipe
 
+    def _update_ingredients(self, recipe, ingredients_data):
+        """
+        Приводит состав рецепта к ingredients_data, трогая только
+        отличающиеся строки: новые создаются, изменённые обновляются,
+        лишние удаляются одним DELETE. Возвращает изменения количеств
+        в базовых единицах для итогов корзин.
+        """
+        existing = {
+            row.ingredient_id: row
+            for row in RecipeIngredient.objects.filter(recipe=recipe).only(
+                "ingredient_id", "amount", "normalized_amount"
+            )
+        }
+        deltas = {}
+        to_create, to_update = [], []
+        for item in ingredients_data:
+            ingredient, amount = item["id"], item["amount"]
+            normalized_amount = amount * ingredient.unit_factor
+            row = existing.pop(ingredient.pk, None)
+            if row is None:
+                to_create.append(
+                    RecipeIngredient(
+                        recipe=recipe, ingredient=ingredient, amount=amount
+                    )
+                )
+                deltas[ingredient.pk] = normalized_amount
+            elif row.amount != amount:
+                deltas[ingredient.pk] = (
+                    normalized_amount - row.normalized_amount
+                )
+                row.amount = amount
+                row.normalized_amount = normalized_amount
+                to_update.append(row)
+        for ingredient_id, row in existing.items():
+            deltas[ingredient_id] = -row.normalized_amount
+        if existing:
+            RecipeIngredient.objects.filter(
+                pk__in=[row.pk for row in existing.values()]
+            ).delete_rows()
+        if to_update:
+            RecipeIngredient.objects.bulk_update(
+                to_update, ["amount", "normalized_amount"]
+            )
+        if to_create:
+            RecipeIngredient.objects.bulk_create(to_create)
+        return deltas
+
+    def _update_tags(self, recipe, tags):
+        """Добавляет и удаляет только изменившиеся связи с тегами."""
+        RecipeTag = Recipe.tags.through
+        current = set(
+            RecipeTag.objects.filter(recipe=recipe).values_list(
+                "tag_id", flat=True
+            )
+        )
+        new = {tag.pk for tag in tags}
+        if current - new:
+            RecipeTag.objects.filter(
+                recipe=recipe, tag_id__in=current - new
+            ).delete()
+        if new - current:
+            RecipeTag.objects.bulk_create(
+                RecipeTag(recipe=recipe, tag_id=tag_id)
+                for tag_id in new - current
+            )
+
+    @transaction.atomic
     def update(self, instance, validated_data):
+        """
+        Состав и теги обновляются по разнице с текущими; сигналы
+        сохранения рецепта (super().update) затем сбрасывают кэши и
+        обновляют индекс по ингредиентам.
+        """
         ingredients_data = validated_data.pop("ingredients")
-        tags = validated_data.pop("tags")
-        instance.tags.set(tags)
-
-        instance.recipe_ingredients.all().delete()
-        self._create_ingredients(instance, ingredients_data)
-
+        self._update_tags(instance, validated_data.pop("tags"))
+        ShoppingCartItemTotal.objects.change_recipe_ingredients(
+            instance, self._update_ingredients(instance, ingredients_data)
+        )
         return super().update(instance, validated_data)
 
     def to_representation(self, instance):
         """После создания/обновления возвращаем нормальный RecipeSerializer."""
+        prefetch_related_objects(
+            [instance], *RecipeQuerySet.prefetch_lookups()
+        )
         return RecipeSerializer(instance, context=self.context).data
 
 
@@ -280,3 +583,31 @@ class IngredientSerializer(serializers.ModelSerializer):
     class Meta:
         model = Ingredient
         fields = ["id", "name", "measurement_unit"]
+
+
+class RecipesByIngredientsQuerySerializer(serializers.Serializer):
+    """Параметры поиска рецептов по имеющимся ингредиентам."""
+
+    have = serializers.CharField()
+    max_missing = serializers.IntegerField(min_value=0, required=False)
+
+    def validate_have(self, value):
+        items = [item.strip() for item in value.split(",") if item.strip()]
+        if not items or not all(item.isdigit() for item in items):
+            raise serializers.ValidationError(
+                "Укажите id ингредиентов через запятую."
+            )
+        return [int(item) for item in items]
+
+
+class RecipeIdsSerializer(serializers.Serializer):
+    """Список id рецептов для пакетных операций с избранным и корзиной."""
+
+    recipes = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=MAX_BULK_RECIPES,
+    )
+
+    def validate_recipes(self, value):
+        return list(dict.fromkeys(value))
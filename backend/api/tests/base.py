@@ -0,0 +1,74 @@
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient, APITestCase
+
+from recipes.autocomplete import ingredient_autocomplete
+from recipes.ingredient_index import recipe_ingredient_index
+from recipes.models import Ingredient, Recipe, RecipeIngredient, Tag
+from users.models import User
+
+
+# Превышение бюджета SQL-запросов в любом тесте — ошибка.
+@override_settings(QUERY_BUDGET_STRICT=True)
+class FoodgramAPITestCase(APITestCase):
+    """Общие фабрики данных и клиенты с токеном."""
+
+    def setUp(self):
+        # Кэши сбрасываются после фиксации транзакции, а тесты
+        # выполняются в откатываемой транзакции.
+        cache.clear()
+        ingredient_autocomplete.invalidate()
+        recipe_ingredient_index.invalidate()
+
+    @staticmethod
+    def create_user(number):
+        return User.objects.create_user(
+            email=f"user{number}@example.com",
+            password="password",
+            username=f"user{number}",
+            first_name=f"Имя{number}",
+            last_name=f"Фамилия{number}",
+        )
+
+    @staticmethod
+    def client_for(user=None):
+        client = APIClient()
+        if user is not None:
+            token, _ = Token.objects.get_or_create(user=user)
+            client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+        return client
+
+    @staticmethod
+    def create_tags(count):
+        return [
+            Tag.objects.create(name=f"Тег {number}", slug=f"tag-{number}")
+            for number in range(count)
+        ]
+
+    @staticmethod
+    def create_ingredients(count):
+        return [
+            Ingredient.objects.create(
+                name=f"Ингредиент {number}", measurement_unit="г"
+            )
+            for number in range(count)
+        ]
+
+    @staticmethod
+    def create_recipe(author, tags, ingredients, name="Рецепт"):
+        recipe = Recipe.objects.create(
+            author=author,
+            name=name,
+            text="Описание",
+            cooking_time=10,
+            image="recipes/test.png",
+        )
+        recipe.tags.set(tags)
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(
+                recipe=recipe, ingredient=ingredient, amount=amount
+            )
+            for amount, ingredient in enumerate(ingredients, start=1)
+        )
+        return recipe
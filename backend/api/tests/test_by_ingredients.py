@@ -0,0 +1,196 @@
+from api.tests.base import FoodgramAPITestCase
+from recipes.ingredient_index import recipe_ingredient_index
+
+RECIPES_URL = "/api/recipes/"
+BY_INGREDIENTS_URL = f"{RECIPES_URL}by-ingredients/"
+
+
+class RecipeIngredientIndexTests(FoodgramAPITestCase):
+    """Ранжирование по доле имеющихся ингредиентов и обновление индекса."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = cls.create_user(0)
+        cls.tags = cls.create_tags(1)
+        cls.ingredients = cls.create_ingredients(5)
+        a, b, c, d, e = cls.ingredients
+        cls.pair = cls.create_recipe(cls.user, cls.tags, [a, b], "Пара")
+        cls.single = cls.create_recipe(cls.user, cls.tags, [a], "Один")
+        cls.triple = cls.create_recipe(cls.user, cls.tags, [a, b, c], "Три")
+        cls.quad = cls.create_recipe(
+            cls.user, cls.tags, [b, c, d, e], "Четыре"
+        )
+        cls.other = cls.create_recipe(cls.user, cls.tags, [c, d], "Другой")
+        cls.have = [a.pk, b.pk]
+
+    def search(self, have=None, max_missing=None):
+        return list(
+            recipe_ingredient_index.search(
+                have if have is not None else self.have, max_missing
+            )[:]
+        )
+
+    def test_ranking_and_counts(self):
+        # Полные совпадения разного размера идут вместе, новые сначала.
+        self.assertEqual(
+            self.search(),
+            [
+                (self.single.pk, 1, 0, 1),
+                (self.pair.pk, 2, 0, 2),
+                (self.triple.pk, 2, 1, 3),
+                (self.quad.pk, 1, 3, 4),
+            ],
+        )
+
+    def test_max_missing(self):
+        self.assertEqual(
+            [recipe_id for recipe_id, *_ in self.search(max_missing=1)],
+            [self.single.pk, self.pair.pk, self.triple.pk],
+        )
+        self.assertEqual(
+            [recipe_id for recipe_id, *_ in self.search(max_missing=0)],
+            [self.single.pk, self.pair.pk],
+        )
+
+    def test_slices(self):
+        matches = recipe_ingredient_index.search(self.have)
+        everything = matches[:]
+        self.assertEqual(len(matches), 4)
+        for start, stop in ((0, 1), (1, 3), (3, 4), (2, 10), (4, 5)):
+            with self.subTest(start=start, stop=stop):
+                self.assertEqual(matches[start:stop], everything[start:stop])
+        self.assertEqual(matches[2], everything[2])
+
+    def test_unknown_ingredients(self):
+        self.assertEqual(self.search([0, 10**6]), [])
+
+    def test_recipe_edit_refreshes_index_in_place(self):
+        a, b, c, d, e = self.ingredients
+        self.search()
+        data = {
+            "name": "Другой",
+            "text": "Описание",
+            "cooking_time": 10,
+            "tags": [tag.pk for tag in self.tags],
+            "ingredients": [
+                {"id": a.pk, "amount": 1},
+                {"id": c.pk, "amount": 1},
+            ],
+        }
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client_for(self.user).patch(
+                f"{RECIPES_URL}{self.other.pk}/", data, format="json"
+            )
+        self.assertEqual(response.status_code, 200)
+        # Индекс обновлён точечно, без повторной загрузки всех составов.
+        with self.assertNumQueries(0):
+            matches = self.search()
+        self.assertIn((self.other.pk, 1, 1, 2), matches)
+
+    def test_recipe_delete_removes_it_from_index(self):
+        self.search()
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client_for(self.user).delete(
+                f"{RECIPES_URL}{self.single.pk}/"
+            )
+        self.assertEqual(response.status_code, 204)
+        self.assertNotIn(
+            self.single.pk, [recipe_id for recipe_id, *_ in self.search()]
+        )
+
+    def test_new_recipe_is_added_to_index(self):
+        self.search()
+        with self.captureOnCommitCallbacks(execute=True):
+            recipe = self.create_recipe(
+                self.user, self.tags, self.ingredients[:2], "Новый"
+            )
+        self.assertEqual(self.search()[0], (recipe.pk, 2, 0, 2))
+
+
+class RecipesByIngredientsViewTests(FoodgramAPITestCase):
+    """Эндпоинт поиска: счётчики в ответе, страницы и параметры."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = cls.create_user(0)
+        tags = cls.create_tags(1)
+        cls.ingredients = cls.create_ingredients(3)
+        # Рецепт n содержит первые n % 3 + 1 ингредиентов.
+        cls.sizes = [number % 3 + 1 for number in range(7)]
+        cls.recipes = [
+            cls.create_recipe(
+                cls.user, tags, cls.ingredients[:size], f"Рецепт {number}"
+            )
+            for number, size in enumerate(cls.sizes)
+        ]
+        cls.have = str(cls.ingredients[0].pk)
+
+    def get(self, **params):
+        return self.client_for().get(
+            BY_INGREDIENTS_URL, {"have": self.have, **params}
+        )
+
+    def expected(self):
+        by_size = {}
+        for recipe, size in zip(self.recipes, self.sizes):
+            by_size.setdefault(size, []).insert(0, recipe.pk)
+        return [
+            (recipe_id, 1, size - 1)
+            for size in sorted(by_size)
+            for recipe_id in by_size[size]
+        ]
+
+    def test_results_with_counts(self):
+        response = self.get(limit=10)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["count"], 7)
+        self.assertEqual(
+            [
+                (
+                    recipe["id"],
+                    recipe["matched_ingredients"],
+                    recipe["missing_ingredients"],
+                )
+                for recipe in response.data["results"]
+            ],
+            self.expected(),
+        )
+
+    def test_pages(self):
+        ids = [recipe_id for recipe_id, *_ in self.expected()]
+        for page, expected, has_next in (
+            (1, ids[:3], True),
+            (2, ids[3:6], True),
+            (3, ids[6:], False),
+        ):
+            with self.subTest(page=page):
+                response = self.get(page=page, limit=3)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.data["count"], 7)
+                self.assertEqual(
+                    [recipe["id"] for recipe in response.data["results"]],
+                    expected,
+                )
+                self.assertEqual(bool(response.data["next"]), has_next)
+        self.assertEqual(self.get(page=4, limit=3).status_code, 404)
+
+    def test_cursor_param_is_ignored(self):
+        # Курсорного режима у поиска нет: параметр не ломает ответ.
+        for cursor in ("", "abc"):
+            with self.subTest(cursor=cursor):
+                response = self.get(cursor=cursor, limit=3)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.data["count"], 7)
+                self.assertEqual(
+                    response.data["results"],
+                    self.get(limit=3).data["results"],
+                )
+
+    def test_invalid_params(self):
+        for params in (
+            {"have": ""},
+            {"have": "1,x"},
+            {"max_missing": -1},
+        ):
+            with self.subTest(params=params):
+                self.assertEqual(self.get(**params).status_code, 400)
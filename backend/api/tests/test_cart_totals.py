@@ -0,0 +1,119 @@
+from django.urls import reverse
+
+from api.tests.base import FoodgramAPITestCase
+from recipes.models import (
+    Recipe,
+    RecipeIngredient,
+    ShoppingCart,
+    ShoppingCartItemTotal,
+)
+
+
+class CartTotalsTests(FoodgramAPITestCase):
+    """Итоги корзин совпадают с живой агрегацией после удалений."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = cls.create_user(0)
+        cls.buyer = cls.create_user(1)
+        cls.other_buyer = cls.create_user(2)
+        cls.admin = cls.create_user(3)
+        cls.admin.is_staff = cls.admin.is_superuser = True
+        cls.admin.save()
+        tags = cls.create_tags(1)
+        cls.ingredients = cls.create_ingredients(4)
+        cls.author_recipe = cls.create_recipe(
+            cls.author, tags, cls.ingredients[:3]
+        )
+        cls.buyer_recipe = cls.create_recipe(
+            cls.buyer, tags, cls.ingredients[1:]
+        )
+
+    def setUp(self):
+        super().setUp()
+        for user in (self.author, self.buyer, self.other_buyer):
+            client = self.client_for(user)
+            for recipe in (self.author_recipe, self.buyer_recipe):
+                response = client.post(
+                    f"/api/recipes/{recipe.pk}/shopping_cart/"
+                )
+                self.assertEqual(response.status_code, 201)
+        self.assertTotalsMatchCarts()
+
+    def assertTotalsMatchCarts(self):
+        stored = set(
+            ShoppingCartItemTotal.objects.values_list(
+                "user_id", "ingredient_id", "total_amount"
+            )
+        )
+        live = set(ShoppingCartItemTotal.objects.live_totals())
+        self.assertTrue(live or not ShoppingCart.objects.exists())
+        self.assertEqual(stored, live)
+
+    def test_delete_author_with_recipe_in_other_carts(self):
+        self.author.delete()
+        self.assertTotalsMatchCarts()
+        self.assertFalse(
+            ShoppingCartItemTotal.objects.filter(
+                user=self.buyer, ingredient=self.ingredients[0]
+            ).exists()
+        )
+
+    def test_delete_recipe_through_api(self):
+        response = self.client_for(self.author).delete(
+            f"/api/recipes/{self.author_recipe.pk}/"
+        )
+        self.assertEqual(response.status_code, 204)
+        self.assertTotalsMatchCarts()
+
+    def test_delete_recipes_in_admin(self):
+        self.client.force_login(self.admin)
+        response = self.client.post(
+            reverse("admin:recipes_recipe_changelist"),
+            {
+                "action": "delete_selected",
+                "_selected_action": [self.author_recipe.pk],
+                "post": "yes",
+            },
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(Recipe.objects.filter(pk=self.author_recipe.pk))
+        self.assertTotalsMatchCarts()
+
+    def test_delete_and_add_cart_items_in_admin(self):
+        self.client.force_login(self.admin)
+        response = self.client.post(
+            reverse("admin:recipes_shoppingcart_changelist"),
+            {
+                "action": "delete_selected",
+                "_selected_action": list(
+                    ShoppingCart.objects.filter(user=self.buyer).values_list(
+                        "pk", flat=True
+                    )
+                ),
+                "post": "yes",
+            },
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(
+            ShoppingCartItemTotal.objects.filter(user=self.buyer).exists()
+        )
+        self.assertTotalsMatchCarts()
+        ShoppingCart.objects.create(user=self.buyer, recipe=self.author_recipe)
+        self.assertTotalsMatchCarts()
+
+    def test_change_recipe_ingredients_outside_api(self):
+        row = RecipeIngredient.objects.get(
+            recipe=self.author_recipe, ingredient=self.ingredients[0]
+        )
+        row.amount += 10
+        row.save()
+        self.assertTotalsMatchCarts()
+        row.delete()
+        self.assertTotalsMatchCarts()
+        RecipeIngredient.objects.create(
+            recipe=self.author_recipe,
+            ingredient=self.ingredients[3],
+            amount=5,
+        )
+        self.assertTotalsMatchCarts()
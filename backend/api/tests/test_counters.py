@@ -0,0 +1,100 @@
+from django.db.models import F, Q
+from django.urls import reverse
+
+from api.tests.base import FoodgramAPITestCase
+from recipes.models import Favorite, Recipe, ShoppingCart
+
+RECIPES_URL = "/api/recipes/"
+
+
+class RecipeCountersTests(FoodgramAPITestCase):
+    """Счётчики избранного и корзин при изменениях в обход API."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = cls.create_user(0)
+        cls.users = [cls.create_user(number) for number in range(1, 4)]
+        cls.admin = cls.create_user(4)
+        cls.admin.is_staff = cls.admin.is_superuser = True
+        cls.admin.save()
+        tags = cls.create_tags(1)
+        ingredients = cls.create_ingredients(2)
+        cls.recipes = [
+            cls.create_recipe(cls.author, tags, ingredients, f"Рецепт {n}")
+            for n in range(3)
+        ]
+
+    def setUp(self):
+        super().setUp()
+        for number, user in enumerate(self.users):
+            client = self.client_for(user)
+            for recipe in self.recipes[number:]:
+                for action in ("favorite", "shopping_cart"):
+                    response = client.post(
+                        f"{RECIPES_URL}{recipe.pk}/{action}/"
+                    )
+                    self.assertEqual(response.status_code, 201)
+        self.assertCountersMatch()
+
+    def assertCountersMatch(self):
+        self.assertFalse(
+            Recipe.objects.with_live_counters().filter(
+                ~Q(favorites_count=F("live_favorites_count"))
+                | ~Q(in_carts_count=F("live_in_carts_count"))
+            )
+        )
+
+    def test_delete_selected_in_admin(self):
+        self.client.force_login(self.admin)
+        for model in (Favorite, ShoppingCart):
+            with self.subTest(model=model.__name__):
+                response = self.client.post(
+                    reverse(
+                        f"admin:recipes_{model._meta.model_name}_changelist"
+                    ),
+                    {
+                        "action": "delete_selected",
+                        "_selected_action": list(
+                            model.objects.filter(
+                                user=self.users[0]
+                            ).values_list("pk", flat=True)
+                        ),
+                        "post": "yes",
+                    },
+                )
+                self.assertEqual(response.status_code, 302)
+                self.assertFalse(model.objects.filter(user=self.users[0]))
+                self.assertCountersMatch()
+
+    def test_queryset_delete_and_create(self):
+        for model in (Favorite, ShoppingCart):
+            with self.subTest(model=model.__name__):
+                model.objects.filter(recipe=self.recipes[2]).delete()
+                self.assertCountersMatch()
+                model.objects.create(
+                    user=self.users[1], recipe=self.recipes[0]
+                )
+                self.assertCountersMatch()
+
+    def test_delete_user(self):
+        self.users[2].delete()
+        self.assertCountersMatch()
+
+    def test_anonymous_cached_list_sees_new_counters(self):
+        anonymous = self.client_for()
+        params = {"ordering": "-favorites_count"}
+        response = anonymous.get(RECIPES_URL, params)
+        self.assertEqual(response.data["results"][0]["id"], self.recipes[2].pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            for user in (self.author, self.users[1], self.admin):
+                self.client_for(user).post(
+                    f"{RECIPES_URL}{self.recipes[0].pk}/favorite/"
+                )
+        response = anonymous.get(RECIPES_URL, params)
+        first = response.data["results"][0]
+        self.assertEqual(first["id"], self.recipes[0].pk)
+        self.assertEqual(first["favorites_count"], 4)
+        with self.captureOnCommitCallbacks(execute=True):
+            Favorite.objects.filter(recipe=self.recipes[0]).delete()
+        response = anonymous.get(RECIPES_URL, params)
+        self.assertEqual(response.data["results"][-1]["favorites_count"], 0)
@@ -0,0 +1,121 @@
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import CommandError, call_command
+
+from api.tests.base import FoodgramAPITestCase
+from recipes.models import Ingredient, RecipeIngredient, Tag
+
+
+class ImportCatalogTests(FoodgramAPITestCase):
+    """Загрузка справочников: отчёт dry-run, повторный запуск, конфликты."""
+
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+
+    def write(self, name, content):
+        path = self.directory / name
+        path.write_text(content, encoding="utf-8")
+        return path
+
+    def run_import(self, path, *args):
+        stdout = StringIO()
+        call_command("import_catalog", str(path), *args, stdout=stdout)
+        return stdout.getvalue()
+
+    def test_dry_run_reports_without_writing(self):
+        Ingredient.objects.create(name="Соль", measurement_unit="г")
+        path = self.write("ingredients.csv", "Соль,г\nМука,кг\nМука,кг\n")
+        output = self.run_import(path, "--dry-run", "--verbosity", "2")
+        self.assertIn(
+            "В файле: 2; новых: 1; изменённых: 0; без изменений: 1; "
+            "есть только в базе: 0; конфликтов: 0.",
+            output,
+        )
+        self.assertIn("+ {'name': 'Мука', 'measurement_unit': 'кг'}", output)
+        self.assertEqual(Ingredient.objects.count(), 1)
+
+    def test_repeated_import_is_idempotent(self):
+        path = self.write(
+            "ingredients.json",
+            json.dumps(
+                [
+                    {"name": "Мука", "measurement_unit": "кг"},
+                    {"fields": {"name": "Молоко", "measurement_unit": "л"}},
+                ]
+            ),
+        )
+        self.assertIn("новых: 2", self.run_import(path))
+        before = list(Ingredient.objects.values().order_by("pk"))
+        output = self.run_import(path)
+        self.assertIn("новых: 0; изменённых: 0; без изменений: 2", output)
+        self.assertIn("Изменений нет.", output)
+        self.assertEqual(
+            list(Ingredient.objects.values().order_by("pk")), before
+        )
+        self.assertEqual(
+            list(
+                Ingredient.objects.order_by("name").values_list(
+                    "name", "base_unit", "unit_factor"
+                )
+            ),
+            [("Молоко", "мл", 1000), ("Мука", "г", 1000)],
+        )
+
+    def test_stale_derived_fields_are_recomputed(self):
+        user = self.create_user(0)
+        flour = Ingredient.objects.create(name="Мука", measurement_unit="кг")
+        recipe = self.create_recipe(user, self.create_tags(1), [flour])
+        # Множитель из прежней таблицы единиц.
+        Ingredient.objects.filter(pk=flour.pk).update(unit_factor=1)
+        RecipeIngredient.objects.filter(recipe=recipe).update(
+            normalized_amount=1
+        )
+        path = self.write("ingredients.csv", "Мука,кг\n")
+        self.assertIn("изменённых: 1", self.run_import(path, "--dry-run"))
+        self.assertIn("изменённых: 1", self.run_import(path))
+        flour.refresh_from_db()
+        self.assertEqual(flour.unit_factor, 1000)
+        self.assertEqual(
+            RecipeIngredient.objects.get(recipe=recipe).normalized_amount,
+            1000,
+        )
+
+    def test_tag_rename_is_applied(self):
+        Tag.objects.create(name="Завтрак", slug="breakfast")
+        path = self.write("tags.csv", "Утро,breakfast\nОбед,lunch\n")
+        output = self.run_import(path, "--catalog", "tags")
+        self.assertIn("новых: 1; изменённых: 1", output)
+        self.assertEqual(
+            dict(Tag.objects.values_list("slug", "name")),
+            {"breakfast": "Утро", "lunch": "Обед"},
+        )
+        self.assertIn(
+            "без изменений: 2", self.run_import(path, "--catalog", "tags")
+        )
+
+    def test_tag_name_collision_is_reported(self):
+        Tag.objects.create(name="Завтрак", slug="breakfast")
+        path = self.write("tags.csv", "Завтрак,morning\n")
+        output = self.run_import(path, "--catalog", "tags", "--dry-run")
+        self.assertIn("конфликтов: 1.", output)
+        self.assertIn(
+            "! name='Завтрак' у нескольких записей: breakfast, morning",
+            output,
+        )
+        with self.assertRaisesMessage(CommandError, "ничего не записано"):
+            self.run_import(path, "--catalog", "tags")
+        self.assertEqual(
+            list(Tag.objects.values_list("slug", flat=True)), ["breakfast"]
+        )
+
+    def test_duplicate_tag_names_in_file_are_reported(self):
+        path = self.write("tags.csv", "Обед,lunch\nОбед,dinner\n")
+        with self.assertRaisesMessage(CommandError, "ничего не записано"):
+            self.run_import(path, "--catalog", "tags")
+        self.assertFalse(Tag.objects.exists())
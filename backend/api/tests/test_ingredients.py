@@ -0,0 +1,33 @@
+from unittest import mock
+
+from api.tests.base import FoodgramAPITestCase
+from recipes.autocomplete import IngredientAutocomplete
+from recipes.models import Ingredient
+
+
+class IngredientAutocompleteTests(FoodgramAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for name in ("Сахар", "Сахарная пудра", "Соль", "Ванильный сахар"):
+            Ingredient.objects.create(name=name, measurement_unit="г")
+
+    def test_prefix_matches_come_first(self):
+        response = self.client.get("/api/ingredients/", {"name": "сах"})
+        self.assertEqual(
+            [item["name"] for item in response.data],
+            ["Сахар", "Сахарная пудра", "Ванильный сахар"],
+        )
+
+    def test_index_loaded_before_invalidate_is_not_kept(self):
+        autocomplete = IngredientAutocomplete()
+        load = autocomplete._load
+
+        def load_and_change():
+            index = load()
+            Ingredient.objects.create(name="Сахарин", measurement_unit="г")
+            autocomplete.invalidate()
+            return index
+
+        with mock.patch.object(autocomplete, "_load", load_and_change):
+            self.assertEqual(len(autocomplete.search("сахар")), 3)
+        self.assertEqual(len(autocomplete.search("сахар")), 4)
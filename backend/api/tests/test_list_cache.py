@@ -0,0 +1,84 @@
+from api.tests.base import FoodgramAPITestCase
+
+RECIPES_URL = "/api/recipes/"
+
+
+class AnonymousListCacheTests(FoodgramAPITestCase):
+    """Страницы списка для анонимов берутся из кэша до смены поколения."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = cls.create_user(0)
+        cls.tag, cls.empty_tag = cls.create_tags(2)
+        cls.ingredient = cls.create_ingredients(1)[0]
+        cls.recipe = cls.create_recipe(cls.user, [cls.tag], [cls.ingredient])
+
+    def get_cached(self, params=None):
+        """Первый запрос заполняет кэш, повторный обходится без SQL."""
+        client = self.client_for()
+        response = client.get(RECIPES_URL, params)
+        self.assertEqual(response.status_code, 200)
+        with self.assertNumQueries(0):
+            cached = client.get(RECIPES_URL, params)
+        self.assertEqual(cached.data, response.data)
+        return cached.data["results"][0]
+
+    def assertChangeDropsCache(self, change, field, expected):
+        self.get_cached()
+        with self.captureOnCommitCallbacks(execute=True):
+            change()
+        self.assertEqual(self.get_cached()[field], expected)
+
+    def test_filtered_pages_are_cached_separately(self):
+        self.get_cached({"tags": self.tag.slug})
+        response = self.client_for().get(
+            RECIPES_URL, {"tags": self.empty_tag.slug}
+        )
+        self.assertEqual(response.data["results"], [])
+
+    def test_recipe_change_drops_cache(self):
+        def change():
+            self.recipe.name = "Новое название"
+            self.recipe.save()
+
+        self.assertChangeDropsCache(change, "name", "Новое название")
+
+    def test_tag_change_drops_cache(self):
+        def change():
+            self.tag.name = "Новый тег"
+            self.tag.save()
+
+        self.assertChangeDropsCache(
+            change,
+            "tags",
+            [{**self.get_cached()["tags"][0], "name": "Новый тег"}],
+        )
+
+    def test_ingredient_change_drops_cache(self):
+        def change():
+            self.ingredient.name = "Новый ингредиент"
+            self.ingredient.save()
+
+        self.assertChangeDropsCache(
+            change,
+            "ingredients",
+            [
+                {
+                    **self.get_cached()["ingredients"][0],
+                    "name": "Новый ингредиент",
+                }
+            ],
+        )
+
+    def test_authenticated_requests_bypass_cache(self):
+        self.get_cached()
+        client = self.client_for(self.user)
+        with self.assertNumQueries(5):
+            response = client.get(RECIPES_URL)
+        self.assertEqual(response.status_code, 200)
+
+    def test_unknown_params_bypass_cache(self):
+        client = self.client_for()
+        client.get(RECIPES_URL, {"unknown": 1})
+        with self.assertNumQueries(4):
+            client.get(RECIPES_URL, {"unknown": 1})
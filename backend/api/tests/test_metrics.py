@@ -0,0 +1,64 @@
+from django.test import override_settings
+
+from api.tests.base import FoodgramAPITestCase
+from recipes.models import ShoppingCart
+
+METRICS_URL = "/api/metrics/"
+
+
+class MetricsAccessTests(FoodgramAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = cls.create_user(0)
+        cls.staff = cls.create_user(1)
+        cls.staff.is_staff = True
+        cls.staff.save()
+
+    @override_settings(METRICS_TOKEN="")
+    def test_without_token_only_staff(self):
+        self.assertEqual(self.client.get(METRICS_URL).status_code, 404)
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(METRICS_URL).status_code, 404)
+        self.client.force_login(self.staff)
+        self.assertEqual(self.client.get(METRICS_URL).status_code, 200)
+
+    @override_settings(METRICS_TOKEN="secret")
+    def test_with_token(self):
+        self.assertEqual(self.client.get(METRICS_URL).status_code, 403)
+        response = self.client.get(
+            METRICS_URL, HTTP_AUTHORIZATION="Bearer wrong"
+        )
+        self.assertEqual(response.status_code, 403)
+        response = self.client.get(
+            METRICS_URL, HTTP_AUTHORIZATION="Bearer secret"
+        )
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(DEBUG=False)
+    def test_server_timing_only_for_staff(self):
+        for user, expected in (
+            (None, False),
+            (self.user, False),
+            (self.staff, True),
+        ):
+            with self.subTest(user=user):
+                response = self.client_for(user).get("/api/tags/")
+                self.assertEqual("Server-Timing" in response, expected)
+        with self.settings(DEBUG=True):
+            response = self.client_for().get("/api/tags/")
+        self.assertIn("Server-Timing", response)
+
+    def test_streaming_queries_are_counted(self):
+        author = self.create_user(2)
+        recipe = self.create_recipe(
+            author, self.create_tags(1), self.create_ingredients(2)
+        )
+        ShoppingCart.objects.create(user=self.user, recipe=recipe)
+        response = self.client_for(self.user).get(
+            "/api/recipes/download_shopping_cart/", {"format": "txt"}
+        )
+        metrics = response.wsgi_request.metrics
+        # До отдачи тела — только проверка токена.
+        self.assertEqual(metrics.queries, 1)
+        self.assertIn("Ингредиент 0", b"".join(response).decode())
+        self.assertEqual(metrics.queries, 2)
@@ -0,0 +1,189 @@
+import base64
+import json
+import math
+from io import BytesIO
+from unittest import skipIf
+
+from django.core.files.uploadedfile import (
+    InMemoryUploadedFile,
+    TemporaryUploadedFile,
+)
+from django.test import SimpleTestCase, override_settings
+from rest_framework.exceptions import ParseError, ValidationError
+from rest_framework.parsers import JSONParser
+
+from api.parsers import Base64StreamingJSONParser, ORJSONParser, orjson
+from common.constants import MAX_UPLOAD_IMAGE_SIZE
+
+IMAGE = bytes(range(256)) * 4
+
+
+class ChunkedStream(BytesIO):
+    """Поток, отдающий тело кусками не больше chunk_size байт."""
+
+    def __init__(self, data, chunk_size):
+        super().__init__(data)
+        self.chunk_size = chunk_size
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = self.chunk_size
+        return super().read(min(size, self.chunk_size))
+
+
+def data_uri(content, content_type="image/png"):
+    return f"data:{content_type};base64," + base64.b64encode(content).decode()
+
+
+class Base64StreamingJSONParserTests(SimpleTestCase):
+    """Разбор JSON с base64-файлами, вырезанными из тела на лету."""
+
+    def parse(self, body, chunk_size=64 * 1024):
+        if not isinstance(body, bytes):
+            body = json.dumps(body).encode()
+        stream = ChunkedStream(body, chunk_size)
+        return Base64StreamingJSONParser().parse(stream), stream
+
+    def assertFile(self, file, content, content_type="image/png"):
+        self.addCleanup(file.close)
+        self.assertEqual(file.read(), content)
+        self.assertEqual(file.size, len(content))
+        self.assertEqual(file.content_type, content_type)
+
+    def test_data_uri_split_across_chunks(self):
+        body = {"name": "Рецепт", "image": data_uri(IMAGE), "cooking_time": 5}
+        for chunk_size in (1, 3, 7, 64, 1000):
+            with self.subTest(chunk_size=chunk_size):
+                data, _ = self.parse(body, chunk_size)
+                self.assertEqual(data["name"], "Рецепт")
+                self.assertEqual(data["cooking_time"], 5)
+                self.assertIsInstance(data["image"], InMemoryUploadedFile)
+                self.assertFile(data["image"], IMAGE)
+
+    def test_plain_base64_without_header(self):
+        data, _ = self.parse(
+            {"avatar": base64.b64encode(IMAGE).decode()}, chunk_size=5
+        )
+        self.assertFile(data["avatar"], IMAGE, content_type=None)
+
+    def test_escaped_characters_in_other_fields(self):
+        text = 'кавычки "image": "x", \\ слеш,\n{[:]}  é'
+        body = json.dumps(
+            {"text": text, "image": data_uri(IMAGE), "name": "\\"}
+        ).encode()
+        for chunk_size in (1, 2, 1000):
+            with self.subTest(chunk_size=chunk_size):
+                data, _ = self.parse(body, chunk_size)
+                self.assertEqual(data["text"], text)
+                self.assertEqual(data["name"], "\\")
+                self.assertFile(data["image"], IMAGE)
+
+    def test_escaped_slash_in_base64(self):
+        encoded = data_uri(IMAGE).replace("/", "\\/")
+        self.assertIn("\\/", encoded)
+        body = ('{"image": "' + encoded + '"}').encode()
+        data, _ = self.parse(body, chunk_size=3)
+        self.assertFile(data["image"], IMAGE)
+
+    def test_missing_padding(self):
+        content = IMAGE[:10]
+        encoded = data_uri(content).rstrip("=")
+        data, _ = self.parse({"image": encoded})
+        self.assertFile(data["image"], content)
+
+    @override_settings(FILE_UPLOAD_MAX_MEMORY_SIZE=100)
+    def test_large_file_spills_to_disk(self):
+        data, _ = self.parse({"image": data_uri(IMAGE)}, chunk_size=33)
+        self.assertIsInstance(data["image"], TemporaryUploadedFile)
+        self.assertFile(data["image"], IMAGE)
+
+    def test_too_large_file_is_rejected_while_reading(self):
+        content = b"\0" * (MAX_UPLOAD_IMAGE_SIZE + 1024 * 1024)
+        body = json.dumps({"image": data_uri(content)}).encode()
+        stream = ChunkedStream(body, 64 * 1024)
+        with self.assertRaises(ValidationError) as context:
+            Base64StreamingJSONParser().parse(stream)
+        self.assertIn("image", context.exception.detail)
+        self.assertLess(stream.tell(), len(body))
+
+    def test_invalid_base64(self):
+        for value in (
+            "data:image/png;base64,@@@@",
+            "data:image/png;base64,AAA\\u0041",
+            "не base64",
+        ):
+            with self.subTest(value=value):
+                body = ('{"image": "' + value + '"}').encode()
+                with self.assertRaises(ValidationError) as context:
+                    self.parse(body)
+                self.assertIn("image", context.exception.detail)
+
+    def test_empty_and_null_values(self):
+        data, _ = self.parse({"image": "", "avatar": None})
+        self.assertEqual(data, {"image": "", "avatar": None})
+
+    def test_nested_image_keys_are_not_intercepted(self):
+        body = {
+            "ingredients": [{"id": 1, "image": "AAAA"}],
+            "meta": {"image": "AAAA", "nested": {"avatar": "AAAA"}},
+            "image": data_uri(IMAGE),
+        }
+        data, _ = self.parse(body, chunk_size=4)
+        self.assertEqual(data["ingredients"], body["ingredients"])
+        self.assertEqual(data["meta"], body["meta"])
+        self.assertFile(data["image"], IMAGE)
+
+    def test_top_level_array_is_not_intercepted(self):
+        body = [{"image": "AAAA"}]
+        data, _ = self.parse(body)
+        self.assertEqual(data, body)
+
+    def test_malformed_json(self):
+        for body in (b'{"name": }', b'{"image": "AAAA', b'{"name": "x'):
+            with self.subTest(body=body):
+                with self.assertRaises(ParseError):
+                    self.parse(body)
+
+
+@skipIf(orjson is None, "не установлен orjson")
+class ORJSONParserTests(SimpleTestCase):
+    """ORJSONParser разбирает тела так же, как JSONParser DRF."""
+
+    def parse(self, body, parser_class=ORJSONParser, encoding=None):
+        context = {"encoding": encoding} if encoding else None
+        return parser_class().parse(BytesIO(body), parser_context=context)
+
+    def test_same_result_as_json_parser(self):
+        for body in (
+            '{"name": "Борщ 🍲", "amount": 1.5, "tags": [1, 2], "x": null}',
+            '[{"id": 1, "amount": 10}, true, false]',
+            '"\\u2028 строка"',
+            "12345678901234567890",
+        ):
+            with self.subTest(body=body):
+                self.assertEqual(
+                    self.parse(body.encode()),
+                    self.parse(body.encode(), JSONParser),
+                )
+
+    def test_other_encoding(self):
+        body = '{"name": "Борщ"}'.encode("cp1251")
+        self.assertEqual(self.parse(body, encoding="cp1251"), {"name": "Борщ"})
+
+    def test_malformed_input(self):
+        for body in (
+            b"",
+            b'{"name": }',
+            b'{"name": "x"',
+            b"[1, 2,]",
+            b"{'name': 'x'}",
+            b'{"name": "\xff"}',
+            b'{"value": NaN}',
+        ):
+            with self.subTest(body=body):
+                with self.assertRaises(ParseError):
+                    self.parse(body)
+
+    def test_non_strict_mode_accepts_nan(self):
+        parser_class = type("Parser", (ORJSONParser,), {"strict": False})
+        self.assertTrue(math.isnan(self.parse(b"NaN", parser_class)))
@@ -0,0 +1,189 @@
+import base64
+from io import BytesIO
+from tempfile import TemporaryDirectory
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import override_settings
+from django.utils import timezone
+from PIL import Image
+
+from api.tests.base import FoodgramAPITestCase
+from recipes.models import Favorite, RecipeTrendingScore, ShoppingCart
+from recipes.shortlinks import encode_id
+from users.models import Subscription
+
+RECIPES_URL = "/api/recipes/"
+
+
+def png_data_uri():
+    buffer = BytesIO()
+    Image.new("RGB", (1, 1)).save(buffer, "PNG")
+    return (
+        "data:image/png;base64," + base64.b64encode(buffer.getvalue()).decode()
+    )
+
+
+class QueryBudgetsTests(FoodgramAPITestCase):
+    """Каждый эндпоинт из QUERY_BUDGETS укладывается в свой бюджет."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        media_root = cls.enterClassContext(TemporaryDirectory())
+        cls.enterClassContext(override_settings(MEDIA_ROOT=media_root))
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = cls.create_user(0)
+        cls.author = cls.create_user(1)
+        cls.others = [cls.create_user(number) for number in range(2, 5)]
+        cls.tags = cls.create_tags(3)
+        cls.ingredients = cls.create_ingredients(20)
+        cls.recipes = [
+            cls.create_recipe(
+                cls.author if number % 2 else cls.user,
+                cls.tags,
+                cls.ingredients[number:][:10],
+                f"Рецепт {number}",
+            )
+            for number in range(10)
+        ]
+        for user in (cls.user, *cls.others):
+            Subscription.objects.create(user=user, author=cls.author)
+            for recipe in cls.recipes[:6]:
+                Favorite.objects.create(user=user, recipe=recipe)
+                ShoppingCart.objects.create(user=user, recipe=recipe)
+        now = timezone.now()
+        RecipeTrendingScore.objects.bulk_create(
+            RecipeTrendingScore(
+                recipe=recipe, rank=rank, score=10 - rank, computed_at=now
+            )
+            for rank, recipe in enumerate(cls.recipes, start=1)
+        )
+
+    def recipe_data(self, ingredients):
+        return {
+            "name": "Новый рецепт",
+            "text": "Описание",
+            "cooking_time": 15,
+            "image": png_data_uri(),
+            "tags": [tag.pk for tag in self.tags],
+            "ingredients": [
+                {"id": ingredient.pk, "amount": 5}
+                for ingredient in ingredients
+            ],
+        }
+
+    def requests(self):
+        """Запрос к каждому эндпоинту — в худшем для него варианте."""
+        client = self.client_for(self.user)
+        anonymous = self.client_for()
+        own, other = self.recipes[0].pk, self.recipes[7].pk
+        recipe_url = f"{RECIPES_URL}{own}/"
+        return {
+            "recipes.list": lambda: client.get(
+                RECIPES_URL, {"tags": ["tag-0", "tag-1"], "limit": 10}
+            ),
+            "recipes.retrieve": lambda: client.get(recipe_url),
+            "recipes.feed": lambda: client.get(f"{RECIPES_URL}feed/"),
+            "recipes.trending": lambda: client.get(f"{RECIPES_URL}trending/"),
+            "recipes.by_ingredients": lambda: client.get(
+                f"{RECIPES_URL}by-ingredients/",
+                {
+                    "have": ",".join(
+                        str(ingredient.pk)
+                        for ingredient in self.ingredients[:8]
+                    ),
+                    "max_missing": 3,
+                },
+            ),
+            "recipes.get_link": lambda: client.get(
+                f"{RECIPES_URL}{other}/get-link/"
+            ),
+            "recipes.download_shopping_cart": lambda: client.get(
+                f"{RECIPES_URL}download_shopping_cart/", {"format": "txt"}
+            ),
+            "recipes.create": lambda: client.post(
+                RECIPES_URL,
+                self.recipe_data(self.ingredients[:15]),
+                format="json",
+            ),
+            "recipes.update": lambda: client.put(
+                recipe_url,
+                self.recipe_data(self.ingredients[5:20]),
+                format="json",
+            ),
+            "recipes.partial_update": lambda: client.patch(
+                recipe_url,
+                self.recipe_data(self.ingredients[:15]),
+                format="json",
+            ),
+            "recipes.favorite": lambda: client.post(
+                f"{RECIPES_URL}{other}/favorite/"
+            ),
+            "recipes.favorite_bulk": lambda: client.post(
+                f"{RECIPES_URL}favorite/bulk/",
+                {"recipes": [recipe.pk for recipe in self.recipes]},
+                format="json",
+            ),
+            "recipes.shopping_cart": lambda: client.post(
+                f"{RECIPES_URL}{other}/shopping_cart/"
+            ),
+            "recipes.shopping_cart_bulk": lambda: client.post(
+                f"{RECIPES_URL}shopping_cart/bulk/",
+                {"recipes": [recipe.pk for recipe in self.recipes]},
+                format="json",
+            ),
+            "recipes.clear_shopping_cart": lambda: client.delete(
+                f"{RECIPES_URL}shopping_cart/"
+            ),
+            # Рецепт в избранном и корзинах других пользователей.
+            "recipes.destroy": lambda: client.delete(recipe_url),
+            "ingredients.list": lambda: client.get("/api/ingredients/"),
+            "ingredients.retrieve": lambda: client.get(
+                f"/api/ingredients/{self.ingredients[0].pk}/"
+            ),
+            "tags.list": lambda: client.get("/api/tags/"),
+            "tags.retrieve": lambda: client.get(
+                f"/api/tags/{self.tags[0].pk}/"
+            ),
+            "users.create": lambda: anonymous.post(
+                "/api/users/",
+                {
+                    "email": "new@example.com",
+                    "username": "new",
+                    "first_name": "Имя",
+                    "last_name": "Фамилия",
+                    "password": "Pa55word-for-test",
+                },
+            ),
+            "users.list": lambda: client.get("/api/users/"),
+            "users.retrieve": lambda: client.get(
+                f"/api/users/{self.author.pk}/"
+            ),
+            "users.me": lambda: client.get("/api/users/me/"),
+            "users.subscriptions": lambda: client.get(
+                "/api/users/subscriptions/", {"recipes_limit": 3}
+            ),
+            "users.subscribe": lambda: client.post(
+                f"/api/users/{self.others[0].pk}/subscribe/"
+            ),
+            "short-link": lambda: anonymous.get(f"/s/{encode_id(other)}/"),
+        }
+
+    def test_endpoints_fit_budgets(self):
+        requests = self.requests()
+        self.assertEqual(set(requests), set(settings.QUERY_BUDGETS))
+        for endpoint, send in requests.items():
+            with self.subTest(endpoint=endpoint):
+                # Холодные кэши — худший случай.
+                cache.clear()
+                response = send()
+                if response.streaming:
+                    # Запросы потокового ответа считаются при его отдаче.
+                    b"".join(response.streaming_content)
+                self.assertLess(response.status_code, 400)
+                self.assertEqual(
+                    response.wsgi_request.metrics.endpoint, endpoint
+                )
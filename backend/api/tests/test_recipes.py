@@ -0,0 +1,259 @@
+import base64
+import json
+from urllib.parse import urlencode
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.tests.base import FoodgramAPITestCase
+from recipes.models import (
+    Favorite,
+    Recipe,
+    RecipeIngredient,
+    ShoppingCart,
+)
+from recipes.signals import deferred_recipe_touches
+from users.models import Subscription
+
+RECIPES_URL = "/api/recipes/"
+
+
+class RecipeListQueriesTests(FoodgramAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = cls.create_user(0)
+        authors = [cls.create_user(number) for number in range(1, 6)]
+        tags = cls.create_tags(3)
+        ingredients = cls.create_ingredients(10)
+        recipes = [
+            cls.create_recipe(
+                authors[number % len(authors)],
+                tags[: 1 + number % len(tags)],
+                [ingredients[(number + shift) % 10] for shift in range(4)],
+                name=f"Рецепт {number}",
+            )
+            for number in range(60)
+        ]
+        for recipe in recipes[::3]:
+            Favorite.objects.create(user=cls.user, recipe=recipe)
+            ShoppingCart.objects.create(user=cls.user, recipe=recipe)
+        Subscription.objects.create(user=cls.user, author=authors[0])
+
+    def test_query_count_does_not_depend_on_page_size(self):
+        client = self.client_for(self.user)
+        # Токен, страница с COUNT(*), строки рецептов, теги, ингредиенты.
+        for limit in (6, 20, 60):
+            with self.subTest(limit=limit), self.assertNumQueries(5):
+                response = client.get(RECIPES_URL, {"limit": limit})
+            self.assertEqual(len(response.data["results"]), limit)
+
+
+class RecipeConditionalGetTests(FoodgramAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = cls.create_user(0)
+        cls.tag = cls.create_tags(1)[0]
+        cls.ingredients = cls.create_ingredients(15)
+        cls.recipe = cls.create_recipe(cls.user, [cls.tag], cls.ingredients)
+        cls.url = f"{RECIPES_URL}{cls.recipe.pk}/"
+
+    def assertStaleETag(self, change):
+        client = self.client_for(self.user)
+        etag = client.get(self.url).headers["ETag"]
+        self.assertEqual(
+            client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            change()
+        response = client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_tag_rename_changes_etag(self):
+        self.tag.name = "Новое название"
+        response = self.assertStaleETag(self.tag.save)
+        self.assertEqual(response.data["tags"][0]["name"], "Новое название")
+
+    def test_ingredient_rename_changes_etag(self):
+        ingredient = self.ingredients[0]
+        ingredient.name = "Новый ингредиент"
+        response = self.assertStaleETag(ingredient.save)
+        self.assertIn(
+            "Новый ингредиент",
+            [item["name"] for item in response.data["ingredients"]],
+        )
+
+    def test_delete_does_not_touch_recipe_per_ingredient(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client_for(self.user).delete(self.url)
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(
+            [
+                query
+                for query in queries
+                if query["sql"].startswith('UPDATE "recipes_recipe"')
+            ]
+        )
+
+    def test_deferred_touches_update_recipe_once(self):
+        rows = RecipeIngredient.objects.filter(recipe=self.recipe)
+        with CaptureQueriesContext(connection) as queries:
+            with deferred_recipe_touches():
+                for row in rows:
+                    row.amount += 1
+                    row.save()
+        updates = [
+            query
+            for query in queries
+            if query["sql"].startswith('UPDATE "recipes_recipe"')
+        ]
+        self.assertEqual(len(updates), 1)
+
+
+class RecipeCursorPaginationTests(FoodgramAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = cls.create_user(0)
+        tags = cls.create_tags(1)
+        ingredients = cls.create_ingredients(1)
+        recipes = [
+            cls.create_recipe(author, tags, ingredients, f"Рецепт {number}")
+            for number in range(9)
+        ]
+        # Повторяющиеся значения счётчика: порядок внутри решает id.
+        for number, recipe in enumerate(recipes):
+            Recipe.objects.filter(pk=recipe.pk).update(
+                favorites_count=number % 3
+            )
+        # Совпадение в названии ранжируется выше, чем в описании.
+        cls.name_matches = [recipes[7].pk, recipes[3].pk]
+        for recipe in recipes[3::4]:
+            Recipe.objects.filter(pk=recipe.pk).update(name="Суп")
+        for recipe in recipes[::2]:
+            Recipe.objects.filter(pk=recipe.pk).update(text="Густой суп")
+
+    def collect_pages(self, params):
+        """id рецептов со всех страниц курсора и ссылки назад."""
+        client = self.client_for()
+        response = client.get(RECIPES_URL, {**params, "cursor": ""})
+        pages = [[recipe["id"] for recipe in response.data["results"]]]
+        while response.data["next"]:
+            response = client.get(response.data["next"])
+            pages.append([recipe["id"] for recipe in response.data["results"]])
+        previous = client.get(response.data["previous"])
+        self.assertEqual(
+            [recipe["id"] for recipe in previous.data["results"]], pages[-2]
+        )
+        return [pk for page in pages for pk in page]
+
+    def test_cursor_keeps_requested_ordering(self):
+        params = {"ordering": "-favorites_count", "limit": 2}
+        expected = [
+            recipe["id"]
+            for recipe in self.client_for()
+            .get(RECIPES_URL, {**params, "limit": 100})
+            .data["results"]
+        ]
+        self.assertEqual(self.collect_pages(params), expected)
+        self.assertEqual(
+            expected,
+            list(
+                Recipe.objects.order_by("-favorites_count", "-id").values_list(
+                    "pk", flat=True
+                )
+            ),
+        )
+
+    def test_cursor_keeps_search_rank_ordering(self):
+        params = {"search": "суп", "limit": 2}
+        expected = [
+            recipe["id"]
+            for recipe in self.client_for()
+            .get(RECIPES_URL, {**params, "limit": 100})
+            .data["results"]
+        ]
+        self.assertEqual(expected[:2], self.name_matches)
+        self.assertEqual(len(expected), 7)
+        self.assertEqual(self.collect_pages(params), expected)
+
+    def test_tampered_cursor_is_not_found(self):
+        client = self.client_for()
+        for params, position in (
+            ({}, ["x"]),
+            ({}, [{"a": 1}]),
+            ({}, [[1]]),
+            ({}, [None]),
+            ({}, [1, 2]),
+            ({"ordering": "-favorites_count"}, ["x", 1]),
+            ({"search": "суп"}, ["x", 1]),
+        ):
+            cursor = base64.b64encode(
+                urlencode({"p": json.dumps(position)}).encode()
+            ).decode()
+            with self.subTest(params=params, position=position):
+                response = client.get(
+                    RECIPES_URL, {**params, "cursor": cursor}
+                )
+                self.assertEqual(response.status_code, 404)
+
+
+class RecipeUpdateQueriesTests(FoodgramAPITestCase):
+    """Обновление рецепта трогает только изменившиеся строки состава."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = cls.create_user(0)
+        cls.tags = cls.create_tags(2)
+        cls.ingredients = cls.create_ingredients(8)
+        cls.recipe = cls.create_recipe(cls.user, cls.tags, cls.ingredients[:4])
+        ShoppingCart.objects.create(user=cls.user, recipe=cls.recipe)
+        cls.url = f"{RECIPES_URL}{cls.recipe.pk}/"
+
+    def patch(self, ingredients, queries):
+        data = {
+            "name": "Рецепт",
+            "text": "Описание",
+            "cooking_time": 10,
+            "tags": [tag.pk for tag in self.tags],
+            "ingredients": [
+                {"id": ingredient.pk, "amount": amount}
+                for ingredient, amount in ingredients
+            ],
+        }
+        client = self.client_for(self.user)
+        with self.assertNumQueries(queries):
+            response = client.patch(self.url, data, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            sorted(
+                (item["id"], item["amount"])
+                for item in response.data["ingredients"]
+            ),
+            sorted(
+                (ingredient.pk, amount) for ingredient, amount in ingredients
+            ),
+        )
+
+    def current_ingredients(self):
+        return [
+            (ingredient, amount)
+            for amount, ingredient in enumerate(self.ingredients[:4], start=1)
+        ]
+
+    def test_no_changes(self):
+        # Токен, рецепт с автором, ингредиенты и теги из тела, BEGIN,
+        # текущие теги и состав, UPDATE рецепта, COMMIT, теги и
+        # ингредиенты для ответа.
+        self.patch(self.current_ingredients(), 11)
+
+    def test_one_amount_changed(self):
+        # Плюс UPDATE строки состава и пересчёт итогов корзины.
+        ingredients = self.current_ingredients()
+        ingredients[0] = (self.ingredients[0], 50)
+        self.patch(ingredients, 18)
+
+    def test_all_ingredients_replaced(self):
+        # Плюс DELETE и INSERT состава вместо UPDATE и новые итоги.
+        self.patch(
+            [(ingredient, 3) for ingredient in self.ingredients[4:]], 20
+        )
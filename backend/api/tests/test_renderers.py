@@ -0,0 +1,80 @@
+import uuid
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
+from unittest import skipIf
+
+from django.test import SimpleTestCase
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+
+from api.renderers import ORJSONRenderer, orjson
+
+
+@skipIf(orjson is None, "не установлен orjson")
+class ORJSONRendererTests(SimpleTestCase):
+    """ORJSONRenderer отдаёт те же байты, что и JSONRenderer DRF."""
+
+    def assertSameAsJSONRenderer(self, data, accepted_media_type=None):
+        self.assertEqual(
+            ORJSONRenderer().render(data, accepted_media_type),
+            JSONRenderer().render(data, accepted_media_type),
+        )
+
+    def test_types_outside_json(self):
+        moscow = timezone(timedelta(hours=3))
+        for value in (
+            Decimal("1.50"),
+            Decimal("0.1"),
+            datetime(2024, 5, 6, 7, 8, 9, 123456, tzinfo=timezone.utc),
+            datetime(2024, 5, 6, 7, 8, 9, tzinfo=moscow),
+            datetime(2024, 5, 6, 7, 8, 9, 120000),
+            date(2024, 5, 6),
+            time(7, 8, 9, 500),
+            timedelta(hours=1, seconds=1),
+            uuid.UUID("12345678-1234-5678-1234-567812345678"),
+            gettext_lazy("Рецепт"),
+        ):
+            with self.subTest(value=value):
+                self.assertSameAsJSONRenderer(
+                    {"value": value, "list": [value]}
+                )
+
+    def test_line_separators_are_escaped(self):
+        data = {"text": "строка\u2028абзац\u2029конец", "\u2028": 1}
+        self.assertSameAsJSONRenderer(data)
+        rendered = ORJSONRenderer().render(data)
+        self.assertNotIn("\u2028".encode(), rendered)
+        self.assertNotIn("\u2029".encode(), rendered)
+
+    def test_unicode_and_nesting(self):
+        self.assertSameAsJSONRenderer(
+            {
+                "name": 'Борщ 🍲 "с" \\ \n\t',
+                "items": [1, 2.5, True, None, {"nested": []}],
+                "empty": {},
+            }
+        )
+
+    def test_fallback_to_json_renderer(self):
+        for data in (
+            {1: "ключ не строка"},
+            {"big": 2**70},
+        ):
+            with self.subTest(data=data):
+                self.assertSameAsJSONRenderer(data)
+
+    def test_indent_and_formatting_options(self):
+        data = {"name": "Борщ", "items": [1, 2]}
+        self.assertSameAsJSONRenderer(data, "application/json; indent=4")
+        # UNICODE_JSON и COMPACT_JSON читаются в атрибуты класса.
+        for options in ({"ensure_ascii": True}, {"compact": False}):
+            with self.subTest(options=options):
+                self.assertEqual(
+                    type("Renderer", (ORJSONRenderer,), options)().render(
+                        data
+                    ),
+                    type("Renderer", (JSONRenderer,), options)().render(data),
+                )
+
+    def test_none(self):
+        self.assertEqual(ORJSONRenderer().render(None), b"")
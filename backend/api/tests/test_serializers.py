@@ -0,0 +1,90 @@
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.serializers import RecipeReadSerializer, RecipeSerializer
+from api.tests.base import FoodgramAPITestCase
+from recipes.models import Favorite, Recipe, ShoppingCart
+from users.models import Subscription
+
+
+class RecipeReadSerializerTests(FoodgramAPITestCase):
+    """Быстрый сериализатор чтения отдаёт тот же JSON, что и модельный."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = cls.create_user(0)
+        cls.author = cls.create_user(1)
+        cls.author.avatar = "users/avatar.png"
+        cls.author.avatar_variants = {"thumb": "users/avatar_thumb.webp"}
+        cls.author.save()
+        tags = cls.create_tags(3)
+        ingredients = cls.create_ingredients(4)
+        cls.recipes = [
+            cls.create_recipe(cls.author, tags, ingredients, "С флагами"),
+            cls.create_recipe(cls.user, tags[1:], ingredients[2:], "Свой"),
+            cls.create_recipe(cls.author, [], ingredients[:1], "Без тегов"),
+        ]
+        first = cls.recipes[0]
+        first.image_variants = {"card": "recipes/card.webp"}
+        first.save()
+        Favorite.objects.create(user=cls.user, recipe=first)
+        ShoppingCart.objects.create(user=cls.user, recipe=first)
+        ShoppingCart.objects.create(user=cls.author, recipe=cls.recipes[2])
+        Subscription.objects.create(user=cls.user, author=cls.author)
+
+    def context(self, user):
+        request = Request(APIRequestFactory().get("/api/recipes/"))
+        request.user = user
+        return {"request": request}
+
+    def queryset(self, user):
+        return Recipe.objects.with_user_flags(user).order_by("-id")
+
+    def assertSameJSON(self, fast, reference):
+        renderer = JSONRenderer()
+        self.assertEqual(renderer.render(fast), renderer.render(reference))
+
+    def test_list(self):
+        for user in (self.user, self.author):
+            with self.subTest(user=user):
+                context = self.context(user)
+                queryset = self.queryset(user)
+                self.assertSameJSON(
+                    RecipeReadSerializer(
+                        RecipeReadSerializer.rows(queryset),
+                        many=True,
+                        context=context,
+                    ).data,
+                    RecipeSerializer(
+                        queryset.with_related(), many=True, context=context
+                    ).data,
+                )
+
+    def test_single_object(self):
+        context = self.context(self.user)
+        for recipe in self.queryset(self.user).select_related("author"):
+            with self.subTest(recipe=recipe.name):
+                self.assertSameJSON(
+                    RecipeReadSerializer(recipe, context=context).data,
+                    RecipeSerializer(recipe, context=context).data,
+                )
+
+    def test_flags_are_rendered(self):
+        data = RecipeReadSerializer(
+            RecipeReadSerializer.rows(self.queryset(self.user)),
+            many=True,
+            context=self.context(self.user),
+        ).data
+        flagged = data[-1]
+        self.assertTrue(flagged["is_favorited"])
+        self.assertTrue(flagged["is_in_shopping_cart"])
+        self.assertTrue(flagged["author"]["is_subscribed"])
+        self.assertEqual(len(flagged["tags"]), 3)
+        self.assertEqual(len(flagged["ingredients"]), 4)
+        self.assertTrue(flagged["image_card"].endswith("recipes/card.webp"))
+        self.assertTrue(
+            flagged["author"]["avatar_thumb"].endswith(
+                "users/avatar_thumb.webp"
+            )
+        )
@@ -0,0 +1,86 @@
+import csv
+import io
+import os
+from unittest import skipUnless
+
+from django.conf import settings
+
+from api.renderers import PDFShoppingListRenderer, canvas
+from api.tests.base import FoodgramAPITestCase
+from recipes.models import Ingredient
+
+DOWNLOAD_URL = "/api/recipes/download_shopping_cart/"
+
+
+class ShoppingListDownloadTests(FoodgramAPITestCase):
+    """Выгрузка списка покупок: заголовки ответа и содержимое файла."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = cls.create_user(0)
+        tags = cls.create_tags(1)
+        flour, salt = cls.create_ingredients(2)
+        sugar = Ingredient.objects.create(name="Сахар", measurement_unit="кг")
+        cls.recipes = [
+            cls.create_recipe(cls.user, tags, [flour, salt]),
+            cls.create_recipe(cls.user, tags, [salt, sugar]),
+        ]
+
+    def setUp(self):
+        super().setUp()
+        self.client = self.client_for(self.user)
+        for recipe in self.recipes:
+            response = self.client.post(
+                f"/api/recipes/{recipe.pk}/shopping_cart/"
+            )
+            self.assertEqual(response.status_code, 201)
+
+    def download(self, file_format, content_type):
+        response = self.client.get(DOWNLOAD_URL, {"format": file_format})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], content_type)
+        self.assertEqual(
+            response["Content-Disposition"],
+            f'attachment; filename="shopping_list.{file_format}"',
+        )
+        return b"".join(response.streaming_content)
+
+    def test_txt(self):
+        content = self.download("txt", "text/plain; charset=utf-8")
+        self.assertEqual(
+            content.decode().split("\n"),
+            ["Ингредиент 0 (г) — 1", "Ингредиент 1 (г) — 3", "Сахар (кг) — 2"],
+        )
+
+    def test_csv(self):
+        content = self.download("csv", "text/csv; charset=utf-8")
+        self.assertEqual(
+            list(csv.reader(io.StringIO(content.decode()))),
+            [
+                ["Ингредиент", "Единица измерения", "Количество"],
+                ["Ингредиент 0", "г", "1"],
+                ["Ингредиент 1", "г", "3"],
+                ["Сахар", "кг", "2"],
+            ],
+        )
+
+    @skipUnless(
+        canvas is not None and os.path.exists(settings.SHOPPING_LIST_PDF_FONT),
+        "нет reportlab или шрифта для PDF",
+    )
+    def test_pdf(self):
+        content = self.download("pdf", PDFShoppingListRenderer.media_type)
+        self.assertTrue(content.startswith(b"%PDF-"))
+        self.assertTrue(content.rstrip().endswith(b"%%EOF"))
+
+    def test_empty_cart(self):
+        self.client.delete(f"/api/recipes/{self.recipes[0].pk}/shopping_cart/")
+        self.client.delete(f"/api/recipes/{self.recipes[1].pk}/shopping_cart/")
+        content = self.download("csv", "text/csv; charset=utf-8")
+        self.assertEqual(
+            content.decode(), "Ингредиент,Единица измерения,Количество\r\n"
+        )
+
+    def test_anonymous(self):
+        response = self.client_for().get(DOWNLOAD_URL, {"format": "csv"})
+        self.assertEqual(response.status_code, 401)
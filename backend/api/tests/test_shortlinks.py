@@ -0,0 +1,65 @@
+from api.tests.base import FoodgramAPITestCase
+from common.constants import CUSTOM_SHORT_LINK_CACHE_MAX_AGE
+from recipes.admin import ShortLinkAdminForm
+from recipes.models import ShortLink
+from recipes.shortlinks import MAX_ID_CODE_LENGTH, MAX_RECIPE_ID, encode_id
+
+
+class ShortLinkRedirectTests(FoodgramAPITestCase):
+    def test_id_code_redirects_permanently(self):
+        response = self.client.get(f"/s/{encode_id(125)}/")
+        self.assertEqual(response.status_code, 301)
+        self.assertEqual(response.headers["Location"], "/recipes/125")
+        self.assertIn("max-age", response.headers["Cache-Control"])
+
+    def test_overlong_codes_are_not_found(self):
+        for code in (
+            "1" * (MAX_ID_CODE_LENGTH + 1),
+            # Той же длины, что код наибольшего id, но больше него.
+            "Z" * MAX_ID_CODE_LENGTH,
+            "a" * 100,
+        ):
+            with self.subTest(code=code):
+                response = self.client.get(f"/s/{code}/")
+                self.assertEqual(response.status_code, 404)
+        response = self.client.get(f"/s/{encode_id(MAX_RECIPE_ID)}/")
+        self.assertEqual(response.status_code, 301)
+
+    def test_custom_code_redirects_temporarily(self):
+        recipe = self.create_recipe(
+            self.create_user(0), self.create_tags(1), []
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            ShortLink.objects.create(code="borsch-2024", recipe=recipe)
+        response = self.client.get("/s/borsch-2024/")
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response.headers["Location"], f"/recipes/{recipe.pk}")
+        self.assertIn(
+            f"max-age={CUSTOM_SHORT_LINK_CACHE_MAX_AGE}",
+            response.headers["Cache-Control"],
+        )
+
+
+class ShortLinkAdminFormTests(FoodgramAPITestCase):
+    """Собственный код не может совпасть с кодом рецепта по id."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.recipe = cls.create_recipe(
+            cls.create_user(0), cls.create_tags(1), []
+        )
+
+    def form(self, code):
+        return ShortLinkAdminForm({"code": code, "recipe": self.recipe.pk})
+
+    def test_id_like_codes_are_rejected(self):
+        for code in ("borsch", "Borsch2024", encode_id(62**5)):
+            with self.subTest(code=code):
+                form = self.form(code)
+                self.assertFalse(form.is_valid())
+                self.assertIn("code", form.errors)
+
+    def test_codes_outside_id_space_are_accepted(self):
+        for code in ("borsch-2024", "borsch_2024", "0borsch", "a" * 12):
+            with self.subTest(code=code):
+                self.assertTrue(self.form(code).is_valid())
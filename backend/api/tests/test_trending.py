@@ -0,0 +1,133 @@
+from datetime import timedelta
+
+from django.utils import timezone
+
+from api.tests.base import FoodgramAPITestCase
+from common.constants import TRENDING_HALF_LIFE_HOURS, TRENDING_WINDOW_DAYS
+from recipes.models import Favorite, RecipeTrendingScore, ShoppingCart
+from recipes.trending import decayed_scores, refresh_trending_scores
+
+TRENDING_URL = "/api/recipes/trending/"
+
+
+class TrendingScoresTests(FoodgramAPITestCase):
+    """Рейтинг: затухание весов событий и пересборка таблицы."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [cls.create_user(number) for number in range(3)]
+        tags = cls.create_tags(1)
+        ingredients = cls.create_ingredients(1)
+        cls.fresh, cls.carted, cls.stale = [
+            cls.create_recipe(cls.users[0], tags, ingredients, f"Рецепт {n}")
+            for n in range(3)
+        ]
+
+    def add_event(self, model, user, recipe, age):
+        event = model.objects.create(user=user, recipe=recipe)
+        model.objects.filter(pk=event.pk).update(
+            created_at=timezone.now() - age
+        )
+
+    def add_events(self):
+        half_life = timedelta(hours=TRENDING_HALF_LIFE_HOURS)
+        outside = timedelta(days=TRENDING_WINDOW_DAYS + 1)
+        self.add_event(Favorite, self.users[0], self.fresh, timedelta())
+        self.add_event(Favorite, self.users[1], self.fresh, half_life)
+        self.add_event(ShoppingCart, self.users[0], self.carted, timedelta())
+        self.add_event(Favorite, self.users[2], self.stale, outside)
+
+    def test_decayed_scores(self):
+        self.add_events()
+        scores = decayed_scores(
+            timezone.now(), TRENDING_HALF_LIFE_HOURS, TRENDING_WINDOW_DAYS
+        )
+        # Избранное весит 1, корзина 0,5; за период полураспада вес
+        # события уменьшается вдвое, а вне окна не учитывается.
+        self.assertEqual(scores.keys(), {self.fresh.pk, self.carted.pk})
+        self.assertAlmostEqual(scores[self.fresh.pk], 1.5, places=3)
+        self.assertAlmostEqual(scores[self.carted.pk], 0.5, places=3)
+
+    def test_refresh_replaces_previous_ranking(self):
+        RecipeTrendingScore.objects.create(
+            recipe=self.stale, rank=1, score=10, computed_at=timezone.now()
+        )
+        self.add_events()
+        self.assertEqual(refresh_trending_scores(), 2)
+        self.assertEqual(
+            list(RecipeTrendingScore.objects.values_list("recipe", "rank")),
+            [(self.fresh.pk, 1), (self.carted.pk, 2)],
+        )
+
+    def test_refresh_keeps_limit(self):
+        self.add_events()
+        self.assertEqual(refresh_trending_scores(limit=1), 1)
+        self.assertEqual(
+            list(RecipeTrendingScore.objects.values_list("recipe", "rank")),
+            [(self.fresh.pk, 1)],
+        )
+
+
+class TrendingPaginationTests(FoodgramAPITestCase):
+    """Страницы готового рейтинга выбираются по диапазону rank."""
+
+    @classmethod
+    def setUpTestData(cls):
+        author = cls.create_user(0)
+        tags = cls.create_tags(1)
+        ingredients = cls.create_ingredients(1)
+        recipes = [
+            cls.create_recipe(author, tags, ingredients, f"Рецепт {number}")
+            for number in range(8)
+        ]
+        now = timezone.now()
+        # Рейтинг не совпадает с порядком id.
+        cls.ranked = recipes[1::2] + recipes[::2]
+        RecipeTrendingScore.objects.bulk_create(
+            RecipeTrendingScore(
+                recipe=recipe, rank=rank, score=100 - rank, computed_at=now
+            )
+            for rank, recipe in enumerate(cls.ranked, start=1)
+        )
+
+    def get_page(self, page=None):
+        params = {"limit": 3}
+        if page is not None:
+            params["page"] = page
+        return self.client_for().get(TRENDING_URL, params)
+
+    def test_pages(self):
+        ids = [recipe.pk for recipe in self.ranked]
+        for page, expected, has_next, has_previous in (
+            (None, ids[:3], True, False),
+            (2, ids[3:6], True, True),
+            (3, ids[6:], False, True),
+        ):
+            with self.subTest(page=page):
+                response = self.get_page(page)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.data["count"], 8)
+                self.assertEqual(
+                    [recipe["id"] for recipe in response.data["results"]],
+                    expected,
+                )
+                self.assertEqual(bool(response.data["next"]), has_next)
+                self.assertEqual(bool(response.data["previous"]), has_previous)
+
+    def test_links(self):
+        response = self.get_page(2)
+        self.assertIn("page=3", response.data["next"])
+        self.assertNotIn("page=", response.data["previous"])
+        self.assertIn("page=2", self.get_page(3).data["previous"])
+
+    def test_invalid_pages(self):
+        for page in (0, 4, "x"):
+            with self.subTest(page=page):
+                self.assertEqual(self.get_page(page).status_code, 404)
+
+    def test_empty_ranking(self):
+        RecipeTrendingScore.objects.all().delete()
+        response = self.get_page()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["count"], 0)
+        self.assertEqual(response.data["results"], [])
@@ -0,0 +1,141 @@
+import csv
+import io
+
+from django.test import SimpleTestCase
+
+from api.tests.base import FoodgramAPITestCase
+from recipes.models import (
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    ShoppingCartItemTotal,
+)
+from recipes.units import humanize_amount, normalize_unit
+
+DOWNLOAD_URL = "/api/recipes/download_shopping_cart/"
+
+
+class UnitsTests(SimpleTestCase):
+    """Перевод единиц в базовые и обратно для вывода."""
+
+    def test_normalize_unit(self):
+        for unit, expected in (
+            ("г", ("г", 1)),
+            ("гр.", ("г", 1)),
+            ("кг", ("г", 1000)),
+            (" КГ ", ("г", 1000)),
+            ("Килограмм", ("г", 1000)),
+            ("л", ("мл", 1000)),
+            ("мл", ("мл", 1)),
+            ("шт", ("шт.", 1)),
+            ("по вкусу", ("по вкусу", 1)),
+            (" щепотка ", ("щепотка", 1)),
+        ):
+            with self.subTest(unit=unit):
+                self.assertEqual(normalize_unit(unit), expected)
+
+    def test_humanize_amount(self):
+        for amount, base_unit, expected in (
+            (300, "г", ("300", "г")),
+            (1000, "г", ("1", "кг")),
+            (1500, "г", ("1,5", "кг")),
+            (2001, "г", ("2,001", "кг")),
+            (250, "мл", ("250", "мл")),
+            (12000, "мл", ("12", "л")),
+            (3, "шт.", ("3", "шт.")),
+            (0, "г", ("0", "г")),
+        ):
+            with self.subTest(amount=amount, base_unit=base_unit):
+                self.assertEqual(humanize_amount(amount, base_unit), expected)
+
+
+class IngredientBaseUnitTests(FoodgramAPITestCase):
+    """Базовые единицы ингредиентов и суммирование в списке покупок."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = cls.create_user(0)
+        cls.tags = cls.create_tags(1)
+        cls.flour_grams = Ingredient.objects.create(
+            name="Мука", measurement_unit="г"
+        )
+        cls.flour_kilograms = Ingredient.objects.create(
+            name="Мука", measurement_unit="кг"
+        )
+        cls.recipe = cls.create_recipe(cls.user, cls.tags, [])
+        for ingredient, amount in (
+            (cls.flour_grams, 500),
+            (cls.flour_kilograms, 2),
+        ):
+            RecipeIngredient(
+                recipe=cls.recipe, ingredient=ingredient, amount=amount
+            ).save()
+
+    def add_to_cart(self, recipe):
+        response = self.client_for(self.user).post(
+            f"/api/recipes/{recipe.pk}/shopping_cart/"
+        )
+        self.assertEqual(response.status_code, 201)
+
+    def normalized_amounts(self):
+        return dict(
+            RecipeIngredient.objects.filter(recipe=self.recipe).values_list(
+                "ingredient_id", "normalized_amount"
+            )
+        )
+
+    def cart_totals(self):
+        return dict(
+            ShoppingCartItemTotal.objects.filter(user=self.user).values_list(
+                "ingredient_id", "total_amount"
+            )
+        )
+
+    def test_save_sets_base_unit(self):
+        self.assertEqual(
+            (self.flour_kilograms.base_unit, self.flour_kilograms.unit_factor),
+            ("г", 1000),
+        )
+        self.assertEqual(
+            self.normalized_amounts(),
+            {self.flour_grams.pk: 500, self.flour_kilograms.pk: 2000},
+        )
+
+    def test_unit_change_recomputes_amounts_and_cart(self):
+        self.add_to_cart(self.recipe)
+        self.assertEqual(self.cart_totals(), self.normalized_amounts())
+        # Пара «Мука (г)» уже есть, поэтому меняется и название.
+        self.flour_kilograms.name = "Мука высшего сорта"
+        self.flour_kilograms.measurement_unit = "г"
+        self.flour_kilograms.save()
+        self.flour_kilograms.refresh_from_db()
+        self.assertEqual(
+            (self.flour_kilograms.base_unit, self.flour_kilograms.unit_factor),
+            ("г", 1),
+        )
+        expected = {self.flour_grams.pk: 500, self.flour_kilograms.pk: 2}
+        self.assertEqual(self.normalized_amounts(), expected)
+        self.assertEqual(self.cart_totals(), expected)
+
+    def test_shopping_list_sums_grams_and_kilograms(self):
+        other = Recipe.objects.create(
+            author=self.user,
+            name="Второй",
+            text="Описание",
+            cooking_time=5,
+            image="recipes/test.png",
+        )
+        RecipeIngredient(
+            recipe=other, ingredient=self.flour_grams, amount=300
+        ).save()
+        self.add_to_cart(self.recipe)
+        self.add_to_cart(other)
+        response = self.client_for(self.user).get(
+            DOWNLOAD_URL, {"format": "csv"}
+        )
+        self.assertEqual(response.status_code, 200)
+        content = b"".join(response.streaming_content).decode()
+        self.assertEqual(
+            list(csv.reader(io.StringIO(content)))[1:],
+            [["Мука", "кг", "2,8"]],
+        )
@@ -0,0 +1,43 @@
+import warnings
+
+from api.tests.base import FoodgramAPITestCase
+from users.models import Subscription
+
+SUBSCRIPTIONS_URL = "/api/users/subscriptions/"
+
+
+class SubscriptionsTests(FoodgramAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = cls.create_user(0)
+        tags = cls.create_tags(1)
+        ingredients = cls.create_ingredients(2)
+        # Порядок id не совпадает с порядком username.
+        cls.authors = [cls.create_user(number) for number in (9, 3, 7, 1, 5)]
+        for author in cls.authors:
+            Subscription.objects.create(user=cls.user, author=author)
+            for number in range(3):
+                cls.create_recipe(
+                    author, tags, ingredients, name=f"Рецепт {number}"
+                )
+
+    def test_pages_are_ordered_and_do_not_overlap(self):
+        client = self.client_for(self.user)
+        usernames = []
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            for page in (1, 2, 3):
+                response = client.get(
+                    SUBSCRIPTIONS_URL,
+                    {"page": page, "limit": 2, "recipes_limit": 1},
+                )
+                self.assertEqual(response.status_code, 200)
+                usernames += [
+                    author["username"] for author in response.data["results"]
+                ]
+                for author in response.data["results"]:
+                    self.assertEqual(author["recipes_count"], 3)
+                    self.assertEqual(len(author["recipes"]), 1)
+        self.assertEqual(
+            usernames, sorted(author.username for author in self.authors)
+        )
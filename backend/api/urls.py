@@ -1,6 +1,8 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
+from common.metrics import metrics_view
+
 from .views import (
     IngredientViewSet,
     RecipeViewSet,
@@ -15,6 +17,7 @@ router.register("tags", TagViewSet, basename="tags")
 router.register("users", UserViewSet, basename="users")
 
 urlpatterns = [
+    path("metrics/", metrics_view, name="metrics"),
     path("auth/", include("djoser.urls.authtoken")),
     path("", include(router.urls)),
     path("", include("djoser.urls")),
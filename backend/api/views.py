@@ -1,27 +1,67 @@
-from io import BytesIO
-
-from django.db.models import Sum
-from django.http import FileResponse
+from functools import partial
+
+from django.db import transaction
+from django.db.models import (
+    Count,
+    F,
+    Prefetch,
+    Sum,
+    Value,
+    Window,
+)
+from django.db.models.functions import RowNumber
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django.urls import reverse
+from django.utils.cache import patch_cache_control
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.serializers import UserCreateSerializer
 from djoser.views import UserViewSet as DjoserUserViewSet
 from rest_framework import permissions, status, viewsets
 from rest_framework.decorators import action
+from rest_framework.parsers import FormParser, MultiPartParser
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.viewsets import ReadOnlyModelViewSet
 
 from api.filters import RecipeFilter
+from api.mixins import (
+    AnonymousListCacheMixin,
+    ConditionalListMixin,
+    ConditionalRetrieveMixin,
+    MetricsMixin,
+    hash_etag,
+)
+from api.pagination import (
+    FeedPagination,
+    MatchesPagination,
+    TrendingPagination,
+)
+from api.parsers import Base64StreamingJSONParser
+from api.renderers import SHOPPING_LIST_RENDERERS
+from common.constants import (
+    PUBLIC_CACHE_MAX_AGE,
+    RECIPES_LIST_CACHE_TIMEOUT,
+    SHOPPING_LIST_FILENAME,
+    SHOPPING_LIST_ITERATOR_CHUNK_SIZE,
+)
+from recipes.autocomplete import ingredient_autocomplete
+from recipes.cache import (
+    bump_recipes_generation,
+    get_catalog_generation,
+    get_recipes_generation,
+)
+from recipes.feed import get_feed_ids
+from recipes.ingredient_index import recipe_ingredient_index
 from recipes.models import (
     Favorite,
     Ingredient,
     Recipe,
-    RecipeIngredient,
     ShoppingCart,
+    ShoppingCartItemTotal,
     Tag,
 )
+from recipes.shortlinks import get_short_code
 from users.models import Subscription, User
 
 from .permissions import IsAuthorOrReadOnly
@@ -29,15 +69,27 @@ from .serializers import (
     AvatarSerializer,
     IngredientSerializer,
     RecipeCreateSerializer,
-    RecipeSerializer,
+    RecipeIdsSerializer,
+    RecipeReadSerializer,
+    RecipesByIngredientsQuerySerializer,
     ShortRecipeSerializer,
     SubscriptionSerializer,
     TagSerializer,
     UserSerializer,
 )
 
+UPLOAD_PARSER_CLASSES = [
+    Base64StreamingJSONParser,
+    FormParser,
+    MultiPartParser,
+]
+
+# Действия, которые читают рецепты строками values() для
+# RecipeReadSerializer, без создания объектов моделей.
+RECIPE_ROW_ACTIONS = ("list", "trending", "feed", "by_ingredients")
+
 
-class UserViewSet(DjoserUserViewSet):
+class UserViewSet(MetricsMixin, DjoserUserViewSet):
     serializer_class = UserSerializer
     create_serializer_class = UserCreateSerializer
 
@@ -47,10 +99,39 @@ class UserViewSet(DjoserUserViewSet):
         serializer = UserSerializer(request.user, context={"request": request})
         return Response(serializer.data)
 
+    def _get_subscriptions_queryset(self, user):
+        """Авторы из подписок с числом рецептов и первыми N рецептами.
+
+        Первые recipes_limit рецептов каждого автора отбираются через
+        ROW_NUMBER() OVER (PARTITION BY author_id) одним запросом на
+        всю страницу.
+        """
+        recipes = Recipe.objects.all()
+        limit = self.request.query_params.get("recipes_limit")
+        if limit and limit.isdigit():
+            recipes = recipes.annotate(
+                row_number=Window(
+                    RowNumber(),
+                    partition_by=F("author_id"),
+                    order_by=F("id").desc(),
+                )
+            ).filter(row_number__lte=int(limit))
+        return (
+            User.objects.filter(subscribers__user=user)
+            .annotate(
+                recipes_count=Count("recipes"),
+                is_subscribed=Value(True),
+            )
+            .prefetch_related(Prefetch("recipes", queryset=recipes))
+            # GROUP BY сбрасывает Meta.ordering, без явного порядка
+            # страницы могут пересекаться.
+            .order_by("username", "id")
+        )
+
     @action(["get"], detail=False, permission_classes=[IsAuthenticated])
     def subscriptions(self, request, *args, **kwargs):
         """Список подписок текущего пользователя."""
-        queryset = User.objects.filter(subscribers__user=request.user)
+        queryset = self._get_subscriptions_queryset(request.user)
         page = self.paginate_queryset(queryset)
         serializer = SubscriptionSerializer(
             page,
@@ -72,14 +153,11 @@ class UserViewSet(DjoserUserViewSet):
                     {"errors": "Нельзя подписаться на самого себя"},
                     status=status.HTTP_400_BAD_REQUEST,
                 )
-            if Subscription.objects.filter(
-                user=request.user, author=author
-            ).exists():
+            if not Subscription.objects.subscribe(request.user, author):
                 return Response(
                     {"errors": "Вы уже подписаны на этого пользователя"},
                     status=status.HTTP_400_BAD_REQUEST,
                 )
-            Subscription.objects.create(user=request.user, author=author)
             serializer = SubscriptionSerializer(
                 author, context={"request": request}
             )
@@ -100,6 +178,7 @@ class UserViewSet(DjoserUserViewSet):
         detail=False,
         url_path="me/avatar",
         permission_classes=[IsAuthenticated],
+        parser_classes=UPLOAD_PARSER_CLASSES,
     )
     def avatar(self, request, *args, **kwargs):
         """Загрузка/удаление аватара."""
@@ -122,20 +201,68 @@ class UserViewSet(DjoserUserViewSet):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(
+    MetricsMixin,
+    AnonymousListCacheMixin,
+    ConditionalRetrieveMixin,
+    viewsets.ModelViewSet,
+):
     queryset = Recipe.objects.all()
-    serializer_class = RecipeSerializer
+    serializer_class = RecipeReadSerializer
     permission_classes = [
         permissions.IsAuthenticatedOrReadOnly,
         IsAuthorOrReadOnly,
     ]
 
+    parser_classes = UPLOAD_PARSER_CLASSES
     filter_backends = [DjangoFilterBackend]
     filterset_class = RecipeFilter
+    list_cache_prefix = "recipes:list"
+    list_cache_timeout = RECIPES_LIST_CACHE_TIMEOUT
+
+    def get_cache_generation(self):
+        return get_recipes_generation()
+
+    def get_queryset(self):
+        queryset = Recipe.objects.with_user_flags(self.request.user)
+        if self.action in RECIPE_ROW_ACTIONS:
+            return RecipeReadSerializer.rows(queryset)
+        if self.action in ("retrieve", "update", "partial_update", "destroy"):
+            # Теги и ингредиенты загружаются только для ответа: при
+            # просмотре — если он не 304, при изменении — один раз после
+            # сохранения (UpdateModelMixin сбрасывает prefetch объекта).
+            return queryset.select_related("author")
+        return queryset.with_related()
+
+    def get_object_validators(self, instance):
+        """
+        ETag учитывает флаги текущего пользователя, данные автора и
+        поколение справочников (названия тегов и ингредиентов).
+        """
+        author = instance.author
+        etag = hash_etag(
+            instance.pk,
+            instance.updated_at.timestamp(),
+            get_catalog_generation(),
+            self.request.user.pk,
+            instance.is_favorited,
+            instance.is_in_shopping_cart,
+            instance.author_is_subscribed,
+            author.username,
+            author.first_name,
+            author.last_name,
+            author.email,
+            author.avatar.name,
+            instance.favorites_count,
+            instance.in_carts_count,
+        )
+        # Флаги пользователя и счётчики меняются без изменения updated_at,
+        # поэтому Last-Modified не отдаётся.
+        return etag, None
 
     def get_serializer_class(self):
         if self.request.method in permissions.SAFE_METHODS:
-            return RecipeSerializer
+            return RecipeReadSerializer
         return RecipeCreateSerializer
 
     def perform_create(self, serializer):
@@ -143,99 +270,274 @@ class RecipeViewSet(viewsets.ModelViewSet):
 
     @action(detail=True, methods=["get"], url_path="get-link")
     def get_link(self, request, pk=None):
-        recipe = get_object_or_404(Recipe, pk=pk)
-        relative_url = reverse("recipes-detail", kwargs={"pk": recipe.id})
-        short_link = request.build_absolute_uri(relative_url)
-        return Response({"short-link": short_link})
-
-    def _add_to_relation(self, model, recipe):
-        obj, created = model.objects.get_or_create(
-            user=self.request.user, recipe=recipe
+        """Короткая ссылка /s/<код>/ на рецепт."""
+        if not pk.isdigit() or not Recipe.objects.filter(pk=pk).exists():
+            raise Http404
+        relative_url = reverse(
+            "short-link", kwargs={"code": get_short_code(int(pk))}
+        )
+        return Response(
+            {"short-link": request.build_absolute_uri(relative_url)}
         )
-        return created, ShortRecipeSerializer(recipe).data
 
-    def _remove_from_relation(self, model, recipe):
-        deleted, _ = model.objects.filter(
-            user=self.request.user, recipe=recipe
-        ).delete()
-        return deleted, ShortRecipeSerializer(recipe).data
+    @transaction.atomic
+    def _add_relations(self, model, recipe_ids):
+        """
+        Добавляет рецепты в избранное/корзину пользователя одним
+        upsert'ом; счётчики и итоги корзины меняются только для
+        действительно добавленных. Возвращает их id.
+
+        Счётчики отдаются в кэшированных списках и задают сортировку
+        ?ordering=, поэтому их изменение сбрасывает кэш списков.
+        """
+        user = self.request.user
+        added = model.objects.add_for_user(user, recipe_ids)
+        if added:
+            Recipe.objects.filter(pk__in=added).change_counter(
+                model.counter_field, 1
+            )
+            transaction.on_commit(bump_recipes_generation)
+        if added and model is ShoppingCart:
+            ShoppingCartItemTotal.objects.add_recipes(user, added)
+        return added
+
+    @transaction.atomic
+    def _remove_relations(self, model, recipe_ids=None):
+        """Удаляет рецепты (все, если recipe_ids не задан) и их учёт."""
+        user = self.request.user
+        removed = model.objects.remove_for_user(user, recipe_ids)
+        if removed:
+            Recipe.objects.filter(pk__in=removed).change_counter(
+                model.counter_field, -1
+            )
+            transaction.on_commit(bump_recipes_generation)
+        if removed and model is ShoppingCart:
+            if recipe_ids is None:
+                ShoppingCartItemTotal.objects.filter(user=user).delete()
+            else:
+                ShoppingCartItemTotal.objects.remove_recipes(user, removed)
+        return removed
 
     def _handle_relation(self, model, pk, action_text):
         recipe = get_object_or_404(Recipe, pk=pk)
 
         if self.request.method == "POST":
-            created, data = self._add_to_relation(model, recipe)
-            if not created:
+            if not self._add_relations(model, [recipe.pk]):
                 return Response(
                     {"errors": f"Уже {action_text}"},
                     status=status.HTTP_400_BAD_REQUEST,
                 )
-            return Response(data, status=status.HTTP_201_CREATED)
+            return Response(
+                ShortRecipeSerializer(recipe).data,
+                status=status.HTTP_201_CREATED,
+            )
 
-        deleted, data = self._remove_from_relation(model, recipe)
-        if deleted:
+        if self._remove_relations(model, [recipe.pk]):
             return Response(status=status.HTTP_204_NO_CONTENT)
         return Response(
             {"errors": f"Рецепт не был {action_text}"},
             status=status.HTTP_400_BAD_REQUEST,
         )
 
+    def _handle_bulk_relation(self, model):
+        """
+        POST добавляет, DELETE убирает рецепты {"recipes": [id, ...]}.
+        Повтор запроса ничего не меняет; несуществующие id пропускаются.
+        """
+        serializer = RecipeIdsSerializer(data=self.request.data)
+        serializer.is_valid(raise_exception=True)
+        recipe_ids = serializer.validated_data["recipes"]
+        if self.request.method == "DELETE":
+            return Response(
+                {"removed": self._remove_relations(model, recipe_ids)}
+            )
+        added = self._add_relations(model, recipe_ids)
+        recipes = Recipe.objects.filter(pk__in=recipe_ids)
+        return Response(
+            {
+                "added": added,
+                "recipes": ShortRecipeSerializer(recipes, many=True).data,
+            }
+        )
+
     @action(detail=True, methods=["post", "delete"], url_path="favorite")
     def favorite(self, request, pk=None):
         return self._handle_relation(Favorite, pk, "в избранном")
 
+    @action(
+        detail=False,
+        methods=["post", "delete"],
+        url_path="favorite/bulk",
+        permission_classes=[IsAuthenticated],
+    )
+    def favorite_bulk(self, request):
+        return self._handle_bulk_relation(Favorite)
+
     @action(detail=True, methods=["post", "delete"], url_path="shopping_cart")
     def shopping_cart(self, request, pk=None):
         return self._handle_relation(ShoppingCart, pk, "в списке покупок")
 
-    def _get_shopping_cart_ingredients(self, user):
-        return (
-            RecipeIngredient.objects.filter(recipe__shopping_carts__user=user)
-            .values("ingredient__name", "ingredient__measurement_unit")
-            .annotate(total_amount=Sum("amount"))
-            .order_by("ingredient__name")
+    @action(
+        detail=False,
+        methods=["post", "delete"],
+        url_path="shopping_cart/bulk",
+        permission_classes=[IsAuthenticated],
+    )
+    def shopping_cart_bulk(self, request):
+        return self._handle_bulk_relation(ShoppingCart)
+
+    @action(
+        detail=False,
+        methods=["delete"],
+        url_path="shopping_cart",
+        url_name="shopping-cart-clear",
+        permission_classes=[IsAuthenticated],
+    )
+    def clear_shopping_cart(self, request):
+        """Очищает список покупок целиком."""
+        self._remove_relations(ShoppingCart)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path="trending",
+        pagination_class=TrendingPagination,
+    )
+    def trending(self, request):
+        """Популярные рецепты по рейтингу refresh_trending_recipes."""
+        page = self.paginate_queryset(self.get_queryset())
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path="feed",
+        permission_classes=[IsAuthenticated],
+        pagination_class=FeedPagination,
+    )
+    def feed(self, request):
+        """Рецепты авторов из подписок, новые сначала."""
+        ids = self.paginator.paginate_ids(
+            request, partial(get_feed_ids, request.user)
         )
+        recipes = self.get_queryset().filter(pk__in=ids).order_by("-id")
+        serializer = self.get_serializer(recipes, many=True)
+        return self.get_paginated_response(serializer.data)
 
-    def _format_shopping_list(self, ingredients):
-        return "\n".join(
-            f"{ing['ingredient__name']} "
-            f"({ing['ingredient__measurement_unit']}) — "
-            f"{ing['total_amount']}"
-            for ing in ingredients
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path="by-ingredients",
+        pagination_class=MatchesPagination,
+    )
+    def by_ingredients(self, request):
+        """
+        Что приготовить из имеющегося: ?have=1,5,17[&max_missing=k].
+
+        Рецепты ранжируются по доле своих ингредиентов, которые есть у
+        пользователя, по инвертированному индексу в памяти; из БД
+        загружается только текущая страница.
+        """
+        params = RecipesByIngredientsQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        matches = recipe_ingredient_index.search(
+            params.validated_data["have"],
+            params.validated_data.get("max_missing"),
         )
+        page = self.paginate_queryset(matches)
+        recipes = {
+            row["id"]: row
+            for row in self.get_queryset().filter(
+                pk__in=[recipe_id for recipe_id, *_ in page]
+            )
+        }
+        page = [match for match in page if match[0] in recipes]
+        serializer = self.get_serializer(
+            [recipes[recipe_id] for recipe_id, *_ in page], many=True
+        )
+        data = serializer.data
+        for item, (_, matched, missing, _) in zip(data, page):
+            item["matched_ingredients"] = matched
+            item["missing_ingredients"] = missing
+        return self.get_paginated_response(data)
 
-    @action(detail=False, methods=["get"], url_path="download_shopping_cart")
+    def _get_shopping_cart_ingredients(self, user):
+        """
+        Итоги корзины одним GROUP BY: количества хранятся в базовых
+        единицах, поэтому «Мука (г)» и «Мука (кг)» складываются в одну
+        строку; в удобные единицы их переводят рендереры.
+        """
+        return (
+            ShoppingCartItemTotal.objects.filter(user=user)
+            .values(
+                name=F("ingredient__name"),
+                base_unit=F("ingredient__base_unit"),
+            )
+            .annotate(amount=Sum("total_amount"))
+            .order_by("name", "base_unit")
+        )
+
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path="download_shopping_cart",
+        permission_classes=[IsAuthenticated],
+        renderer_classes=SHOPPING_LIST_RENDERERS,
+    )
     def download_shopping_cart(self, request):
-        ingredients = self._get_shopping_cart_ingredients(request.user)
-        content = self._format_shopping_list(ingredients)
-
-        file_like = BytesIO(content.encode("utf-8"))
-        response = FileResponse(
-            file_like,
-            as_attachment=True,
-            filename="shopping_list.txt",
-            content_type="text/plain",
+        """Потоковая выгрузка списка покупок в формате ?format=txt|csv|pdf."""
+        renderer = request.accepted_renderer
+        ingredients = self._get_shopping_cart_ingredients(
+            request.user
+        ).iterator(chunk_size=SHOPPING_LIST_ITERATOR_CHUNK_SIZE)
+        content_type = renderer.media_type
+        if renderer.charset:
+            content_type = f"{content_type}; charset={renderer.charset}"
+        response = StreamingHttpResponse(
+            renderer.stream(ingredients), content_type=content_type
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="{SHOPPING_LIST_FILENAME}.'
+            f'{renderer.format}"'
         )
         return response
 
 
-class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
+class IngredientViewSet(
+    MetricsMixin,
+    ConditionalListMixin,
+    ConditionalRetrieveMixin,
+    viewsets.ReadOnlyModelViewSet,
+):
     """ViewSet для ингредиентов."""
 
+    cache_max_age = PUBLIC_CACHE_MAX_AGE
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
     permission_classes = [AllowAny]
     pagination_class = None
 
-    def get_queryset(self):
-        queryset = super().get_queryset()
-        name = self.request.query_params.get("name")
-        if name:
-            queryset = queryset.filter(name__istartswith=name)
-        return queryset
+    def list(self, request, *args, **kwargs):
+        """Подсказки по ?name= с необязательным ?limit=."""
+        name = request.query_params.get("name")
+        if not name:
+            return super().list(request, *args, **kwargs)
+        limit = request.query_params.get("limit", "")
+        limit = int(limit) if limit.isdigit() else None
+        response = Response(ingredient_autocomplete.search(name, limit))
+        patch_cache_control(response, public=True, max_age=self.cache_max_age)
+        return response
 
 
-class TagViewSet(ReadOnlyModelViewSet):
+class TagViewSet(
+    MetricsMixin,
+    ConditionalListMixin,
+    ConditionalRetrieveMixin,
+    ReadOnlyModelViewSet,
+):
+    cache_max_age = PUBLIC_CACHE_MAX_AGE
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     permission_classes = [AllowAny]
@@ -1,6 +1,46 @@
 # Пагинация
 DEFAULT_PAGE_SIZE = 6
 PAGE_SIZE_QUERY_PARAM = "limit"
+CURSOR_QUERY_PARAM = "cursor"
+
+# HTTP-кэширование справочников (теги, ингредиенты), секунды
+PUBLIC_CACHE_MAX_AGE = 60
+
+# Кэш списка рецептов для анонимных пользователей
+RECIPES_GENERATION_CACHE_KEY = "recipes:generation"
+RECIPES_LIST_CACHE_TIMEOUT = 10 * 60
+TAG_MAP_CACHE_KEY = "tags:slug_map"
+CATALOG_GENERATION_CACHE_KEY = "catalog:generation"
+
+# Уменьшенные копии изображений: имя → максимальные (ширина, высота)
+RECIPE_IMAGE_VARIANTS = {"thumb": (320, 320), "card": (720, 480)}
+AVATAR_IMAGE_VARIANTS = {"thumb": (96, 96)}
+IMAGE_VARIANT_FORMAT = "WEBP"
+IMAGE_VARIANT_QUALITY = 80
+
+# Загрузка изображений в base64
+MAX_UPLOAD_IMAGE_SIZE = 20 * 1024 * 1024
+UPLOAD_STREAM_CHUNK_SIZE = 64 * 1024
+BASE64_HEADER_MAX_LENGTH = 128
+
+# Полнотекстовый поиск рецептов (конфигурация PostgreSQL)
+RECIPE_SEARCH_CONFIG = "russian"
+
+# Популярные рецепты: вес событий и затухание (период полураспада)
+TRENDING_FAVORITE_WEIGHT = 1.0
+TRENDING_CART_WEIGHT = 0.5
+TRENDING_HALF_LIFE_HOURS = 48
+TRENDING_WINDOW_DAYS = 14
+TRENDING_MAX_RECIPES = 1000
+
+# Лента рецептов из подписок
+FEED_CURSOR_QUERY_PARAM = "before"
+FEED_MAX_PAGE_SIZE = 100
+# С какого числа подписок лента собирается слиянием списков авторов
+FEED_MERGE_THRESHOLD = 5000
+AUTHOR_LATEST_RECIPES_SIZE = 100
+AUTHOR_LATEST_RECIPES_CACHE_KEY = "recipes:author_latest:{}"
+AUTHOR_LATEST_RECIPES_CACHE_TIMEOUT = 60 * 60
 
 # Пользователи
 MAX_NAME_LENGTH = 150
@@ -17,9 +57,40 @@ MAX_COOKING_TIME = 1440
 MAX_INGREDIENT_NAME_LENGTH = 128
 MAX_MEASUREMENT_UNIT_LENGTH = 32
 
+# Подсказки ингредиентов
+INGREDIENT_AUTOCOMPLETE_TTL = 300
+INGREDIENT_AUTOCOMPLETE_FUZZY_LIMIT = 10
+
+# Короткие ссылки на рецепты
+SHORT_LINK_ALPHABET = (
+    "0123456789abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ"
+)
+SHORT_LINK_REDIRECT_URL = "/recipes/{}"
+SHORT_LINK_CACHE_MAX_AGE = 24 * 60 * 60
+# Собственный код можно переназначить, поэтому его редирект живёт в
+# кэшах недолго.
+CUSTOM_SHORT_LINK_CACHE_MAX_AGE = 60
+# Длина сама по себе не отделяет собственные коды от кодов по id
+# (коды по id бывают до 11 символов), это делает форма админки.
+MIN_SHORT_LINK_CODE_LENGTH = 6
+MAX_SHORT_LINK_CODE_LENGTH = 32
+SHORT_LINK_CODES_CACHE_KEY = "shortlinks:custom"
+
+# Пакетное добавление в избранное и список покупок
+MAX_BULK_RECIPES = 100
+
+# Поиск рецептов по имеющимся ингредиентам
+RECIPE_INGREDIENT_INDEX_TTL = 300
+
 # Теги
 MAX_TAG_NAME_LENGTH = 32
 MAX_TAG_SLUG_LENGTH = 32
 
 # Рецепты
 MAX_RECIPE_NAME_LENGTH = 200
+
+# Список покупок
+SHOPPING_LIST_FILENAME = "shopping_list"
+SHOPPING_LIST_ITERATOR_CHUNK_SIZE = 500
+SHOPPING_LIST_FILE_CHUNK_SIZE = 64 * 1024
+SHOPPING_LIST_SPOOL_MAX_SIZE = 1024 * 1024
@@ -0,0 +1,19 @@
+from django.db import connections
+
+
+def quote_columns(model, *fields, using="default"):
+    """Экранированные имена таблицы модели и столбцов её полей."""
+    quote = connections[using].ops.quote_name
+    return quote(model._meta.db_table), *(
+        quote(model._meta.get_field(field).column) for field in fields
+    )
+
+
+def execute_returning(sql, params, using="default"):
+    """
+    Выполняет INSERT/DELETE ... RETURNING и возвращает значения первого
+    столбца: только реально вставленных или удалённых строк.
+    """
+    with connections[using].cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
@@ -0,0 +1,122 @@
+import logging
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from io import BytesIO
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from PIL import Image, ImageOps
+
+from common.constants import IMAGE_VARIANT_FORMAT, IMAGE_VARIANT_QUALITY
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.IMAGE_PROCESSING_WORKERS,
+            thread_name_prefix="image-variants",
+        )
+    return _executor
+
+
+def variants_are_stale(instance, image_field, variants_field):
+    """True, если превью построены не для текущего файла изображения."""
+    name = getattr(instance, image_field).name or ""
+    return getattr(instance, variants_field).get("source", "") != name
+
+
+def schedule_image_variants(instance, image_field, variants_field, sizes):
+    """
+    Ставит в очередь построение уменьшенных копий изображения.
+
+    Запрос только сохраняет оригинал, а копии строятся после фиксации
+    транзакции в пуле потоков (или сразу, если IMAGE_PROCESSING_EAGER).
+    """
+    task = partial(
+        build_image_variants,
+        instance._meta.label,
+        instance.pk,
+        image_field,
+        variants_field,
+        sizes,
+        getattr(instance, image_field).name or "",
+    )
+    if settings.IMAGE_PROCESSING_EAGER:
+        transaction.on_commit(task)
+    else:
+        transaction.on_commit(
+            partial(_get_executor().submit, _run_in_worker, task)
+        )
+
+
+def _run_in_worker(task):
+    """Запуск задачи в потоке пула со своим соединением с БД."""
+    close_old_connections()
+    try:
+        task()
+    finally:
+        close_old_connections()
+
+
+def _render_variant(image, size):
+    variant = image.copy()
+    variant.thumbnail(size)
+    buffer = BytesIO()
+    variant.save(buffer, IMAGE_VARIANT_FORMAT, quality=IMAGE_VARIANT_QUALITY)
+    return ContentFile(buffer.getvalue())
+
+
+def build_image_variants(
+    model_label, pk, image_field, variants_field, sizes, source
+):
+    """Строит копии source и сохраняет их пути в поле variants_field."""
+    try:
+        variants = {"source": source}
+        if source:
+            with default_storage.open(source) as file:
+                image = ImageOps.exif_transpose(Image.open(file))
+                image.load()
+            if image.mode not in ("RGB", "RGBA"):
+                image = image.convert("RGBA" if "A" in image.mode else "RGB")
+            stem = posixpath.splitext(source)[0]
+            extension = IMAGE_VARIANT_FORMAT.lower()
+            for variant, size in sizes.items():
+                variants[variant] = default_storage.save(
+                    f"{stem}_{variant}.{extension}",
+                    _render_variant(image, size),
+                )
+
+        model = apps.get_model(model_label)
+        instance = model.objects.filter(pk=pk).first()
+        if instance is None or (getattr(instance, image_field).name or "") != (
+            source
+        ):
+            # Объект удалён или изображение уже заменено новым.
+            _delete_variants(variants)
+            return
+        old_variants = getattr(instance, variants_field)
+        setattr(instance, variants_field, variants)
+        update_fields = [variants_field]
+        if any(field.name == "updated_at" for field in model._meta.fields):
+            update_fields.append("updated_at")
+        instance.save(update_fields=update_fields)
+        _delete_variants(old_variants)
+    except Exception:
+        logger.exception(
+            "Не удалось построить превью %s для %s:%s", source, model_label, pk
+        )
+
+
+def _delete_variants(variants):
+    for variant, name in variants.items():
+        if variant != "source" and name:
+            default_storage.delete(name)
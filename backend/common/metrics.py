@@ -0,0 +1,285 @@
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.http import Http404, HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.http import require_safe
+
+logger = logging.getLogger(__name__)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Верхние границы корзин гистограмм (le); +Inf добавляется при выводе.
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100)
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Запрос выполнил больше SQL-запросов, чем разрешено QUERY_BUDGETS."""
+
+
+class RequestMetrics:
+    """Замеры одного HTTP-запроса; живут в request.metrics."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.endpoint = None
+        self.queries = 0
+        self.db_time = 0.0
+        self.serialization_time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        """Обёртка для connection.execute_wrapper()."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_time += time.perf_counter() - started
+
+    @contextmanager
+    def serialization(self):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.serialization_time += time.perf_counter() - started
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def server_timing(self, duration):
+        """Значение заголовка Server-Timing, длительности в мс."""
+        return (
+            f'db;dur={self.db_time * 1000:.1f};desc="{self.queries} queries",'
+            f" ser;dur={self.serialization_time * 1000:.1f},"
+            f" total;dur={duration * 1000:.1f}"
+        )
+
+
+def get_request_metrics(request):
+    """Замеры текущего запроса (HttpRequest или Request DRF) или None."""
+    return getattr(getattr(request, "_request", request), "metrics", None)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def samples(self):
+        """Пары (le, накопленное число наблюдений) по возрастанию le."""
+        total = 0
+        for bound, count in zip((*self.buckets, "+Inf"), self.counts):
+            total += count
+            yield bound, total
+
+
+class EndpointStats:
+    """Накопленные показатели одного эндпоинта (view/action и метод)."""
+
+    def __init__(self):
+        self.responses = {}
+        self.duration = Histogram(DURATION_BUCKETS)
+        self.queries = Histogram(QUERY_COUNT_BUCKETS)
+        self.db_seconds = 0.0
+        self.serialization_seconds = 0.0
+        self.response_bytes = 0
+        self.budget_exceeded = 0
+
+
+class MetricsRegistry:
+    """
+    Метрики в памяти процесса. Каждый воркер отдаёт собственные
+    значения, суммирует их Prometheus (метка instance/pod).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def record(self, endpoint, method, status, metrics, duration, size):
+        with self._lock:
+            stats = self._endpoints.get((endpoint, method))
+            if stats is None:
+                stats = self._endpoints[endpoint, method] = EndpointStats()
+            stats.responses[status] = stats.responses.get(status, 0) + 1
+            stats.duration.observe(duration)
+            stats.queries.observe(metrics.queries)
+            stats.db_seconds += metrics.db_time
+            stats.serialization_seconds += metrics.serialization_time
+            if size is not None:
+                stats.response_bytes += size
+
+    def record_budget_exceeded(self, endpoint, method):
+        with self._lock:
+            stats = self._endpoints.get((endpoint, method))
+            if stats is not None:
+                stats.budget_exceeded += 1
+
+    def render(self):
+        """Текстовый формат экспозиции Prometheus 0.0.4."""
+        with self._lock:
+            endpoints = sorted(self._endpoints.items())
+            lines = []
+            self._counter(
+                lines,
+                "foodgram_http_responses_total",
+                "Ответы по эндпоинтам и кодам статуса.",
+                (
+                    ({**labels, "status": status}, count)
+                    for labels, stats in self._labeled(endpoints)
+                    for status, count in sorted(stats.responses.items())
+                ),
+            )
+            self._histogram(
+                lines,
+                "foodgram_http_request_duration_seconds",
+                "Время обработки запроса.",
+                endpoints,
+                "duration",
+            )
+            self._histogram(
+                lines,
+                "foodgram_db_queries_per_request",
+                "Число SQL-запросов на один HTTP-запрос.",
+                endpoints,
+                "queries",
+            )
+            for name, help_text, attribute in (
+                (
+                    "foodgram_db_query_seconds_total",
+                    "Суммарное время SQL-запросов.",
+                    "db_seconds",
+                ),
+                (
+                    "foodgram_serialization_seconds_total",
+                    "Суммарное время сериализации и рендеринга ответа.",
+                    "serialization_seconds",
+                ),
+                (
+                    "foodgram_http_response_bytes_total",
+                    "Суммарный размер тел ответов.",
+                    "response_bytes",
+                ),
+                (
+                    "foodgram_query_budget_exceeded_total",
+                    "Запросы, превысившие бюджет SQL-запросов.",
+                    "budget_exceeded",
+                ),
+            ):
+                self._counter(
+                    lines,
+                    name,
+                    help_text,
+                    (
+                        (labels, getattr(stats, attribute))
+                        for labels, stats in self._labeled(endpoints)
+                    ),
+                )
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _labeled(endpoints):
+        for (endpoint, method), stats in endpoints:
+            yield {"endpoint": endpoint, "method": method}, stats
+
+    @staticmethod
+    def _header(lines, name, help_text, kind):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+
+    def _counter(self, lines, name, help_text, samples):
+        self._header(lines, name, help_text, "counter")
+        for labels, value in samples:
+            lines.append(f"{name}{{{format_labels(labels)}}} {value}")
+
+    def _histogram(self, lines, name, help_text, endpoints, attribute):
+        self._header(lines, name, help_text, "histogram")
+        for labels, stats in self._labeled(endpoints):
+            histogram = getattr(stats, attribute)
+            total = 0
+            for bound, total in histogram.samples():
+                bucket_labels = format_labels({**labels, "le": bound})
+                lines.append(f"{name}_bucket{{{bucket_labels}}} {total}")
+            lines.append(
+                f"{name}_sum{{{format_labels(labels)}}} {histogram.sum}"
+            )
+            lines.append(f"{name}_count{{{format_labels(labels)}}} {total}")
+
+
+def format_labels(labels):
+    return ",".join(
+        '{}="{}"'.format(
+            name,
+            str(value)
+            .replace("\\", "\\\\")
+            .replace('"', '\\"')
+            .replace("\n", "\\n"),
+        )
+        for name, value in labels.items()
+    )
+
+
+registry = MetricsRegistry()
+
+
+def check_query_budget(metrics, method):
+    """
+    Сверяет число SQL-запросов с settings.QUERY_BUDGETS. Ключ бюджета —
+    эндпоинт ("recipes.list") или "<метод> <эндпоинт>" для отдельного
+    метода. В строгом режиме (тесты) превышение — исключение, иначе
+    предупреждение в лог.
+    """
+    budgets = settings.QUERY_BUDGETS
+    budget = budgets.get(f"{method} {metrics.endpoint}")
+    if budget is None:
+        budget = budgets.get(metrics.endpoint)
+    if budget is None or metrics.queries <= budget:
+        return
+    registry.record_budget_exceeded(metrics.endpoint, method)
+    message = (
+        f"{method} {metrics.endpoint}: {metrics.queries} SQL-запросов "
+        f"при бюджете {budget}"
+    )
+    if settings.QUERY_BUDGET_STRICT:
+        raise QueryBudgetExceeded(message)
+    logger.warning(
+        message,
+        extra={
+            "endpoint": metrics.endpoint,
+            "queries": metrics.queries,
+            "budget": budget,
+        },
+    )
+
+
+@require_safe
+def metrics_view(request):
+    """
+    Метрики в формате Prometheus: с заголовком Authorization: Bearer
+    <METRICS_TOKEN> или для персонала, вошедшего в админку. Без токена в
+    настройках остальным отвечает 404, с токеном — 403.
+    """
+    token = settings.METRICS_TOKEN
+    if not request.user.is_staff and not (
+        token
+        and constant_time_compare(
+            request.headers.get("Authorization", ""), f"Bearer {token}"
+        )
+    ):
+        if not token:
+            raise Http404
+        return HttpResponseForbidden()
+    return HttpResponse(
+        registry.render(), content_type=PROMETHEUS_CONTENT_TYPE
+    )
@@ -0,0 +1,81 @@
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+from common.metrics import RequestMetrics, check_query_budget, registry
+
+KNOWN_METHODS = frozenset(
+    ("GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS")
+)
+
+
+class RequestMetricsMiddleware:
+    """
+    Считает SQL-запросы и их время для каждого запроса и копит метрики
+    по эндпоинтам; в режиме DEBUG и для персонала добавляет заголовок
+    Server-Timing.
+
+    Эндпоинт — basename.action для viewset'ов (ставит MetricsMixin),
+    для остальных view — имя URL-маршрута. У потоковых ответов запросы
+    и размер тела учитываются по мере отдачи тела, а метрики и бюджет
+    проверяются после неё; Server-Timing уходит с заголовками и
+    поэтому отражает только работу до начала тела.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = request.metrics = RequestMetrics()
+        with self.count_queries(metrics):
+            response = self.get_response(request)
+        user = getattr(request, "user", None)
+        if settings.DEBUG or getattr(user, "is_staff", False):
+            response.headers["Server-Timing"] = metrics.server_timing(
+                metrics.elapsed()
+            )
+        if not response.streaming:
+            self.record(request, response, metrics, len(response.content))
+        elif response.is_async:
+            self.record(request, response, metrics, None)
+        else:
+            response.streaming_content = self.measure_stream(
+                request, response, metrics, response.streaming_content
+            )
+        return response
+
+    @staticmethod
+    @contextmanager
+    def count_queries(metrics):
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(
+                    connections[alias].execute_wrapper(metrics)
+                )
+            yield
+
+    def measure_stream(self, request, response, metrics, content):
+        size = 0
+        try:
+            with self.count_queries(metrics):
+                for chunk in content:
+                    size += len(chunk)
+                    yield chunk
+        finally:
+            self.record(request, response, metrics, size)
+
+    def record(self, request, response, metrics, size):
+        if metrics.endpoint is None:
+            match = request.resolver_match
+            metrics.endpoint = match.view_name if match else "unmatched"
+        method = request.method if request.method in KNOWN_METHODS else "OTHER"
+        registry.record(
+            metrics.endpoint,
+            method,
+            response.status_code,
+            metrics,
+            metrics.elapsed(),
+            size,
+        )
+        check_query_budget(metrics, method)
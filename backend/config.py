@@ -17,3 +17,23 @@ DJANGO_ALLOWED_HOSTS = [
     for h in os.getenv("DJANGO_ALLOWED_HOSTS", "").split(",")
     if h.strip()
 ]
+
+SHOPPING_LIST_PDF_FONT = os.getenv(
+    "SHOPPING_LIST_PDF_FONT",
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+)
+
+CACHE_BACKEND = os.getenv(
+    "DJANGO_CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+)
+CACHE_LOCATION = os.getenv("DJANGO_CACHE_LOCATION", "")
+
+IMAGE_PROCESSING_WORKERS = int(os.getenv("IMAGE_PROCESSING_WORKERS", "2"))
+IMAGE_PROCESSING_EAGER = os.getenv("IMAGE_PROCESSING_EAGER", "False") == "True"
+
+DJANGO_LOG_LEVEL = os.getenv("DJANGO_LOG_LEVEL", "INFO")
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+QUERY_BUDGET_STRICT = os.getenv("QUERY_BUDGET_STRICT", "False") == "True"
+
+# Реализация JSON для API: "json" (стандартная библиотека) или "orjson".
+DJANGO_JSON_BACKEND = os.getenv("DJANGO_JSON_BACKEND", "json")
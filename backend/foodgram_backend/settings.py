@@ -1,16 +1,28 @@
 import os
+from importlib.util import find_spec
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 from common.constants import DEFAULT_PAGE_SIZE
 from config import (
+    CACHE_BACKEND,
+    CACHE_LOCATION,
     DB_HOST,
     DB_PORT,
     DJANGO_ALLOWED_HOSTS,
     DJANGO_DEBUG,
+    DJANGO_JSON_BACKEND,
+    DJANGO_LOG_LEVEL,
     DJANGO_SECRET_KEY,
+    IMAGE_PROCESSING_EAGER,
+    IMAGE_PROCESSING_WORKERS,
+    METRICS_TOKEN,
     POSTGRES_DB,
     POSTGRES_PASSWORD,
     POSTGRES_USER,
+    QUERY_BUDGET_STRICT,
+    SHOPPING_LIST_PDF_FONT,
 )
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -32,6 +44,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "django_extensions",
     "rest_framework",
     "rest_framework.authtoken",
@@ -42,6 +55,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Первым, чтобы учитывать запросы и время всех остальных слоёв.
+    "common.middleware.RequestMetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -81,6 +96,19 @@ DATABASES = {
     }
 }
 
+# В продакшене с несколькими воркерами нужен общий кэш, например
+# django.core.cache.backends.redis.RedisCache или PyMemcacheCache.
+CACHES = {
+    "default": {
+        "BACKEND": CACHE_BACKEND,
+        "LOCATION": CACHE_LOCATION,
+    }
+}
+if CACHE_BACKEND.endswith("LocMemCache"):
+    # По умолчанию LocMemCache хранит 300 ключей, а лента подписок
+    # кэширует по списку на каждого автора.
+    CACHES["default"]["OPTIONS"] = {"MAX_ENTRIES": 10000}
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator",
@@ -127,6 +155,28 @@ REST_FRAMEWORK = {
     "PAGE_SIZE": DEFAULT_PAGE_SIZE,
 }
 
+# orjson — необязательная зависимость: быстрее кодирует ответы и
+# разбирает тела запросов. Загрузки картинок (RecipeViewSet, аватар)
+# по-прежнему разбирает потоковый Base64StreamingJSONParser.
+if DJANGO_JSON_BACKEND == "orjson":
+    if find_spec("orjson") is None:
+        raise ImproperlyConfigured(
+            "DJANGO_JSON_BACKEND=orjson требует установленного пакета orjson."
+        )
+    REST_FRAMEWORK["DEFAULT_RENDERER_CLASSES"] = [
+        "api.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ]
+    REST_FRAMEWORK["DEFAULT_PARSER_CLASSES"] = [
+        "api.parsers.ORJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ]
+elif DJANGO_JSON_BACKEND != "json":
+    raise ImproperlyConfigured(
+        f"Неизвестный DJANGO_JSON_BACKEND: {DJANGO_JSON_BACKEND!r}."
+    )
+
 DJOSER = {
     "LOGIN_FIELD": "email",
     "SERIALIZERS": {
@@ -140,16 +190,80 @@ DJOSER = {
     },
 }
 
+# Превью изображений строятся в фоновом пуле потоков; в тестах их
+# удобно строить сразу после фиксации транзакции (IMAGE_PROCESSING_EAGER).
+IMAGE_PROCESSING_WORKERS = IMAGE_PROCESSING_WORKERS
+IMAGE_PROCESSING_EAGER = IMAGE_PROCESSING_EAGER
+
+# TTF-шрифт с кириллицей для PDF-выгрузки списка покупок
+SHOPPING_LIST_PDF_FONT = SHOPPING_LIST_PDF_FONT
+
+# Метрики запросов (common.metrics): /api/metrics/ в формате Prometheus
+# для персонала и, при заданном METRICS_TOKEN, с заголовком
+# Authorization: Bearer; без токена остальным — 404.
+METRICS_TOKEN = METRICS_TOKEN
+
+# Сколько SQL-запросов может выполнить эндпоинт ("basename.action" для
+# viewset'ов, имя маршрута для остальных view; "<МЕТОД> <эндпоинт>" —
+# для отдельного метода). Превышение пишется в лог как предупреждение,
+# а при QUERY_BUDGET_STRICT (включать в тестах) — исключение.
+# Значения — худший случай из api/tests/test_query_budgets.py (холодные
+# кэши, запрос с токеном, непустые данные); запись рецепта на PostgreSQL
+# добавляет UPDATE search_vector. Тесты FoodgramAPITestCase идут в
+# строгом режиме.
+QUERY_BUDGETS = {
+    "recipes.list": 6,
+    "recipes.retrieve": 4,
+    "recipes.feed": 6,
+    "recipes.trending": 5,
+    "recipes.by_ingredients": 5,
+    "recipes.get_link": 3,
+    "recipes.download_shopping_cart": 2,
+    "recipes.create": 17,
+    "recipes.update": 23,
+    "recipes.partial_update": 23,
+    "recipes.destroy": 20,
+    "recipes.favorite": 6,
+    "recipes.favorite_bulk": 6,
+    "recipes.shopping_cart": 13,
+    "recipes.shopping_cart_bulk": 13,
+    "recipes.clear_shopping_cart": 6,
+    "ingredients.list": 3,
+    "ingredients.retrieve": 2,
+    "tags.list": 3,
+    "tags.retrieve": 2,
+    "users.create": 5,
+    "users.list": 4,
+    "users.retrieve": 3,
+    "users.me": 2,
+    "users.subscriptions": 4,
+    "users.subscribe": 6,
+    "short-link": 1,
+}
+QUERY_BUDGET_STRICT = QUERY_BUDGET_STRICT
+
 LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,
+    "formatters": {
+        "verbose": {
+            "format": "{asctime} {levelname} {name}: {message}",
+            "style": "{",
+        },
+    },
     "handlers": {
         "console": {
             "class": "logging.StreamHandler",
+            "formatter": "verbose",
+        },
+    },
+    "loggers": {
+        "common.metrics": {
+            "level": "WARNING",
         },
     },
     "root": {
         "handlers": ["console"],
-        "level": "INFO",
+        "level": DJANGO_LOG_LEVEL,
     },
 }
@@ -1,7 +1,22 @@
+import logging
 import os
 
 from django.core.wsgi import get_wsgi_application
+from django.db import DatabaseError, close_old_connections
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "foodgram_backend.settings")
 
 application = get_wsgi_application()
+
+# Индекс поиска по ингредиентам строится при старте воркера, а не на
+# первом запросе; если БД недоступна, он построится позже по запросу.
+from recipes.ingredient_index import recipe_ingredient_index  # noqa: E402
+
+try:
+    recipe_ingredient_index.warm_up()
+except DatabaseError:
+    logging.getLogger(__name__).exception(
+        "Не удалось построить индекс ингредиентов при старте"
+    )
+finally:
+    close_old_connections()
@@ -1,5 +1,5 @@
+from django import forms
 from django.contrib import admin
-from django.db.models import Count
 
 from .models import (
     Favorite,
@@ -7,8 +7,12 @@ from .models import (
     Recipe,
     RecipeIngredient,
     ShoppingCart,
+    ShoppingCartItemTotal,
+    ShortLink,
     Tag,
 )
+from .shortlinks import decode_code
+from .signals import deferred_recipe_touches
 
 
 class RecipeIngredientInline(admin.TabularInline):
@@ -21,22 +25,21 @@ class RecipeIngredientInline(admin.TabularInline):
 
 @admin.register(Recipe)
 class RecipeAdmin(admin.ModelAdmin):
-    list_display = ("name", "author", "get_favorites_count")
+    list_display = ("name", "author", "get_favorites_count", "in_carts_count")
     search_fields = ("name", "author__username", "author__email")
     list_filter = ("tags",)
     inlines = [RecipeIngredientInline]
     filter_horizontal = ("tags",)
 
-    @admin.display(description="Количество в избранном")
+    @admin.display(
+        description="Количество в избранном", ordering="favorites_count"
+    )
     def get_favorites_count(self, obj):
-        return obj.favorites.count()
-
-    def get_queryset(self, request):
-        queryset = super().get_queryset(request)
-        return queryset.annotate(favorite_count=Count("favorites"))
+        return obj.favorites_count
 
     def save_related(self, request, form, formsets, change):
-        super().save_related(request, form, formsets, change)
+        with deferred_recipe_touches():
+            super().save_related(request, form, formsets, change)
         obj = form.instance
         if obj.ingredients.count() == 0:
             raise ValueError("Рецепт должен содержать хотя бы один ингредиент")
@@ -46,7 +49,7 @@ class RecipeAdmin(admin.ModelAdmin):
 
 @admin.register(Ingredient)
 class IngredientAdmin(admin.ModelAdmin):
-    list_display = ("name", "measurement_unit")
+    list_display = ("name", "measurement_unit", "base_unit", "unit_factor")
     search_fields = ("name",)
 
 
@@ -61,14 +64,50 @@ class RecipeIngredientAdmin(admin.ModelAdmin):
     list_display = ("recipe", "ingredient", "amount")
     search_fields = ("recipe__name", "ingredient__name")
 
+    def delete_queryset(self, request, queryset):
+        with deferred_recipe_touches():
+            super().delete_queryset(request, queryset)
+
 
 @admin.register(Favorite)
 class FavoriteAdmin(admin.ModelAdmin):
-    list_display = ("user", "recipe")
+    list_display = ("user", "recipe", "created_at")
     search_fields = ("user__email", "recipe__name")
 
 
 @admin.register(ShoppingCart)
 class ShoppingCartAdmin(admin.ModelAdmin):
-    list_display = ("user", "recipe")
+    list_display = ("user", "recipe", "created_at")
     search_fields = ("user__email", "recipe__name")
+
+
+@admin.register(ShoppingCartItemTotal)
+class ShoppingCartItemTotalAdmin(admin.ModelAdmin):
+    list_display = ("user", "ingredient", "total_amount")
+    search_fields = ("user__email", "ingredient__name")
+
+
+class ShortLinkAdminForm(forms.ModelForm):
+    class Meta:
+        model = ShortLink
+        fields = "__all__"
+
+    def clean_code(self):
+        """
+        Собственный код не должен разбираться как код по id: иначе он
+        перекроет ссылку на рецепт с таким id, когда тот появится.
+        """
+        code = self.cleaned_data["code"]
+        if decode_code(code) is not None:
+            raise forms.ValidationError(
+                "Код совпадает с кодом рецепта по id: добавьте «-» или «_»."
+            )
+        return code
+
+
+@admin.register(ShortLink)
+class ShortLinkAdmin(admin.ModelAdmin):
+    form = ShortLinkAdminForm
+    list_display = ("code", "recipe", "created_at")
+    search_fields = ("code", "recipe__name")
+    raw_id_fields = ("recipe",)
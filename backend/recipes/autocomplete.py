@@ -0,0 +1,125 @@
+import threading
+import time
+from bisect import bisect_left
+from itertools import chain, count, islice
+
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db import connection
+
+from common.constants import (
+    INGREDIENT_AUTOCOMPLETE_FUZZY_LIMIT,
+    INGREDIENT_AUTOCOMPLETE_TTL,
+)
+
+from .models import Ingredient
+
+FIELDS = ("id", "name", "measurement_unit")
+
+
+class IngredientAutocomplete:
+    """
+    Подсказки ингредиентов по началу и по вхождению строки.
+
+    Названия хранятся в памяти процесса отсортированным массивом
+    приведённых к casefold строк: совпадения по началу ищутся бинарным
+    поиском, по вхождению — проходом по массиву. Если ничего не нашлось
+    (например, ингредиент добавлен в другом воркере и индекс ещё не
+    устарел), на PostgreSQL тот же поиск повторяется в базе: по началу —
+    по индексу UPPER(name) varchar_pattern_ops, по вхождению и нечёткий —
+    по триграммному индексу.
+
+    Кэш сбрасывается сигналами при изменении ингредиентов в этом
+    процессе, а в остальных воркерах устаревает через
+    INGREDIENT_AUTOCOMPLETE_TTL секунд.
+    """
+
+    def __init__(self, ttl=INGREDIENT_AUTOCOMPLETE_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        # Индекс (ключи, записи, время загрузки) заменяется одним
+        # присваиванием, поэтому ключи и записи всегда из одной загрузки.
+        self._index = None
+        self._versions = count()
+        self._version = next(self._versions)
+
+    def invalidate(self):
+        self._version = next(self._versions)
+        self._index = None
+
+    def _load(self):
+        rows = sorted(
+            (
+                (row["name"].casefold(), row["id"], row)
+                for row in Ingredient.objects.values(*FIELDS)
+            ),
+            key=lambda item: item[:2],
+        )
+        return (
+            [key for key, _, _ in rows],
+            [row for _, _, row in rows],
+            time.monotonic(),
+        )
+
+    def _is_fresh(self, index):
+        return index is not None and time.monotonic() - index[2] < self.ttl
+
+    def _get_index(self):
+        index = self._index
+        if self._is_fresh(index):
+            return index
+        with self._lock:
+            index = self._index
+            if not self._is_fresh(index):
+                version = self._version
+                index = self._load()
+                # Сброс во время загрузки: индекс мог прочитать старые
+                # данные, поэтому он не сохраняется.
+                if version == self._version:
+                    self._index = index
+            return index
+
+    def search(self, query, limit=None):
+        """Сначала совпадения по началу названия, затем по вхождению."""
+        query = query.strip().casefold()
+        if not query:
+            return []
+        keys, entries, _ = self._get_index()
+
+        start = end = bisect_left(keys, query)
+        while end < len(keys) and keys[end].startswith(query):
+            end += 1
+        contains = (
+            position
+            for position, key in enumerate(keys)
+            if query in key and not start <= position < end
+        )
+        results = [
+            entries[position]
+            for position in islice(chain(range(start, end), contains), limit)
+        ]
+        if not results:
+            results = self._database_search(query, limit)
+        return results
+
+    def _database_search(self, query, limit):
+        """Первые непустые из совпадений по началу, по вхождению и
+        нечётких."""
+        if connection.vendor != "postgresql":
+            return []
+        limit = limit or INGREDIENT_AUTOCOMPLETE_FUZZY_LIMIT
+        for queryset in (
+            Ingredient.objects.filter(name__istartswith=query).order_by(
+                "name"
+            ),
+            Ingredient.objects.filter(name__icontains=query).order_by("name"),
+            Ingredient.objects.filter(name__trigram_word_similar=query)
+            .annotate(similarity=TrigramWordSimilarity(query, "name"))
+            .order_by("-similarity", "name"),
+        ):
+            results = list(queryset.values(*FIELDS)[:limit])
+            if results:
+                return results
+        return []
+
+
+ingredient_autocomplete = IngredientAutocomplete()
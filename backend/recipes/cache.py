@@ -0,0 +1,149 @@
+import time
+
+from django.core.cache import cache
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+
+from common.constants import (
+    AUTHOR_LATEST_RECIPES_CACHE_KEY,
+    AUTHOR_LATEST_RECIPES_CACHE_TIMEOUT,
+    AUTHOR_LATEST_RECIPES_SIZE,
+    CATALOG_GENERATION_CACHE_KEY,
+    RECIPES_GENERATION_CACHE_KEY,
+    SHORT_LINK_CODES_CACHE_KEY,
+    TAG_MAP_CACHE_KEY,
+)
+
+from .models import Recipe, ShortLink, Tag
+
+# Сколько авторов загружать одним запросом (лимит параметров SQLite).
+AUTHOR_BATCH_SIZE = 500
+
+
+def _get_generation(key):
+    """
+    Текущее значение счётчика поколения key.
+
+    Если счётчик вытеснен из кэша, он начинается заново с текущего
+    времени в миллисекундах и не повторяет прежние значения.
+    """
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, int(time.time() * 1000), timeout=None)
+        generation = cache.get(key)
+    return generation
+
+
+def _bump_generation(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        _get_generation(key)
+
+
+def get_recipes_generation():
+    """
+    Текущее поколение данных о рецептах.
+
+    Ключи кэша ответов включают поколение, поэтому его увеличение
+    разом делает недействительными все сохранённые страницы без обхода
+    ключей.
+    """
+    return _get_generation(RECIPES_GENERATION_CACHE_KEY)
+
+
+def bump_recipes_generation():
+    _bump_generation(RECIPES_GENERATION_CACHE_KEY)
+
+
+def get_catalog_generation():
+    """
+    Поколение справочников тегов и ингредиентов: их названия входят в
+    ответ с рецептом, но не меняют updated_at рецептов.
+    """
+    return _get_generation(CATALOG_GENERATION_CACHE_KEY)
+
+
+def bump_catalog_generation():
+    _bump_generation(CATALOG_GENERATION_CACHE_KEY)
+
+
+def get_tag_ids_by_slug():
+    """Словарь slug → id всех тегов, закэшированный до изменения тегов."""
+    tag_ids = cache.get(TAG_MAP_CACHE_KEY)
+    if tag_ids is None:
+        tag_ids = dict(Tag.objects.values_list("slug", "id"))
+        cache.set(TAG_MAP_CACHE_KEY, tag_ids, timeout=None)
+    return tag_ids
+
+
+def invalidate_tag_map():
+    cache.delete(TAG_MAP_CACHE_KEY)
+
+
+def get_custom_short_codes():
+    """Словарь собственный код → id рецепта, закэшированный до изменений."""
+    codes = cache.get(SHORT_LINK_CODES_CACHE_KEY)
+    if codes is None:
+        codes = dict(ShortLink.objects.values_list("code", "recipe_id"))
+        cache.set(SHORT_LINK_CODES_CACHE_KEY, codes, timeout=None)
+    return codes
+
+
+def invalidate_custom_short_codes():
+    cache.delete(SHORT_LINK_CODES_CACHE_KEY)
+
+
+def get_author_latest_recipe_ids(author_ids):
+    """
+    Словарь author_id → id последних AUTHOR_LATEST_RECIPES_SIZE рецептов
+    автора по убыванию.
+
+    Списки берутся из кэша одним get_many, недостающие загружаются
+    запросом с ROW_NUMBER() OVER (PARTITION BY author_id).
+    """
+    keys = {
+        AUTHOR_LATEST_RECIPES_CACHE_KEY.format(author_id): author_id
+        for author_id in author_ids
+    }
+    latest = {keys[key]: ids for key, ids in cache.get_many(keys).items()}
+    missing = [
+        author_id for author_id in keys.values() if author_id not in latest
+    ]
+    for start in range(0, len(missing), AUTHOR_BATCH_SIZE):
+        end = start + AUTHOR_BATCH_SIZE
+        batch = missing[start:end]
+        loaded = {author_id: [] for author_id in batch}
+        rows = (
+            Recipe.objects.filter(author_id__in=batch)
+            .annotate(
+                row_number=Window(
+                    RowNumber(),
+                    partition_by=F("author_id"),
+                    order_by=F("id").desc(),
+                )
+            )
+            .filter(row_number__lte=AUTHOR_LATEST_RECIPES_SIZE)
+            .order_by("author_id", "-id")
+            .values_list("author_id", "id")
+        )
+        for author_id, recipe_id in rows:
+            loaded[author_id].append(recipe_id)
+        cache.set_many(
+            {
+                AUTHOR_LATEST_RECIPES_CACHE_KEY.format(author_id): ids
+                for author_id, ids in loaded.items()
+            },
+            AUTHOR_LATEST_RECIPES_CACHE_TIMEOUT,
+        )
+        latest.update(loaded)
+    return latest
+
+
+def invalidate_author_latest_recipes(*author_ids):
+    cache.delete_many(
+        [
+            AUTHOR_LATEST_RECIPES_CACHE_KEY.format(author_id)
+            for author_id in author_ids
+        ]
+    )
@@ -0,0 +1,59 @@
+import heapq
+from itertools import dropwhile, islice
+
+from common.constants import AUTHOR_LATEST_RECIPES_SIZE, FEED_MERGE_THRESHOLD
+from users.models import Subscription
+
+from .cache import get_author_latest_recipe_ids
+from .models import Recipe
+
+
+def get_feed_ids(user, before, size):
+    """
+    id рецептов авторов из подписок пользователя, новые сначала,
+    не больше size штук и меньше before (если он задан).
+
+    Обычно это один запрос author_id IN (подзапрос) ORDER BY id DESC.
+    Если подписок больше FEED_MERGE_THRESHOLD, страница собирается
+    слиянием закэшированных списков последних рецептов авторов, а при
+    их нехватке (глубокие страницы) — всё равно запросом.
+    """
+    following = Subscription.objects.filter(user=user)
+    if following.count() > FEED_MERGE_THRESHOLD:
+        ids = merge_feed_ids(
+            following.values_list("author_id", flat=True), before, size
+        )
+        if ids is not None:
+            return ids
+    return query_feed_ids(following.values("author_id"), before, size)
+
+
+def query_feed_ids(author_ids, before, size):
+    """Страница ленты одним индексированным запросом."""
+    queryset = Recipe.objects.filter(author_id__in=author_ids)
+    if before is not None:
+        queryset = queryset.filter(id__lt=before)
+    return list(queryset.order_by("-id").values_list("id", flat=True)[:size])
+
+
+def merge_feed_ids(author_ids, before, size):
+    """
+    Страница ленты k-way слиянием списков последних рецептов авторов.
+
+    Список автора хранит не больше AUTHOR_LATEST_RECIPES_SIZE id, поэтому
+    для полного списка более старые рецепты неизвестны: результат верен,
+    только пока страница не опускается ниже последнего id такого списка.
+    Иначе возвращается None, и страница берётся запросом.
+    """
+    floor = 0
+    lists = []
+    for ids in get_author_latest_recipe_ids(author_ids).values():
+        if len(ids) >= AUTHOR_LATEST_RECIPES_SIZE:
+            floor = max(floor, ids[-1])
+        if before is not None:
+            ids = dropwhile(lambda recipe_id: recipe_id >= before, ids)
+        lists.append(ids)
+    page = list(islice(heapq.merge(*lists, reverse=True), size))
+    if floor and (len(page) < size or page[-1] < floor):
+        return None
+    return page
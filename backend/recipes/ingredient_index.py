@@ -0,0 +1,281 @@
+import threading
+import time
+from array import array
+from bisect import bisect_left, insort
+
+from common.constants import RECIPE_INGREDIENT_INDEX_TTL
+
+from .models import RecipeIngredient
+
+ITERATOR_CHUNK_SIZE = 10000
+
+# Ингредиент хранится битовой картой, если она меньше массива позиций
+# (8 байт на рецепт против 1 бита на каждый рецепт каталога).
+DENSE_RATIO = 64
+
+
+def _bitmap_from_positions(positions, size):
+    buffer = bytearray((size + 7) // 8)
+    for position in positions:
+        buffer[position >> 3] |= 1 << (position & 7)
+    return int.from_bytes(buffer, "little")
+
+
+def _positions_desc(bitmap):
+    """Номера установленных битов от старшего к младшему."""
+    while bitmap:
+        position = bitmap.bit_length() - 1
+        yield position
+        bitmap ^= 1 << position
+
+
+class RecipeMatches:
+    """
+    Результат поиска: классы рецептов с одинаковыми долей имеющихся
+    ингредиентов и числом недостающих в порядке ранжирования, внутри
+    класса — новые рецепты сначала. Срез [a:b] разворачивает только
+    нужные биты, так что пагинатор DRF не сортирует все найденные
+    рецепты.
+    """
+
+    def __init__(self, classes, recipe_ids, recipes):
+        # classes: список (битовая карта, число недостающих).
+        self._classes = classes
+        self._recipe_ids = recipe_ids
+        self._recipes = recipes
+        self._counts = [bitmap.bit_count() for bitmap, _ in classes]
+
+    def __len__(self):
+        return sum(self._counts)
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[slice(index, index + 1)][0]
+        start, stop, _ = index.indices(len(self))
+        results = []
+        skip = start
+        for (bitmap, missing), count in zip(self._classes, self._counts):
+            if len(results) >= stop - start:
+                break
+            if skip >= count:
+                skip -= count
+                continue
+            for position in _positions_desc(bitmap):
+                if skip:
+                    skip -= 1
+                    continue
+                recipe_id = self._recipe_ids[position]
+                size = len(self._recipes[recipe_id])
+                results.append((recipe_id, size - missing, missing, size))
+                if len(results) >= stop - start:
+                    break
+        return results
+
+
+class RecipeIngredientIndex:
+    """
+    Инвертированный индекс «ингредиент → рецепты» в памяти процесса.
+
+    Каждому рецепту присвоена позиция (по возрастанию id); ингредиент
+    хранит множество позиций своих рецептов — битовой картой (int) для
+    частых ингредиентов и отсортированным массивом для редких. При
+    поиске карты выбранных ингредиентов складываются поразрядно
+    (bit-sliced счётчик), и для каждой пары «совпало m из s» рецепты
+    получаются одной операцией AND над картами, без цикла по рецептам.
+
+    Индекс строится при старте воркера (warm_up) или при первом
+    запросе, точечно обновляется сигналами при изменении рецептов этого
+    процесса, а в остальных воркерах перестраивается через
+    RECIPE_INGREDIENT_INDEX_TTL секунд.
+    """
+
+    def __init__(self, ttl=RECIPE_INGREDIENT_INDEX_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._state = None
+        self._loaded_at = 0
+
+    def invalidate(self):
+        self._state = None
+
+    def warm_up(self):
+        self._get_state()
+
+    def _load(self):
+        recipe_ids = array("l")
+        recipes = {}
+        positions_by_ingredient = {}
+        rows = (
+            RecipeIngredient.objects.order_by("recipe_id")
+            .values_list("recipe_id", "ingredient_id")
+            .iterator(chunk_size=ITERATOR_CHUNK_SIZE)
+        )
+        for recipe_id, ingredient_id in rows:
+            if not recipe_ids or recipe_ids[-1] != recipe_id:
+                recipe_ids.append(recipe_id)
+                recipes[recipe_id] = []
+            recipes[recipe_id].append(ingredient_id)
+            positions_by_ingredient.setdefault(
+                ingredient_id, array("l")
+            ).append(len(recipe_ids) - 1)
+
+        total = len(recipe_ids)
+        postings = {
+            ingredient_id: (
+                _bitmap_from_positions(positions, total)
+                if len(positions) * DENSE_RATIO > total
+                else positions
+            )
+            for ingredient_id, positions in positions_by_ingredient.items()
+        }
+        positions_by_size = {}
+        for position, recipe_id in enumerate(recipe_ids):
+            positions_by_size.setdefault(len(recipes[recipe_id]), []).append(
+                position
+            )
+        return {
+            "recipe_ids": recipe_ids,
+            "recipes": {
+                recipe_id: tuple(ingredient_ids)
+                for recipe_id, ingredient_ids in recipes.items()
+            },
+            "postings": postings,
+            "sizes": {
+                size: _bitmap_from_positions(positions, total)
+                for size, positions in positions_by_size.items()
+            },
+        }
+
+    def _get_state(self):
+        state = self._state
+        if state is not None and time.monotonic() - self._loaded_at < self.ttl:
+            return state
+        with self._lock:
+            if self._state is None or (
+                time.monotonic() - self._loaded_at >= self.ttl
+            ):
+                self._state = self._load()
+                self._loaded_at = time.monotonic()
+            return self._state
+
+    def refresh_recipe(self, recipe_id):
+        """Перечитывает ингредиенты одного рецепта (или убирает его)."""
+        if self._state is None:
+            return
+        ingredient_ids = tuple(
+            RecipeIngredient.objects.filter(recipe_id=recipe_id).values_list(
+                "ingredient_id", flat=True
+            )
+        )
+        with self._lock:
+            state = self._state
+            if state is None:
+                return
+            recipe_ids = state["recipe_ids"]
+            position = bisect_left(recipe_ids, recipe_id)
+            if position == len(recipe_ids) and ingredient_ids:
+                recipe_ids.append(recipe_id)
+            elif position == len(recipe_ids) or (
+                recipe_ids[position] != recipe_id
+            ):
+                if ingredient_ids:
+                    # Позиции идут по возрастанию id, вставить старый
+                    # рецепт в середину нельзя — перестроим целиком.
+                    self._state = None
+                return
+            old_ingredient_ids = state["recipes"].pop(recipe_id, ())
+            for ingredient_id in old_ingredient_ids:
+                self._discard(state["postings"], ingredient_id, position)
+            self._discard(state["sizes"], len(old_ingredient_ids), position)
+            if ingredient_ids:
+                for ingredient_id in ingredient_ids:
+                    self._add(state["postings"], ingredient_id, position)
+                self._add(state["sizes"], len(ingredient_ids), position)
+                state["recipes"][recipe_id] = ingredient_ids
+
+    @staticmethod
+    def _add(sets, key, position):
+        entry = sets.get(key)
+        if entry is None:
+            sets[key] = array("l", [position])
+        elif isinstance(entry, int):
+            sets[key] = entry | 1 << position
+        else:
+            insort(entry, position)
+
+    @staticmethod
+    def _discard(sets, key, position):
+        entry = sets.get(key)
+        if entry is None:
+            return
+        if isinstance(entry, int):
+            sets[key] = entry & ~(1 << position)
+            return
+        index = bisect_left(entry, position)
+        if index < len(entry) and entry[index] == position:
+            del entry[index]
+
+    def search(self, ingredient_ids, max_missing=None):
+        """
+        Рецепты, где есть хотя бы один из ingredient_ids, лучшие сначала:
+        по доле имеющихся ингредиентов рецепта, затем по числу
+        недостающих. max_missing отсекает рецепты, где не хватает
+        больше стольких ингредиентов.
+        """
+        state = self._get_state()
+        recipe_ids = state["recipe_ids"]
+        total = len(recipe_ids)
+        full = (1 << total) - 1
+
+        # planes[i] — i-й разряд числа совпавших ингредиентов рецепта.
+        planes = []
+        for ingredient_id in set(ingredient_ids):
+            entry = state["postings"].get(ingredient_id)
+            if entry is None:
+                continue
+            carry = (
+                entry
+                if isinstance(entry, int)
+                else _bitmap_from_positions(entry, total)
+            )
+            for index, plane in enumerate(planes):
+                planes[index], carry = plane ^ carry, plane & carry
+                if not carry:
+                    break
+            if carry:
+                planes.append(carry)
+
+        # Полные совпадения разного размера ранжируются вместе, поэтому
+        # классы с одинаковыми долей и числом недостающих объединяются.
+        classes = {}
+        for matched in range(1, 1 << len(planes)):
+            equal = full
+            for index, plane in enumerate(planes):
+                equal &= plane if matched >> index & 1 else full ^ plane
+            if not equal:
+                continue
+            for size, size_bitmap in state["sizes"].items():
+                missing = size - matched
+                if missing < 0 or (
+                    max_missing is not None and missing > max_missing
+                ):
+                    continue
+                bitmap = equal & (
+                    size_bitmap
+                    if isinstance(size_bitmap, int)
+                    else _bitmap_from_positions(size_bitmap, total)
+                )
+                if bitmap:
+                    key = (-matched / size, missing)
+                    classes[key] = classes.get(key, 0) | bitmap
+        return RecipeMatches(
+            [
+                (bitmap, missing)
+                for (_, missing), bitmap in sorted(classes.items())
+            ],
+            recipe_ids,
+            state["recipes"],
+        )
+
+
+recipe_ingredient_index = RecipeIngredientIndex()
@@ -0,0 +1,311 @@
+import json
+import platform
+import random
+import statistics
+import time
+from math import ceil
+from pathlib import Path
+from urllib.parse import urlencode
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client, override_settings
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from common.constants import DEFAULT_PAGE_SIZE
+from recipes.management.commands.seed_benchmark import BENCHMARK_PREFIX
+from recipes.models import (
+    Favorite,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    ShoppingCart,
+    Tag,
+)
+from users.models import Subscription, User
+
+# Сколько первых страниц списков перебирать в сценариях.
+MAX_BENCHMARK_PAGES = 5
+
+
+class QueryCounter:
+    """Обёртка connection.execute_wrapper(): только считает запросы."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def percentile(sorted_values, fraction):
+    """Перцентиль с линейной интерполяцией по отсортированным значениям."""
+    position = (len(sorted_values) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (
+        sorted_values[upper] - sorted_values[lower]
+    ) * (position - lower)
+
+
+class Command(BaseCommand):
+    help = (
+        "Прогоняет горячие эндпоинты API через тестовый клиент Django на "
+        "данных seed_benchmark и пишет p50/p95 задержки и число "
+        "SQL-запросов в JSON для сравнения между коммитами."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output",
+            default="benchmark.json",
+            help="Куда записать результаты (JSON).",
+        )
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=50,
+            help="Замеров на сценарий.",
+        )
+        parser.add_argument(
+            "--warmup",
+            type=int,
+            default=5,
+            help="Прогревочных запросов на сценарий (не учитываются).",
+        )
+        parser.add_argument(
+            "--label",
+            default="",
+            help="Метка прогона, например хэш коммита.",
+        )
+        parser.add_argument(
+            "--compare",
+            help="JSON предыдущего прогона для сравнения.",
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=42,
+            help="Зерно выбора рецептов и поисковых запросов.",
+        )
+        parser.add_argument(
+            "--scenario",
+            action="append",
+            help="Запустить только указанные сценарии (можно повторять).",
+        )
+
+    def handle(self, *args, **options):
+        if options["iterations"] < 1:
+            raise CommandError("--iterations должно быть положительным.")
+        users = User.objects.filter(username__startswith=BENCHMARK_PREFIX)
+        if not users.exists():
+            raise CommandError(
+                "Нет данных бенчмарка: запустите seed_benchmark."
+            )
+        scenarios = self._scenarios(random.Random(options["seed"]), users)
+        if options["scenario"]:
+            unknown = set(options["scenario"]) - scenarios.keys()
+            if unknown:
+                raise CommandError(
+                    f"Неизвестные сценарии: {', '.join(sorted(unknown))}. "
+                    f"Доступны: {', '.join(scenarios)}."
+                )
+            scenarios = {name: scenarios[name] for name in options["scenario"]}
+
+        results = {}
+        # Тестовый клиент ходит на хост testserver.
+        with override_settings(
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]
+        ):
+            for name, (client, urls) in scenarios.items():
+                results[name] = self._run(client, urls, options)
+                self._write_row(name, results[name])
+
+        report = {
+            "label": options["label"],
+            "created_at": timezone.now().isoformat(),
+            "environment": {
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "database": connection.vendor,
+                "debug": settings.DEBUG,
+            },
+            "dataset": self._dataset(),
+            "iterations": options["iterations"],
+            "warmup": options["warmup"],
+            "scenarios": results,
+        }
+        Path(options["output"]).write_text(
+            json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8"
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f"Результаты записаны в {options['output']}.")
+        )
+        if options["compare"]:
+            self._compare(Path(options["compare"]), results)
+
+    def _client(self, user=None):
+        client = Client()
+        if user is not None:
+            token, _ = Token.objects.get_or_create(user=user)
+            client.defaults["HTTP_AUTHORIZATION"] = f"Token {token.key}"
+        return client
+
+    def _scenarios(self, rng, users):
+        """Сценарии: имя → (клиент, список URL, которые перебираются)."""
+        # Самые «тяжёлые» пользователи: больше всего подписок и корзина.
+        follower = (
+            users.annotate(total=Count("subscriptions"))
+            .order_by("-total", "pk")
+            .first()
+        )
+        cart_owner = (
+            users.annotate(total=Count("shopping_carts"))
+            .order_by("-total", "pk")
+            .first()
+        )
+        recipe_ids = list(
+            Recipe.objects.filter(
+                author__username__startswith=BENCHMARK_PREFIX
+            ).values_list("pk", flat=True)
+        )
+        tag_slugs = list(Tag.objects.values_list("slug", flat=True))
+        names = list(
+            Ingredient.objects.filter(
+                pk__in=RecipeIngredient.objects.values("ingredient")
+            ).values_list("name", flat=True)[:1000]
+        )
+        viewer = self._client(follower)
+        return {
+            "recipes.list.anonymous": (self._client(), ["/api/recipes/"]),
+            "recipes.list": (
+                viewer,
+                [
+                    f"/api/recipes/?page={page}"
+                    for page in self._pages(Recipe.objects.count())
+                ],
+            ),
+            "recipes.list.tags": (
+                viewer,
+                [f"/api/recipes/?tags={slug}" for slug in tag_slugs],
+            ),
+            "recipes.retrieve": (
+                viewer,
+                [
+                    f"/api/recipes/{recipe_id}/"
+                    for recipe_id in rng.sample(
+                        recipe_ids, min(len(recipe_ids), 100)
+                    )
+                ],
+            ),
+            "recipes.download_shopping_cart": (
+                self._client(cart_owner),
+                ["/api/recipes/download_shopping_cart/"],
+            ),
+            "users.subscriptions": (
+                viewer,
+                [
+                    f"/api/users/subscriptions/?page={page}&recipes_limit=3"
+                    for page in self._pages(follower.subscriptions.count())
+                ],
+            ),
+            "ingredients.search": (
+                viewer,
+                [
+                    "/api/ingredients/?" + urlencode({"name": name[:length]})
+                    for name in rng.sample(names, min(len(names), 50))
+                    for length in (1, 3)
+                ],
+            ),
+        }
+
+    @staticmethod
+    def _pages(count, limit=MAX_BENCHMARK_PAGES):
+        """Номера существующих страниц списка, не больше limit."""
+        return range(1, min(limit, ceil(count / DEFAULT_PAGE_SIZE) or 1) + 1)
+
+    def _run(self, client, urls, options):
+        for number in range(options["warmup"]):
+            self._request(client, urls[number % len(urls)])
+        timings, queries, sizes = [], [], []
+        for number in range(options["iterations"]):
+            elapsed, query_count, size = self._request(
+                client, urls[number % len(urls)]
+            )
+            timings.append(elapsed * 1000)
+            queries.append(query_count)
+            sizes.append(size)
+        timings.sort()
+        return {
+            "urls": len(urls),
+            "p50_ms": round(percentile(timings, 0.5), 3),
+            "p95_ms": round(percentile(timings, 0.95), 3),
+            "mean_ms": round(statistics.fmean(timings), 3),
+            "min_ms": round(timings[0], 3),
+            "max_ms": round(timings[-1], 3),
+            "queries_median": statistics.median(queries),
+            "queries_max": max(queries),
+            "response_bytes_median": statistics.median(sizes),
+        }
+
+    def _request(self, client, url):
+        counter = QueryCounter()
+        with connection.execute_wrapper(counter):
+            started = time.perf_counter()
+            response = client.get(url)
+            # Потоковые ответы формируются при чтении.
+            body = (
+                b"".join(response.streaming_content)
+                if response.streaming
+                else response.content
+            )
+            elapsed = time.perf_counter() - started
+        if response.status_code != 200:
+            raise CommandError(f"{url}: ответ {response.status_code}.")
+        return elapsed, counter.count, len(body)
+
+    def _dataset(self):
+        return {
+            "users": User.objects.count(),
+            "recipes": Recipe.objects.count(),
+            "recipe_ingredients": RecipeIngredient.objects.count(),
+            "favorites": Favorite.objects.count(),
+            "shopping_carts": ShoppingCart.objects.count(),
+            "subscriptions": Subscription.objects.count(),
+            "ingredients": Ingredient.objects.count(),
+        }
+
+    def _write_row(self, name, result):
+        self.stdout.write(
+            f"{name:<32} p50 {result['p50_ms']:>9.2f} мс  "
+            f"p95 {result['p95_ms']:>9.2f} мс  "
+            f"запросов {result['queries_median']:>4}"
+        )
+
+    def _compare(self, path, results):
+        try:
+            baseline = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as error:
+            raise CommandError(f"Не удалось прочитать {path}: {error}")
+        self.stdout.write(
+            f"Сравнение с {path} ({baseline.get('label') or 'без метки'}):"
+        )
+        for name, result in results.items():
+            before = baseline["scenarios"].get(name)
+            if before is None:
+                continue
+            changes = "  ".join(
+                f"{key} {before[key]:.2f} → {result[key]:.2f} "
+                f"({(result[key] / before[key] - 1) * 100:+.0f}%)"
+                for key in ("p50_ms", "p95_ms")
+                if before[key]
+            )
+            self.stdout.write(
+                f"{name:<32} {changes}  запросов "
+                f"{before['queries_median']} → {result['queries_median']}"
+            )
@@ -0,0 +1,140 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from common.constants import DEFAULT_PAGE_SIZE
+from recipes.cache import invalidate_author_latest_recipes
+from recipes.feed import merge_feed_ids, query_feed_ids
+from recipes.models import Recipe
+from users.models import Subscription
+
+User = get_user_model()
+
+BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает стратегии сборки ленты подписок (запрос IN и слияние "
+        "списков авторов) на синтетических данных. Данные создаются в "
+        "транзакции, которая затем откатывается."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--followers",
+            type=int,
+            nargs="+",
+            default=[10, 100, 1000, 5000],
+            help="Числа подписок, для которых сравнивать стратегии.",
+        )
+        parser.add_argument(
+            "--recipes-per-author",
+            type=int,
+            default=20,
+            help="Сколько рецептов у каждого синтетического автора.",
+        )
+        parser.add_argument(
+            "--pages",
+            type=int,
+            default=5,
+            help="Сколько страниц ленты пролистывать подряд.",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=5,
+            help="Сколько раз повторять замер (берётся лучший).",
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            "подписок  IN, мс  слияние, мс  слияние (холодный кэш), мс"
+        )
+        for followers in options["followers"]:
+            with transaction.atomic():
+                author_ids = self._create_authors(
+                    followers, options["recipes_per_author"]
+                )
+                try:
+                    self._compare(author_ids, options)
+                finally:
+                    invalidate_author_latest_recipes(*author_ids)
+                    transaction.set_rollback(True)
+
+    def _create_authors(self, count, recipes_per_author):
+        prefix = f"feed-bench-{time.monotonic_ns()}"
+        authors = User.objects.bulk_create(
+            (
+                User(
+                    username=f"{prefix}-{number}",
+                    email=f"{prefix}-{number}@example.com",
+                )
+                for number in range(count)
+            ),
+            batch_size=BATCH_SIZE,
+        )
+        follower = User.objects.create(
+            username=prefix, email=f"{prefix}@example.com"
+        )
+        Subscription.objects.bulk_create(
+            (Subscription(user=follower, author=author) for author in authors),
+            batch_size=BATCH_SIZE,
+        )
+        # Рецепты авторов перемешаны по времени, как в реальной ленте.
+        Recipe.objects.bulk_create(
+            (
+                Recipe(
+                    author=author,
+                    name=f"{author.username}-{number}",
+                    text="",
+                    cooking_time=1,
+                    image="recipes/benchmark.png",
+                )
+                for number in range(recipes_per_author)
+                for author in authors
+            ),
+            batch_size=BATCH_SIZE,
+        )
+        self.follower = follower
+        return [author.pk for author in authors]
+
+    def _compare(self, author_ids, options):
+        following = Subscription.objects.filter(user=self.follower)
+
+        def by_query(before, size):
+            return query_feed_ids(following.values("author_id"), before, size)
+
+        def by_merge(before, size):
+            ids = merge_feed_ids(
+                following.values_list("author_id", flat=True), before, size
+            )
+            if ids is None:
+                return by_query(before, size)
+            return ids
+
+        pages = options["pages"]
+        cold = self._scroll(by_merge, pages)
+        query_time = min(
+            self._scroll(by_query, pages) for _ in range(options["repeat"])
+        )
+        merge_time = min(
+            self._scroll(by_merge, pages) for _ in range(options["repeat"])
+        )
+        self.stdout.write(
+            f"{len(author_ids):>8}  {query_time:>6.1f}  "
+            f"{merge_time:>11.1f}  {cold:>26.1f}"
+        )
+
+    def _scroll(self, fetch_ids, pages):
+        """Время (мс) на пролистывание pages страниц ленты."""
+        started = time.perf_counter()
+        before = None
+        for _ in range(pages):
+            ids = fetch_ids(before, DEFAULT_PAGE_SIZE + 1)
+            if len(ids) <= DEFAULT_PAGE_SIZE:
+                break
+            before = ids[DEFAULT_PAGE_SIZE - 1]
+        return (time.perf_counter() - started) * 1000
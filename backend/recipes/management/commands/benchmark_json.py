@@ -0,0 +1,178 @@
+import base64
+import time
+import tracemalloc
+import uuid
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from io import BytesIO
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from django.test import override_settings
+from django.utils.translation import gettext_lazy
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.parsers import Base64StreamingJSONParser, ORJSONParser, orjson
+from api.renderers import ORJSONRenderer
+from api.serializers import RecipeReadSerializer
+from recipes.models import Recipe
+from users.models import User
+
+# Значения, которые JSONRenderer кодирует по-особому: через encoder_class
+# DRF или с экранированием разделителей строк.
+SPECIAL_VALUES = {
+    "datetime": datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=timezone.utc),
+    "date": date(2024, 5, 1),
+    "decimal": Decimal("12.50"),
+    "lazy": gettext_lazy("Рецепты"),
+    "uuid": uuid.UUID(int=1),
+    "separators": "строка\u2028с\u2029разделителями",
+    "nested": [{"id": 1, "amount": 2.5, "flag": None}],
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает стандартные JSONRenderer/JSONParser DRF и их варианты "
+        "на orjson на реальных страницах рецептов и теле загрузки с "
+        "картинкой в base64: время, пиковая память и совпадение "
+        "результата."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            type=int,
+            nargs="+",
+            default=[6, 50, 500],
+            help="Размеры страниц рецептов.",
+        )
+        parser.add_argument(
+            "--image-size",
+            type=int,
+            default=5,
+            help="Размер картинки в теле загрузки, МБ.",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=5,
+            help="Сколько раз повторять замер (берётся лучший).",
+        )
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            raise CommandError("Пакет orjson не установлен.")
+        if not Recipe.objects.exists():
+            raise CommandError("Нет данных: запустите seed_benchmark.")
+        self._check_special_values()
+        self.repeat = options["repeat"]
+        self.stdout.write(
+            "данные                      размер, КБ  json, мс  orjson, мс  "
+            "json, КБ пик  orjson, КБ пик"
+        )
+        with override_settings(
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]
+        ):
+            for size in options["sizes"]:
+                data = self._recipe_page(size)
+                body = JSONRenderer().render(data)
+                if ORJSONRenderer().render(data) != body:
+                    raise CommandError(f"{size} рецептов: JSON отличается.")
+                if ORJSONParser().parse(BytesIO(body)) != JSONParser().parse(
+                    BytesIO(body)
+                ):
+                    raise CommandError(f"{size} рецептов: разбор отличается.")
+                self._row(
+                    f"кодирование, {size} рецептов",
+                    len(body),
+                    lambda: JSONRenderer().render(data),
+                    lambda: ORJSONRenderer().render(data),
+                )
+                self._row(
+                    f"разбор, {size} рецептов",
+                    len(body),
+                    lambda: JSONParser().parse(BytesIO(body)),
+                    lambda: ORJSONParser().parse(BytesIO(body)),
+                )
+        upload = self._upload_body(options["image_size"])
+        self._row(
+            "загрузка картинки",
+            len(upload),
+            lambda: JSONParser().parse(BytesIO(upload)),
+            lambda: ORJSONParser().parse(BytesIO(upload)),
+            streaming=lambda: Base64StreamingJSONParser().parse(
+                BytesIO(upload)
+            ),
+        )
+
+    def _check_special_values(self):
+        expected = JSONRenderer().render(SPECIAL_VALUES)
+        if ORJSONRenderer().render(SPECIAL_VALUES) != expected:
+            raise CommandError(
+                "JSON для datetime/Decimal/ленивых строк отличается."
+            )
+
+    def _recipe_page(self, size):
+        user = (
+            User.objects.annotate(total=Count("favorites"))
+            .order_by("-total", "pk")
+            .first()
+        )
+        request = Request(APIRequestFactory().get("/api/recipes/"))
+        request.user = user
+        rows = RecipeReadSerializer.rows(Recipe.objects.with_user_flags(user))[
+            :size
+        ]
+        return RecipeReadSerializer(
+            rows, many=True, context={"request": request}
+        ).data
+
+    def _upload_body(self, megabytes):
+        """Тело создания рецепта с картинкой в base64, как у фронтенда."""
+        image = base64.b64encode(bytes(megabytes * 1024 * 1024)).decode()
+        return JSONRenderer().render(
+            {
+                "name": "Рецепт",
+                "text": "Описание",
+                "cooking_time": 10,
+                "tags": [1, 2],
+                "ingredients": [{"id": 1, "amount": 10}],
+                "image": f"data:image/png;base64,{image}",
+            }
+        )
+
+    def _row(self, label, size, standard, fast, streaming=None):
+        self.stdout.write(
+            f"{label:<27} {size / 1024:>10.0f}  "
+            f"{self._best(standard):>8.2f}  {self._best(fast):>10.2f}  "
+            f"{self._peak(standard):>12.0f}  {self._peak(fast):>14.0f}"
+        )
+        if streaming is not None:
+            self.stdout.write(
+                f"{'  потоковый парсер':<27} {'':>10}  {'':>8}  "
+                f"{self._best(streaming):>10.2f}  {'':>12}  "
+                f"{self._peak(streaming):>14.0f}"
+            )
+
+    def _best(self, function):
+        """Лучшее время (мс) из repeat запусков."""
+        timings = []
+        for _ in range(self.repeat):
+            started = time.perf_counter()
+            function()
+            timings.append((time.perf_counter() - started) * 1000)
+        return min(timings)
+
+    def _peak(self, function):
+        """Пиковый объём выделенной памяти (КБ) за один запуск."""
+        tracemalloc.start()
+        try:
+            function()
+            return tracemalloc.get_traced_memory()[1] / 1024
+        finally:
+            tracemalloc.stop()
@@ -0,0 +1,105 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from django.test import override_settings
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.serializers import RecipeReadSerializer, RecipeSerializer
+from recipes.models import Recipe
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает RecipeSerializer и RecipeReadSerializer на страницах "
+        "разного размера: проверяет, что JSON совпадает байт в байт, и "
+        "измеряет время загрузки, сериализации и рендеринга."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            type=int,
+            nargs="+",
+            default=[6, 50, 500],
+            help="Размеры страниц.",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=5,
+            help="Сколько раз повторять замер (берётся лучший).",
+        )
+
+    def handle(self, *args, **options):
+        # Пользователь с избранным, чтобы флаги в выдаче различались.
+        user = (
+            User.objects.annotate(total=Count("favorites"))
+            .order_by("-total", "pk")
+            .first()
+        )
+        if user is None or not Recipe.objects.exists():
+            raise CommandError("Нет данных: запустите seed_benchmark.")
+        with override_settings(
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]
+        ):
+            request = Request(APIRequestFactory().get("/api/recipes/"))
+            request.user = user
+            context = {"request": request}
+            self.stdout.write(
+                "рецептов  RecipeSerializer, мс  "
+                "RecipeReadSerializer, мс  ускорение  рецептов/с"
+            )
+            for size in options["sizes"]:
+                self._compare(user, context, size, options["repeat"])
+
+    def _compare(self, user, context, size, repeat):
+        queryset = Recipe.objects.with_user_flags(user)
+
+        def reference():
+            recipes = list(queryset.with_related()[:size])
+            return JSONRenderer().render(
+                RecipeSerializer(recipes, many=True, context=context).data
+            )
+
+        def fast():
+            rows = RecipeReadSerializer.rows(queryset)[:size]
+            return JSONRenderer().render(
+                RecipeReadSerializer(rows, many=True, context=context).data
+            )
+
+        def single():
+            recipe = queryset.select_related("author").get(
+                pk=queryset.values_list("pk", flat=True)[0]
+            )
+            return JSONRenderer().render(
+                RecipeReadSerializer(recipe, context=context).data
+            )
+
+        expected = reference()
+        if fast() != expected:
+            raise CommandError(f"{size} рецептов: JSON списка отличается.")
+        if single() != JSONRenderer().render(
+            RecipeSerializer(queryset.with_related()[0], context=context).data
+        ):
+            raise CommandError("JSON одного рецепта отличается.")
+        reference_time = self._best(reference, repeat)
+        fast_time = self._best(fast, repeat)
+        self.stdout.write(
+            f"{size:>8}  {reference_time:>19.1f}  {fast_time:>23.1f}  "
+            f"{reference_time / fast_time:>8.1f}x  "
+            f"{size / fast_time * 1000:>10.0f}"
+        )
+
+    def _best(self, function, repeat):
+        """Лучшее время (мс) из repeat запусков."""
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            function()
+            timings.append((time.perf_counter() - started) * 1000)
+        return min(timings)
@@ -0,0 +1,122 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, Q
+from django.http import QueryDict
+
+from api.filters import TAGS_MODE_ALL, RecipeFilter
+from common.constants import DEFAULT_PAGE_SIZE
+from recipes.cache import get_tag_ids_by_slug
+from recipes.models import Recipe, Tag
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает прежний фильтр рецептов по тегам (JOIN по tags__slug, "
+        "DISTINCT и запрос вариантов значений) с TagSlugFilter на EXISTS: "
+        "совпадение результата, время страницы списка и планы запросов."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=5,
+            help="Сколько раз повторять замер (берётся лучший).",
+        )
+        parser.add_argument(
+            "--explain",
+            action="store_true",
+            help="Вывести планы запросов страницы.",
+        )
+
+    def handle(self, *args, **options):
+        slugs = list(
+            Tag.objects.annotate(total=Count("recipes"))
+            .order_by("-total", "slug")
+            .values_list("slug", flat=True)[:3]
+        )
+        if len(slugs) < 3 or not Recipe.objects.exists():
+            raise CommandError("Нет данных: запустите seed_benchmark.")
+        # Словарь тегов в проде закэширован, в замер он не входит.
+        get_tag_ids_by_slug()
+        self.stdout.write(
+            f"рецептов: {Recipe.objects.count()}, теги: {', '.join(slugs)}"
+        )
+        self.stdout.write(
+            "сценарий          найдено  строк JOIN  прежний, мс  EXISTS, мс"
+        )
+        for label, tags, mode in (
+            ("1 тег", slugs[:1], None),
+            ("2 тега, любой", slugs[:2], None),
+            ("3 тега, любой", slugs, None),
+            ("2 тега, все", slugs[:2], TAGS_MODE_ALL),
+        ):
+            self._compare(label, tags, mode, options)
+
+    def _legacy(self, tags, mode):
+        """Запрос прежнего AllValuesMultipleFilter(field_name="tags__slug")
+        (для mode=all — с conjoined=True) без DISTINCT."""
+        queryset = Recipe.objects.all()
+        if mode == TAGS_MODE_ALL:
+            for slug in tags:
+                queryset = queryset.filter(tags__slug=slug)
+            return queryset
+        condition = Q()
+        for slug in tags:
+            condition |= Q(tags__slug=slug)
+        return queryset.filter(condition)
+
+    def _current(self, tags, mode):
+        data = QueryDict(mutable=True)
+        data.setlist("tags", tags)
+        if mode:
+            data["tags_mode"] = mode
+        return RecipeFilter(data, queryset=Recipe.objects.all()).qs
+
+    def _compare(self, label, tags, mode, options):
+        def legacy():
+            # Варианты значений для поля формы фильтра.
+            list(
+                Recipe.objects.distinct()
+                .order_by("tags__slug")
+                .values_list("tags__slug", flat=True)
+            )
+            queryset = self._legacy(tags, mode).distinct()
+            return queryset.count(), list(
+                queryset.values_list("pk", flat=True)[:DEFAULT_PAGE_SIZE]
+            )
+
+        def current():
+            queryset = self._current(tags, mode)
+            return queryset.count(), list(
+                queryset.values_list("pk", flat=True)[:DEFAULT_PAGE_SIZE]
+            )
+
+        expected = legacy()
+        if current() != expected:
+            raise CommandError(f"{label}: результаты фильтров отличаются.")
+        joined_rows = self._legacy(tags, mode).count()
+        self.stdout.write(
+            f"{label:<16} {expected[0]:>8}  {joined_rows:>10}  "
+            f"{self._best(legacy, options['repeat']):>11.1f}  "
+            f"{self._best(current, options['repeat']):>10.1f}"
+        )
+        if options["explain"]:
+            page = slice(0, DEFAULT_PAGE_SIZE)
+            for name, queryset in (
+                ("прежний", self._legacy(tags, mode).distinct()),
+                ("EXISTS", self._current(tags, mode)),
+            ):
+                self.stdout.write(f"  план ({name}):")
+                for line in queryset[page].explain().splitlines():
+                    self.stdout.write(f"    {line}")
+
+    def _best(self, function, repeat):
+        """Лучшее время (мс) из repeat запусков."""
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            function()
+            timings.append((time.perf_counter() - started) * 1000)
+        return min(timings)
@@ -0,0 +1,196 @@
+import random
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from common.constants import DEFAULT_PAGE_SIZE, TRENDING_WINDOW_DAYS
+from recipes.management.commands.seed_benchmark import (
+    RECIPE_POPULARITY_EXPONENT,
+    USER_ACTIVITY_EXPONENT,
+    ZipfSampler,
+    sample_pairs,
+)
+from recipes.models import Favorite, Recipe, ShoppingCart
+from recipes.trending import refresh_trending_scores
+
+User = get_user_model()
+
+BATCH_SIZE = 1000
+
+# Доля событий корзины среди всех событий.
+CART_SHARE = 0.2
+
+
+@contextmanager
+def explicit_created_at(*models):
+    """Отключает auto_now_add у created_at, чтобы задать время событий."""
+    fields = [model._meta.get_field("created_at") for model in models]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+class Command(BaseCommand):
+    help = (
+        "Замеряет пересчёт рейтинга популярных рецептов "
+        "(refresh_trending_recipes) и чтение страниц готового рейтинга "
+        "на синтетических событиях избранного и корзины. Данные "
+        "создаются в транзакции, которая затем откатывается."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--events",
+            type=int,
+            nargs="+",
+            default=[10000, 100000, 300000],
+            help="Числа событий, для которых выполнять замер.",
+        )
+        parser.add_argument(
+            "--users", type=int, default=5000, help="Число пользователей."
+        )
+        parser.add_argument(
+            "--recipes", type=int, default=20000, help="Число рецептов."
+        )
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=TRENDING_WINDOW_DAYS + 6,
+            help="За сколько дней распределены события.",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=3,
+            help="Сколько раз повторять замер (берётся лучший).",
+        )
+        parser.add_argument(
+            "--seed", type=int, default=42, help="Зерно генератора."
+        )
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        self.stdout.write(
+            "событий  в окне  в рейтинге  пересчёт, мс  "
+            "стр. 1, мс  стр. 100, мс"
+        )
+        with transaction.atomic():
+            try:
+                user_ids, recipe_ids = self._create_population(options)
+                users = ZipfSampler(rng, user_ids, USER_ACTIVITY_EXPONENT)
+                recipes = ZipfSampler(
+                    rng, recipe_ids, RECIPE_POPULARITY_EXPONENT
+                )
+                for events in options["events"]:
+                    with transaction.atomic():
+                        self._create_events(
+                            rng, users, recipes, events, options
+                        )
+                        self._measure(events, options)
+                        transaction.set_rollback(True)
+            finally:
+                transaction.set_rollback(True)
+
+    def _create_population(self, options):
+        prefix = f"trending-bench-{time.monotonic_ns()}"
+        users = User.objects.bulk_create(
+            (
+                User(
+                    username=f"{prefix}-{number}",
+                    email=f"{prefix}-{number}@example.com",
+                )
+                for number in range(options["users"])
+            ),
+            batch_size=BATCH_SIZE,
+        )
+        recipes = Recipe.objects.bulk_create(
+            (
+                Recipe(
+                    author=users[number % len(users)],
+                    name=f"{prefix}-{number}",
+                    text="",
+                    cooking_time=1,
+                    image="recipes/benchmark.png",
+                )
+                for number in range(options["recipes"])
+            ),
+            batch_size=BATCH_SIZE,
+        )
+        return [user.pk for user in users], [recipe.pk for recipe in recipes]
+
+    def _create_events(self, rng, users, recipes, count, options):
+        """Избранное и корзины с популярностью по Ципфу и временем,
+        равномерно распределённым за последние --days дней."""
+        now = timezone.now()
+        span = options["days"] * 24 * 3600
+        carts = int(count * CART_SHARE)
+        with explicit_created_at(Favorite, ShoppingCart):
+            for model, size in (
+                (Favorite, count - carts),
+                (ShoppingCart, carts),
+            ):
+                model.objects.bulk_create(
+                    (
+                        model(
+                            user_id=user_id,
+                            recipe_id=recipe_id,
+                            created_at=now
+                            - timedelta(seconds=rng.uniform(0, span)),
+                        )
+                        for user_id, recipe_id in sample_pairs(
+                            users, recipes, size
+                        )
+                    ),
+                    batch_size=BATCH_SIZE,
+                )
+
+    def _measure(self, events, options):
+        since = timezone.now() - timedelta(days=TRENDING_WINDOW_DAYS)
+        in_window = sum(
+            model.objects.filter(created_at__gte=since).count()
+            for model in (Favorite, ShoppingCart)
+        )
+        ranked = 0
+
+        def refresh():
+            nonlocal ranked
+            ranked = refresh_trending_scores()
+
+        refresh_time = self._best(refresh, options["repeat"])
+        first_page = self._best(lambda: self._read_page(1), options["repeat"])
+        deep_page = self._best(lambda: self._read_page(100), options["repeat"])
+        self.stdout.write(
+            f"{events:>7}  {in_window:>6}  {ranked:>10}  "
+            f"{refresh_time:>12.1f}  {first_page:>10.1f}  "
+            f"{deep_page:>12.1f}"
+        )
+
+    def _read_page(self, number):
+        """Страница рейтинга тем же условием по rank, что и эндпоинт."""
+        start = (number - 1) * DEFAULT_PAGE_SIZE
+        return list(
+            Recipe.objects.filter(
+                trending_score__rank__gt=start,
+                trending_score__rank__lte=start + DEFAULT_PAGE_SIZE,
+            )
+            .order_by("trending_score__rank")
+            .values_list("pk", flat=True)
+        )
+
+    def _best(self, function, repeat):
+        """Лучшее время (мс) из repeat запусков."""
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            function()
+            timings.append((time.perf_counter() - started) * 1000)
+        return min(timings)
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from common.constants import AVATAR_IMAGE_VARIANTS, RECIPE_IMAGE_VARIANTS
+from common.images import build_image_variants, variants_are_stale
+from recipes.models import Recipe
+from users.models import User
+
+TARGETS = (
+    (Recipe, "image", "image_variants", RECIPE_IMAGE_VARIANTS),
+    (User, "avatar", "avatar_variants", AVATAR_IMAGE_VARIANTS),
+)
+
+
+class Command(BaseCommand):
+    help = "Строит недостающие превью фото рецептов и аватаров."
+
+    def handle(self, *args, **options):
+        for model, image_field, variants_field, sizes in TARGETS:
+            built = 0
+            for instance in model.objects.only(
+                "pk", image_field, variants_field
+            ).iterator():
+                if not variants_are_stale(
+                    instance, image_field, variants_field
+                ):
+                    continue
+                build_image_variants(
+                    model._meta.label,
+                    instance.pk,
+                    image_field,
+                    variants_field,
+                    sizes,
+                    getattr(instance, image_field).name or "",
+                )
+                built += 1
+            self.stdout.write(
+                f"{model._meta.verbose_name_plural}: обработано {built}."
+            )
@@ -0,0 +1,220 @@
+import csv
+import json
+from collections import defaultdict
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, transaction
+
+from recipes.autocomplete import ingredient_autocomplete
+from recipes.cache import bump_recipes_generation, invalidate_tag_map
+from recipes.models import Ingredient, Tag
+
+BATCH_SIZE = 1000
+
+CATALOGS = {
+    "ingredients": {
+        "model": Ingredient,
+        "fields": ("name", "measurement_unit"),
+        "unique_fields": ("name", "measurement_unit"),
+        # Поля, которые модель вычисляет сама (bulk_create не вызывает save).
+        # Все поля из файла входят в ключ, поэтому изменённой запись может
+        # быть только из-за них — после правки таблицы единиц.
+        "prepare": Ingredient.set_base_unit,
+        "derived_fields": ("base_unit", "unit_factor"),
+        # save() при смене множителя пересчитывает количества в рецептах
+        # и итоги корзин.
+        "save_changed": True,
+    },
+    "tags": {
+        "model": Tag,
+        "fields": ("name", "slug"),
+        "unique_fields": ("slug",),
+        # Уникальные поля вне ключа upsert'а: конфликт по ним нельзя
+        # разрешить обновлением, он проверяется до записи.
+        "other_unique_fields": ("name",),
+    },
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Загружает справочник ингредиентов или тегов из CSV/JSON "
+        "пакетными upsert'ами."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Путь к файлу .csv или .json.")
+        parser.add_argument(
+            "--catalog",
+            choices=CATALOGS,
+            default="ingredients",
+            help="Какой справочник загружать.",
+        )
+        parser.add_argument(
+            "--format",
+            choices=("csv", "json"),
+            help="Формат файла; по умолчанию по расширению.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=BATCH_SIZE,
+            help="Размер пакета для INSERT ... ON CONFLICT.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Показать, что изменится, ничего не записывая.",
+        )
+
+    def handle(self, *args, **options):
+        catalog = CATALOGS[options["catalog"]]
+        path = Path(options["path"])
+        if not path.is_file():
+            raise CommandError(f"Файл не найден: {path}")
+        file_format = options["format"] or path.suffix.lstrip(".").lower()
+        if file_format not in ("csv", "json"):
+            raise CommandError(
+                "Не удалось определить формат файла, укажите --format."
+            )
+
+        rows = self._dedupe(
+            self._read(path, file_format, catalog["fields"]),
+            catalog["unique_fields"],
+        )
+        model = catalog["model"]
+        fields = catalog["fields"]
+        unique_fields = catalog["unique_fields"]
+
+        other_fields = tuple(
+            field for field in fields if field not in unique_fields
+        )
+        compared_fields = (*other_fields, *catalog.get("derived_fields", ()))
+        existing = {
+            tuple(item[field] for field in unique_fields): item
+            for item in model.objects.values(
+                "pk", *unique_fields, *compared_fields
+            )
+        }
+        # changed: pk записи в базе → объект с новыми значениями.
+        new, changed = [], {}
+        for key, row in rows.items():
+            obj = model(**row)
+            if "prepare" in catalog:
+                catalog["prepare"](obj)
+            if key not in existing:
+                new.append(obj)
+            elif any(
+                existing[key][field] != getattr(obj, field)
+                for field in compared_fields
+            ):
+                changed[existing[key]["pk"]] = obj
+        missing = len(existing.keys() - rows.keys())
+        conflicts = self._find_conflicts(catalog, rows, existing)
+        self.stdout.write(
+            f"В файле: {len(rows)}; новых: {len(new)}; "
+            f"изменённых: {len(changed)}; "
+            f"без изменений: {len(rows) - len(new) - len(changed)}; "
+            f"есть только в базе: {missing}; "
+            f"конфликтов: {len(conflicts)}."
+        )
+        for field, value, keys in conflicts:
+            self.stdout.write(
+                self.style.ERROR(
+                    f"! {field}={value!r} у нескольких записей: "
+                    + ", ".join("/".join(key) for key in keys)
+                )
+            )
+        if options["verbosity"] > 1:
+            for label, objs in (("+", new), ("~", changed.values())):
+                for obj in objs:
+                    values = {field: getattr(obj, field) for field in fields}
+                    self.stdout.write(f"{label} {values}")
+        if options["dry_run"]:
+            return
+        if conflicts:
+            raise CommandError(
+                "Файл нарушает уникальность полей, ничего не записано."
+            )
+
+        if not new and not changed:
+            self.stdout.write(self.style.SUCCESS("Изменений нет."))
+            return
+        try:
+            with transaction.atomic():
+                if catalog.get("save_changed"):
+                    upserted = new
+                    self._save_changed(model, fields, changed)
+                else:
+                    upserted = new + list(changed.values())
+                model.objects.bulk_create(
+                    upserted,
+                    batch_size=options["batch_size"],
+                    update_conflicts=True,
+                    unique_fields=unique_fields,
+                    update_fields=[*compared_fields, "updated_at"],
+                )
+                # bulk_create не отправляет сигналы моделей.
+                transaction.on_commit(bump_recipes_generation)
+                transaction.on_commit(invalidate_tag_map)
+                transaction.on_commit(ingredient_autocomplete.invalidate)
+        except IntegrityError as error:
+            # Например, теги меняются названиями между собой: уникальность
+            # проверяется построчно.
+            raise CommandError(f"Загрузка отменена: {error}")
+        self.stdout.write(self.style.SUCCESS("Загрузка завершена."))
+
+    def _read(self, path, file_format, fields):
+        with path.open(encoding="utf-8", newline="") as file:
+            if file_format == "csv":
+                for line_number, values in enumerate(csv.reader(file), 1):
+                    if not values:
+                        continue
+                    if len(values) != len(fields):
+                        raise CommandError(
+                            f"{path}:{line_number}: ожидалось "
+                            f"{len(fields)} значения, получено {values}"
+                        )
+                    yield dict(zip(fields, values))
+                return
+            for item in json.load(file):
+                # Поддерживается и формат фикстур Django (model/pk/fields).
+                item = item.get("fields", item)
+                yield {field: item[field] for field in fields}
+
+    def _save_changed(self, model, fields, changed):
+        """Обновляет записи через save() загруженных из базы объектов,
+        чтобы модель видела прежние значения."""
+        for instance in model.objects.filter(pk__in=changed):
+            for field in fields:
+                setattr(instance, field, getattr(changed[instance.pk], field))
+            instance.save()
+
+    def _find_conflicts(self, catalog, rows, existing):
+        """
+        Значения уникальных полей вне ключа, которые после загрузки
+        достались бы нескольким записям: (поле, значение, ключи).
+        """
+        conflicts = []
+        for field in catalog.get("other_unique_fields", ()):
+            owners = defaultdict(set)
+            for key, item in existing.items():
+                if key not in rows:
+                    owners[item[field]].add(key)
+            for key, row in rows.items():
+                owners[row[field]].add(key)
+            conflicts.extend(
+                (field, value, sorted(keys))
+                for value, keys in owners.items()
+                if len(keys) > 1
+            )
+        return conflicts
+
+    def _dedupe(self, rows, unique_fields):
+        """Нормализует значения и оставляет последнюю запись по ключу."""
+        deduped = {}
+        for row in rows:
+            row = {field: str(value).strip() for field, value in row.items()}
+            deduped[tuple(row[field] for field in unique_fields)] = row
+        return deduped
@@ -0,0 +1,58 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes.models import ShoppingCartItemTotal
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересчитывает итоги списков покупок по корзинам и составу "
+        "рецептов или, с --verify, только сверяет их."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--verify",
+            action="store_true",
+            help="Только сравнить таблицу с живой агрегацией.",
+        )
+
+    def handle(self, *args, **options):
+        if options["verify"]:
+            self._verify(
+                {
+                    (user_id, ingredient_id): total_amount
+                    for user_id, ingredient_id, total_amount in (
+                        ShoppingCartItemTotal.objects.live_totals()
+                    )
+                }
+            )
+            return
+
+        count = ShoppingCartItemTotal.objects.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Пересчитано итогов: {count}."))
+
+    def _verify(self, live):
+        stored = {
+            (user_id, ingredient_id): total_amount
+            for user_id, ingredient_id, total_amount in (
+                ShoppingCartItemTotal.objects.values_list(
+                    "user_id", "ingredient_id", "total_amount"
+                )
+            )
+        }
+        mismatches = [
+            (key, stored.get(key), live.get(key))
+            for key in sorted(stored.keys() | live.keys())
+            if stored.get(key) != live.get(key)
+        ]
+        for (user_id, ingredient_id), stored_amount, live_amount in mismatches:
+            self.stdout.write(
+                f"user={user_id} ingredient={ingredient_id}: "
+                f"в таблице {stored_amount}, по корзинам {live_amount}"
+            )
+        if mismatches:
+            raise CommandError(
+                f"Расхождений: {len(mismatches)}. "
+                "Запустите команду без --verify."
+            )
+        self.stdout.write(self.style.SUCCESS("Итоги совпадают."))
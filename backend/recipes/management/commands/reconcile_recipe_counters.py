@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import F, Q
+
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = (
+        "Сверяет счётчики избранного и корзин рецептов с таблицами связей "
+        "и исправляет расхождения (или, с --verify, только сообщает о них)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--verify",
+            action="store_true",
+            help="Только найти расхождения, ничего не записывая.",
+        )
+
+    def handle(self, *args, **options):
+        drifted = (
+            Recipe.objects.with_live_counters()
+            .filter(
+                ~Q(favorites_count=F("live_favorites_count"))
+                | ~Q(in_carts_count=F("live_in_carts_count"))
+            )
+            .order_by("pk")
+        )
+        recipe_ids = []
+        for recipe in drifted.values(
+            "pk",
+            "favorites_count",
+            "live_favorites_count",
+            "in_carts_count",
+            "live_in_carts_count",
+        ):
+            recipe_ids.append(recipe["pk"])
+            self.stdout.write(
+                "recipe={pk}: избранное {favorites_count} → "
+                "{live_favorites_count}, корзины {in_carts_count} → "
+                "{live_in_carts_count}".format(**recipe)
+            )
+        if options["verify"]:
+            if recipe_ids:
+                raise CommandError(
+                    f"Расхождений: {len(recipe_ids)}. "
+                    "Запустите команду без --verify."
+                )
+            self.stdout.write(self.style.SUCCESS("Счётчики совпадают."))
+            return
+
+        # Пересчёт одним UPDATE, чтобы не затереть параллельные изменения.
+        updated = Recipe.objects.filter(pk__in=recipe_ids).reset_counters()
+        self.stdout.write(
+            self.style.SUCCESS(f"Исправлено рецептов: {updated}.")
+        )
@@ -0,0 +1,52 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from common.constants import (
+    TRENDING_HALF_LIFE_HOURS,
+    TRENDING_MAX_RECIPES,
+    TRENDING_WINDOW_DAYS,
+)
+from recipes.trending import refresh_trending_scores
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересчитывает рейтинг популярных рецептов по недавним "
+        "добавлениям в избранное и корзину. Запускается периодически "
+        "(cron), эндпоинт /api/recipes/trending/ читает готовый рейтинг."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--half-life-hours",
+            type=float,
+            default=TRENDING_HALF_LIFE_HOURS,
+            help="Через сколько часов вес события уменьшается вдвое.",
+        )
+        parser.add_argument(
+            "--window-days",
+            type=int,
+            default=TRENDING_WINDOW_DAYS,
+            help="За сколько последних дней учитываются события.",
+        )
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=TRENDING_MAX_RECIPES,
+            help="Сколько рецептов хранить в рейтинге.",
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        count = refresh_trending_scores(
+            half_life_hours=options["half_life_hours"],
+            window_days=options["window_days"],
+            limit=options["limit"],
+        )
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Рецептов в рейтинге: {count}; время: {elapsed:.2f} с."
+            )
+        )
@@ -0,0 +1,372 @@
+import random
+from io import BytesIO
+from itertools import accumulate
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from PIL import Image
+
+from common.constants import MAX_COOKING_TIME, MIN_COOKING_TIME
+from recipes.autocomplete import ingredient_autocomplete
+from recipes.cache import (
+    bump_recipes_generation,
+    invalidate_author_latest_recipes,
+    invalidate_tag_map,
+)
+from recipes.ingredient_index import recipe_ingredient_index
+from recipes.models import (
+    Favorite,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    ShoppingCart,
+    ShoppingCartItemTotal,
+    Tag,
+)
+from recipes.trending import refresh_trending_scores
+from users.models import Subscription
+
+User = get_user_model()
+
+BATCH_SIZE = 1000
+
+# Все синтетические данные помечены префиксом, чтобы их можно было
+# найти (benchmark_api) и удалить (--clear).
+BENCHMARK_PREFIX = "bench-"
+
+MIN_RECIPE_INGREDIENTS = 5
+MAX_RECIPE_INGREDIENTS = 15
+MAX_RECIPE_TAGS = 3
+SYNTHETIC_INGREDIENTS = 500
+SYNTHETIC_TAGS = 8
+SYNTHETIC_UNITS = ("г", "г", "г", "мл", "шт", "кг", "л")
+
+# Одно фото-заглушка в MEDIA_ROOT на все синтетические рецепты.
+PLACEHOLDER_IMAGE_NAME = "recipes/benchmark.png"
+PLACEHOLDER_IMAGE_SIZE = (720, 480)
+PLACEHOLDER_IMAGE_COLOR = (222, 184, 135)
+
+# Показатели степенных распределений: популярность рецептов (избранное
+# и корзины), подписчики авторов, число рецептов у автора, частота
+# ингредиентов и активность пользователей.
+RECIPE_POPULARITY_EXPONENT = 1.1
+AUTHOR_FOLLOWERS_EXPONENT = 1.2
+AUTHOR_RECIPES_EXPONENT = 1.0
+INGREDIENT_FREQUENCY_EXPONENT = 0.9
+USER_ACTIVITY_EXPONENT = 0.8
+
+# Сколько раз добирать уникальные пары при выборке с повторами.
+MAX_SAMPLING_ROUNDS = 50
+
+
+def zipf_cum_weights(size, exponent):
+    """Накопленные веса распределения Ципфа для рангов 1..size."""
+    return list(accumulate(1 / rank**exponent for rank in range(1, size + 1)))
+
+
+class ZipfSampler:
+    """Выборка с весами Ципфа по случайно перемешанной популяции:
+    «популярные» объекты не совпадают с первыми id."""
+
+    def __init__(self, rng, population, exponent):
+        self.rng = rng
+        self.population = list(population)
+        rng.shuffle(self.population)
+        self.cum_weights = zipf_cum_weights(len(self.population), exponent)
+
+    def sample(self, count):
+        return self.rng.choices(
+            self.population, cum_weights=self.cum_weights, k=count
+        )
+
+    def distinct(self, count):
+        """count разных объектов (популярные выпадают чаще)."""
+        count = min(count, len(self.population))
+        chosen = {}
+        while len(chosen) < count:
+            chosen.update(dict.fromkeys(self.sample(count - len(chosen))))
+        return list(chosen)
+
+
+def sample_pairs(left, right, count, exclude_equal=False):
+    """До count уникальных пар (left, right) из двух выборок."""
+    pairs = set()
+    for _ in range(MAX_SAMPLING_ROUNDS):
+        missing = count - len(pairs)
+        if missing <= 0:
+            break
+        pairs.update(
+            (a, b)
+            for a, b in zip(left.sample(missing), right.sample(missing))
+            if not (exclude_equal and a == b)
+        )
+    return sorted(pairs)[:count]
+
+
+class Command(BaseCommand):
+    help = (
+        "Заполняет базу воспроизводимым синтетическим набором данных для "
+        "benchmark_api: пользователи, рецепты, избранное, корзины и "
+        "подписки со степенными распределениями популярности."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--users", type=int, default=1000, help="Число пользователей."
+        )
+        parser.add_argument(
+            "--recipes", type=int, default=10000, help="Число рецептов."
+        )
+        parser.add_argument(
+            "--favorites",
+            type=int,
+            default=50000,
+            help="Число записей избранного.",
+        )
+        parser.add_argument(
+            "--carts",
+            type=int,
+            help="Число рецептов в корзинах; по умолчанию --favorites / 5.",
+        )
+        parser.add_argument(
+            "--subscriptions",
+            type=int,
+            help="Число подписок; по умолчанию 10 на пользователя.",
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=42,
+            help="Зерно генератора: одинаковое зерно — одинаковые данные.",
+        )
+        parser.add_argument(
+            "--clear",
+            action="store_true",
+            help="Сначала удалить данные предыдущего запуска.",
+        )
+
+    def handle(self, *args, **options):
+        if options["users"] < 2 or options["recipes"] < 1:
+            raise CommandError("Нужно хотя бы 2 пользователя и 1 рецепт.")
+        benchmark_users = User.objects.filter(
+            username__startswith=BENCHMARK_PREFIX
+        )
+        if options["clear"]:
+            deleted, _ = benchmark_users.delete()
+            self.stdout.write(f"Удалено объектов: {deleted}.")
+        elif benchmark_users.exists():
+            raise CommandError(
+                "В базе уже есть данные бенчмарка, добавьте --clear."
+            )
+
+        rng = random.Random(options["seed"])
+        with transaction.atomic():
+            counts, author_ids = self._seed(rng, options)
+            # bulk_create не отправляет сигналы моделей.
+            transaction.on_commit(bump_recipes_generation)
+            transaction.on_commit(invalidate_tag_map)
+            transaction.on_commit(ingredient_autocomplete.invalidate)
+            transaction.on_commit(recipe_ingredient_index.invalidate)
+            transaction.on_commit(
+                lambda: invalidate_author_latest_recipes(*author_ids)
+            )
+        refresh_trending_scores()
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Создано: "
+                + ", ".join(f"{name} {count}" for name, count in counts)
+                + "."
+            )
+        )
+
+    def _seed(self, rng, options):
+        password = make_password(None)
+        users = User.objects.bulk_create(
+            (
+                User(
+                    username=f"{BENCHMARK_PREFIX}{number}",
+                    email=f"{BENCHMARK_PREFIX}{number}@example.com",
+                    first_name=f"Имя{number}",
+                    last_name=f"Фамилия{number}",
+                    password=password,
+                )
+                for number in range(options["users"])
+            ),
+            batch_size=BATCH_SIZE,
+        )
+        user_ids = [user.pk for user in users]
+        ingredient_ids = self._ensure_ingredients()
+        tag_ids = self._ensure_tags()
+        image = self._ensure_image()
+
+        # Число рецептов у автора и число подписчиков — степенные.
+        authors = ZipfSampler(rng, user_ids, AUTHOR_RECIPES_EXPONENT)
+        recipe_authors = authors.sample(options["recipes"])
+        recipes = Recipe.objects.bulk_create(
+            (
+                Recipe(
+                    author_id=author_id,
+                    name=f"Рецепт {number}",
+                    text=" ".join(
+                        ["Описание шага приготовления."] * rng.randint(3, 30)
+                    ),
+                    cooking_time=rng.randint(
+                        MIN_COOKING_TIME, min(MAX_COOKING_TIME, 180)
+                    ),
+                    image=image,
+                )
+                for number, author_id in enumerate(recipe_authors)
+            ),
+            batch_size=BATCH_SIZE,
+        )
+        recipe_ids = [recipe.pk for recipe in recipes]
+
+        ingredients = ZipfSampler(
+            rng, ingredient_ids, INGREDIENT_FREQUENCY_EXPONENT
+        )
+        recipe_ingredients = [
+            RecipeIngredient(
+                recipe_id=recipe_id,
+                ingredient_id=ingredient_id,
+                amount=rng.randint(1, 500),
+            )
+            for recipe_id in recipe_ids
+            for ingredient_id in ingredients.distinct(
+                rng.randint(MIN_RECIPE_INGREDIENTS, MAX_RECIPE_INGREDIENTS)
+            )
+        ]
+        RecipeIngredient.objects.bulk_create(
+            recipe_ingredients, batch_size=BATCH_SIZE
+        )
+        recipe_tags = [
+            Recipe.tags.through(recipe_id=recipe_id, tag_id=tag_id)
+            for recipe_id in recipe_ids
+            for tag_id in rng.sample(
+                tag_ids, rng.randint(1, min(MAX_RECIPE_TAGS, len(tag_ids)))
+            )
+        ]
+        Recipe.tags.through.objects.bulk_create(
+            recipe_tags, batch_size=BATCH_SIZE
+        )
+
+        active_users = ZipfSampler(rng, user_ids, USER_ACTIVITY_EXPONENT)
+        popular_recipes = ZipfSampler(
+            rng, recipe_ids, RECIPE_POPULARITY_EXPONENT
+        )
+        favorites = sample_pairs(
+            active_users, popular_recipes, options["favorites"]
+        )
+        Favorite.objects.bulk_create(
+            (
+                Favorite(user_id=user_id, recipe_id=recipe_id)
+                for user_id, recipe_id in favorites
+            ),
+            batch_size=BATCH_SIZE,
+        )
+        carts = sample_pairs(
+            active_users,
+            popular_recipes,
+            (
+                options["carts"]
+                if options["carts"] is not None
+                else options["favorites"] // 5
+            ),
+        )
+        ShoppingCart.objects.bulk_create(
+            (
+                ShoppingCart(user_id=user_id, recipe_id=recipe_id)
+                for user_id, recipe_id in carts
+            ),
+            batch_size=BATCH_SIZE,
+        )
+        followers = ZipfSampler(rng, user_ids, USER_ACTIVITY_EXPONENT)
+        popular_authors = ZipfSampler(rng, user_ids, AUTHOR_FOLLOWERS_EXPONENT)
+        subscriptions = sample_pairs(
+            followers,
+            popular_authors,
+            (
+                options["subscriptions"]
+                if options["subscriptions"] is not None
+                else len(user_ids) * 10
+            ),
+            exclude_equal=True,
+        )
+        Subscription.objects.bulk_create(
+            (
+                Subscription(user_id=user_id, author_id=author_id)
+                for user_id, author_id in subscriptions
+            ),
+            batch_size=BATCH_SIZE,
+        )
+
+        benchmark_recipes = Recipe.objects.filter(
+            author__username__startswith=BENCHMARK_PREFIX
+        )
+        benchmark_recipes.reset_counters()
+        benchmark_recipes.update_search_vector()
+        ShoppingCartItemTotal.objects.rebuild()
+        counts = (
+            ("пользователей", len(user_ids)),
+            ("рецептов", len(recipe_ids)),
+            ("ингредиентов в рецептах", len(recipe_ingredients)),
+            ("тегов у рецептов", len(recipe_tags)),
+            ("в избранном", len(favorites)),
+            ("в корзинах", len(carts)),
+            ("подписок", len(subscriptions)),
+        )
+        return counts, set(recipe_authors)
+
+    def _ensure_ingredients(self):
+        """Ингредиенты справочника; если их мало — синтетические."""
+        ingredient_ids = list(
+            Ingredient.objects.order_by("pk").values_list("pk", flat=True)
+        )
+        if len(ingredient_ids) >= MAX_RECIPE_INGREDIENTS:
+            return ingredient_ids
+        ingredients = [
+            Ingredient(
+                name=f"{BENCHMARK_PREFIX}ингредиент {number}",
+                measurement_unit=SYNTHETIC_UNITS[
+                    number % len(SYNTHETIC_UNITS)
+                ],
+            )
+            for number in range(SYNTHETIC_INGREDIENTS)
+        ]
+        for ingredient in ingredients:
+            ingredient.set_base_unit()
+        Ingredient.objects.bulk_create(
+            ingredients, batch_size=BATCH_SIZE, ignore_conflicts=True
+        )
+        return list(
+            Ingredient.objects.order_by("pk").values_list("pk", flat=True)
+        )
+
+    def _ensure_image(self):
+        """Путь к фото-заглушке; файл создаётся, если его нет."""
+        if default_storage.exists(PLACEHOLDER_IMAGE_NAME):
+            return PLACEHOLDER_IMAGE_NAME
+        buffer = BytesIO()
+        Image.new("RGB", PLACEHOLDER_IMAGE_SIZE, PLACEHOLDER_IMAGE_COLOR).save(
+            buffer, "PNG"
+        )
+        return default_storage.save(
+            PLACEHOLDER_IMAGE_NAME, ContentFile(buffer.getvalue())
+        )
+
+    def _ensure_tags(self):
+        """Теги справочника; если их нет — синтетические."""
+        tag_ids = list(Tag.objects.order_by("pk").values_list("pk", flat=True))
+        if tag_ids:
+            return tag_ids
+        Tag.objects.bulk_create(
+            Tag(
+                name=f"{BENCHMARK_PREFIX}тег {number}",
+                slug=f"{BENCHMARK_PREFIX}tag-{number}",
+            )
+            for number in range(SYNTHETIC_TAGS)
+        )
+        return list(Tag.objects.order_by("pk").values_list("pk", flat=True))
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:04
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='recipeingredient',
+            name='amount',
+            field=models.PositiveIntegerField(help_text='Количество ингредиента в рецепте', validators=[django.core.validators.MinValueValidator(1, message='Количество должно быть не меньше 1.'), django.core.validators.MaxValueValidator(2147483647, message='Количество не может превышать 2147483647.')], verbose_name='Количество'),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:04
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def fill_shopping_cart_totals(apps, schema_editor):
+    RecipeIngredient = apps.get_model('recipes', 'RecipeIngredient')
+    ShoppingCartItemTotal = apps.get_model('recipes', 'ShoppingCartItemTotal')
+    totals = (
+        RecipeIngredient.objects.filter(recipe__shopping_carts__isnull=False)
+        .values_list('recipe__shopping_carts__user_id', 'ingredient_id')
+        .annotate(total_amount=Sum('amount'))
+        .order_by()
+    )
+    ShoppingCartItemTotal.objects.bulk_create(
+        (
+            ShoppingCartItemTotal(
+                user_id=user_id,
+                ingredient_id=ingredient_id,
+                total_amount=total_amount,
+            )
+            for user_id, ingredient_id, total_amount in totals
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0003_alter_recipeingredient_amount'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShoppingCartItemTotal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_amount', models.PositiveBigIntegerField(help_text='Суммарное количество по всем рецептам в корзине', verbose_name='Количество')),
+                ('ingredient', models.ForeignKey(help_text='Ингредиент из рецептов в корзине', on_delete=django.db.models.deletion.CASCADE, related_name='shopping_cart_totals', to='recipes.ingredient', verbose_name='Ингредиент')),
+                ('user', models.ForeignKey(help_text='Пользователь, которому принадлежит список покупок', on_delete=django.db.models.deletion.CASCADE, related_name='shopping_cart_totals', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Итог списка покупок',
+                'verbose_name_plural': 'Итоги списков покупок',
+                'ordering': ['user', 'ingredient__name'],
+                'constraints': [models.UniqueConstraint(fields=('user', 'ingredient'), name='unique_shopping_cart_item_total')],
+            },
+        ),
+        migrations.RunPython(
+            fill_shopping_cart_totals, migrations.RunPython.noop
+        ),
+    ]
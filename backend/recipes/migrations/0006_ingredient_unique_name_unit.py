@@ -0,0 +1,67 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:11
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def merge_duplicate_ingredients(apps, schema_editor):
+    """Сливает ингредиенты с одинаковыми названием и единицей измерения."""
+    Ingredient = apps.get_model('recipes', 'Ingredient')
+    RecipeIngredient = apps.get_model('recipes', 'RecipeIngredient')
+    ShoppingCartItemTotal = apps.get_model('recipes', 'ShoppingCartItemTotal')
+    duplicates = (
+        Ingredient.objects.values('name', 'measurement_unit')
+        .annotate(keep_id=Min('id'), count=Count('id'))
+        .filter(count__gt=1)
+        .order_by()
+    )
+    for group in duplicates:
+        keep_id = group['keep_id']
+        duplicate_ids = list(
+            Ingredient.objects.filter(
+                name=group['name'],
+                measurement_unit=group['measurement_unit'],
+            )
+            .exclude(id=keep_id)
+            .values_list('id', flat=True)
+        )
+        for model, owner in (
+            (RecipeIngredient, 'recipe_id'),
+            (ShoppingCartItemTotal, 'user_id'),
+        ):
+            amount_field = (
+                'amount' if model is RecipeIngredient else 'total_amount'
+            )
+            for row in model.objects.filter(ingredient_id__in=duplicate_ids):
+                kept = model.objects.filter(
+                    **{owner: getattr(row, owner)}, ingredient_id=keep_id
+                ).first()
+                if kept is None:
+                    row.ingredient_id = keep_id
+                    row.save(update_fields=['ingredient'])
+                    continue
+                setattr(
+                    kept,
+                    amount_field,
+                    getattr(kept, amount_field) + getattr(row, amount_field),
+                )
+                kept.save(update_fields=[amount_field])
+                row.delete()
+        Ingredient.objects.filter(id__in=duplicate_ids).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0005_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            merge_duplicate_ingredients, migrations.RunPython.noop
+        ),
+        migrations.AddConstraint(
+            model_name='ingredient',
+            constraint=models.UniqueConstraint(fields=('name', 'measurement_unit'), name='unique_ingredient_name_unit'),
+        ),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:23
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0008_recipe_counters"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RecipeTrendingScore",
+            fields=[
+                (
+                    "recipe",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="trending_score",
+                        serialize=False,
+                        to="recipes.recipe",
+                        verbose_name="Рецепт",
+                    ),
+                ),
+                (
+                    "rank",
+                    models.PositiveIntegerField(
+                        unique=True, verbose_name="Место"
+                    ),
+                ),
+                (
+                    "score",
+                    models.FloatField(
+                        help_text="Сумма весов событий с экспоненциальным затуханием",
+                        verbose_name="Рейтинг",
+                    ),
+                ),
+                (
+                    "computed_at",
+                    models.DateTimeField(verbose_name="Рассчитан"),
+                ),
+            ],
+            options={
+                "verbose_name": "Рейтинг популярности",
+                "verbose_name_plural": "Рейтинг популярности",
+                "ordering": ["rank"],
+            },
+        ),
+        migrations.AddField(
+            model_name="favorite",
+            name="created_at",
+            field=models.DateTimeField(
+                auto_now_add=True,
+                db_index=True,
+                default=django.utils.timezone.now,
+                help_text="Когда рецепт добавлен в избранное",
+                verbose_name="Добавлен",
+            ),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name="shoppingcart",
+            name="created_at",
+            field=models.DateTimeField(
+                auto_now_add=True,
+                db_index=True,
+                default=django.utils.timezone.now,
+                help_text="Когда рецепт добавлен в список покупок",
+                verbose_name="Добавлен",
+            ),
+            preserve_default=False,
+        ),
+    ]
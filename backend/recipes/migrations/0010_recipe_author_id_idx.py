@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:25
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0009_trending"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="recipe",
+            index=models.Index(
+                fields=["author", "-id"], name="recipe_author_id_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:27
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+SEARCH_CONFIG = "russian"
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS recipes_recipe_search_vector "
+        "ON recipes_recipe USING gin (search_vector)"
+    )
+    schema_editor.execute(
+        "UPDATE recipes_recipe SET search_vector = "
+        "setweight(to_tsvector(%s, coalesce(name, '')), 'A') || "
+        "setweight(to_tsvector(%s, coalesce(text, '')), 'B')",
+        (SEARCH_CONFIG, SEARCH_CONFIG),
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS recipes_recipe_search_vector")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0010_recipe_author_id_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recipe",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False,
+                help_text="Лексемы названия и описания для полнотекстового поиска",
+                null=True,
+                verbose_name="Поисковый вектор",
+            ),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
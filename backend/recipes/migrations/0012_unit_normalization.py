@@ -0,0 +1,114 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:39
+
+from django.db import migrations, models
+from django.db.models import F
+
+# Копия recipes.units.UNIT_CONVERSIONS на момент миграции: дальнейшие
+# правки таблицы не должны менять результат уже применённой миграции.
+UNIT_CONVERSIONS = {
+    "г": ("г", 1),
+    "гр": ("г", 1),
+    "гр.": ("г", 1),
+    "грамм": ("г", 1),
+    "кг": ("г", 1000),
+    "килограмм": ("г", 1000),
+    "мл": ("мл", 1),
+    "миллилитр": ("мл", 1),
+    "л": ("мл", 1000),
+    "литр": ("мл", 1000),
+    "шт": ("шт.", 1),
+    "шт.": ("шт.", 1),
+    "штука": ("шт.", 1),
+}
+
+
+def normalize_unit(unit):
+    unit = unit.strip()
+    return UNIT_CONVERSIONS.get(unit.lower(), (unit, 1))
+
+
+def fill_normalized_amounts(apps, schema_editor):
+    Ingredient = apps.get_model("recipes", "Ingredient")
+    RecipeIngredient = apps.get_model("recipes", "RecipeIngredient")
+    ShoppingCartItemTotal = apps.get_model("recipes", "ShoppingCartItemTotal")
+
+    units = (
+        Ingredient.objects.order_by()
+        .values_list("measurement_unit", flat=True)
+        .distinct()
+    )
+    factors = set()
+    for unit in list(units):
+        base_unit, factor = normalize_unit(unit)
+        factors.add(factor)
+        Ingredient.objects.filter(measurement_unit=unit).update(
+            base_unit=base_unit, unit_factor=factor
+        )
+    for factor in factors:
+        RecipeIngredient.objects.filter(ingredient__unit_factor=factor).update(
+            normalized_amount=F("amount") * factor
+        )
+        if factor != 1:
+            # Итоги корзин теперь хранятся в базовых единицах.
+            ShoppingCartItemTotal.objects.filter(
+                ingredient__unit_factor=factor
+            ).update(total_amount=F("total_amount") * factor)
+
+
+def restore_cart_totals(apps, schema_editor):
+    Ingredient = apps.get_model("recipes", "Ingredient")
+    ShoppingCartItemTotal = apps.get_model("recipes", "ShoppingCartItemTotal")
+
+    factors = (
+        Ingredient.objects.exclude(unit_factor=1)
+        .order_by()
+        .values_list("unit_factor", flat=True)
+        .distinct()
+    )
+    for factor in list(factors):
+        ShoppingCartItemTotal.objects.filter(
+            ingredient__unit_factor=factor
+        ).update(total_amount=F("total_amount") / factor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0011_recipe_search_vector"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ingredient",
+            name="base_unit",
+            field=models.CharField(
+                default="",
+                editable=False,
+                help_text="Единица, в которой суммируются количества, например 'г'",
+                max_length=32,
+                verbose_name="Базовая единица",
+            ),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name="ingredient",
+            name="unit_factor",
+            field=models.PositiveIntegerField(
+                default=1,
+                editable=False,
+                help_text="Сколько базовых единиц в одной единице измерения",
+                verbose_name="Множитель",
+            ),
+        ),
+        migrations.AddField(
+            model_name="recipeingredient",
+            name="normalized_amount",
+            field=models.PositiveBigIntegerField(
+                default=0,
+                editable=False,
+                help_text="Количество в базовых единицах ингредиента",
+                verbose_name="Количество в базовых единицах",
+            ),
+        ),
+        migrations.RunPython(fill_normalized_amounts, restore_cart_totals),
+    ]
@@ -0,0 +1,30 @@
+from django.db import migrations
+
+
+def create_prefix_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    # Индекс под name__istartswith: UPPER("name"::text) LIKE UPPER('...%').
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS recipes_ingredient_name_upper_like "
+        "ON recipes_ingredient (UPPER(name) varchar_pattern_ops)"
+    )
+
+
+def drop_prefix_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        "DROP INDEX IF EXISTS recipes_ingredient_name_upper_like"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0013_shortlink"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_prefix_index, drop_prefix_index),
+    ]
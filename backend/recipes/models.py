@@ -1,6 +1,33 @@
+import re
+
 from django.contrib.auth import get_user_model
-from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+    SearchVectorField,
+)
+from django.core.validators import (
+    MaxValueValidator,
+    MinLengthValidator,
+    MinValueValidator,
+    RegexValidator,
+)
+from django.db import connection, connections, models, transaction
+from django.db.models import (
+    Case,
+    Count,
+    Exists,
+    F,
+    OuterRef,
+    Prefetch,
+    Q,
+    Subquery,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 
 from common.constants import (
     MAX_COOKING_TIME,
@@ -8,11 +35,19 @@ from common.constants import (
     MAX_INGREDIENT_NAME_LENGTH,
     MAX_MEASUREMENT_UNIT_LENGTH,
     MAX_RECIPE_NAME_LENGTH,
+    MAX_SHORT_LINK_CODE_LENGTH,
     MAX_TAG_NAME_LENGTH,
     MAX_TAG_SLUG_LENGTH,
     MIN_COOKING_TIME,
     MIN_INGREDIENT_AMOUNT,
+    MIN_SHORT_LINK_CODE_LENGTH,
+    RECIPE_SEARCH_CONFIG,
+    SHORT_LINK_ALPHABET,
 )
+from common.db import execute_returning, quote_columns
+from users.models import Subscription
+
+from .units import normalize_unit
 
 User = get_user_model()
 
@@ -30,15 +65,55 @@ class Ingredient(models.Model):
         help_text="Единица измерения ингредиента, например: 'г', 'мл'",
         verbose_name="Единица измерения",
     )
+    base_unit = models.CharField(
+        max_length=MAX_MEASUREMENT_UNIT_LENGTH,
+        editable=False,
+        help_text="Единица, в которой суммируются количества, например 'г'",
+        verbose_name="Базовая единица",
+    )
+    unit_factor = models.PositiveIntegerField(
+        default=1,
+        editable=False,
+        help_text="Сколько базовых единиц в одной единице измерения",
+        verbose_name="Множитель",
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        help_text="Время последнего изменения",
+        verbose_name="Изменён",
+    )
 
     class Meta:
         verbose_name = "Ингредиент"
         verbose_name_plural = "Ингредиенты"
         ordering = ["name"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["name", "measurement_unit"],
+                name="unique_ingredient_name_unit",
+            )
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.measurement_unit})"
 
+    def set_base_unit(self):
+        self.base_unit, self.unit_factor = normalize_unit(
+            self.measurement_unit
+        )
+
+    @transaction.atomic
+    def save(self, *args, **kwargs):
+        previous_factor = None if self._state.adding else self.unit_factor
+        self.set_base_unit()
+        super().save(*args, **kwargs)
+        if previous_factor not in (None, self.unit_factor):
+            # Сменилась единица: пересчитываем сохранённые количества.
+            self.recipe_ingredients.update(
+                normalized_amount=F("amount") * self.unit_factor
+            )
+            ShoppingCartItemTotal.objects.rebuild(ingredient=self)
+
 
 class Tag(models.Model):
     """Модель тега для поиска данных."""
@@ -55,6 +130,11 @@ class Tag(models.Model):
         help_text="slug тега",
         verbose_name="Slug тега",
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        help_text="Время последнего изменения",
+        verbose_name="Изменён",
+    )
 
     objects = models.Manager()
 
@@ -67,6 +147,137 @@ class Tag(models.Model):
         return self.name
 
 
+class RecipeQuerySet(models.QuerySet):
+    """Набор запросов рецептов для выдачи через API."""
+
+    @staticmethod
+    def prefetch_lookups():
+        """Связанные объекты, которые нужны для сериализации рецепта."""
+        return (
+            "tags",
+            Prefetch(
+                "recipe_ingredients",
+                queryset=RecipeIngredient.objects.select_related("ingredient"),
+            ),
+        )
+
+    def with_related(self):
+        """Подгружает автора, теги и ингредиенты без N+1 запросов."""
+        return self.select_related("author").prefetch_related(
+            *self.prefetch_lookups()
+        )
+
+    def with_user_flags(self, user):
+        """Аннотирует флаги избранного, корзины и подписки на автора."""
+        if not user or not user.is_authenticated:
+            return self.annotate(
+                is_favorited=Value(False),
+                is_in_shopping_cart=Value(False),
+                author_is_subscribed=Value(False),
+            )
+        return self.annotate(
+            is_favorited=Exists(
+                Favorite.objects.filter(user=user, recipe=OuterRef("pk"))
+            ),
+            is_in_shopping_cart=Exists(
+                ShoppingCart.objects.filter(user=user, recipe=OuterRef("pk"))
+            ),
+            author_is_subscribed=Exists(
+                Subscription.objects.filter(
+                    user=user, author=OuterRef("author")
+                )
+            ),
+        )
+
+    def search(self, query):
+        """
+        Полнотекстовый поиск по названию (вес A) и описанию (вес B),
+        результаты упорядочены по ts_rank.
+
+        Не на PostgreSQL (тесты на SQLite) — поиск всех слов запроса
+        через iregex (в SQLite icontains не понимает регистр кириллицы),
+        сначала совпадения в названии.
+        """
+        if connection.vendor == "postgresql":
+            search_query = SearchQuery(
+                query, config=RECIPE_SEARCH_CONFIG, search_type="websearch"
+            )
+            return (
+                self.filter(search_vector=search_query)
+                .annotate(
+                    search_rank=SearchRank(F("search_vector"), search_query)
+                )
+                .order_by("-search_rank", "-id")
+            )
+        words = [re.escape(word) for word in query.split()]
+        if not words:
+            return self
+        queryset = self
+        for word in words:
+            queryset = queryset.filter(
+                Q(name__iregex=word) | Q(text__iregex=word)
+            )
+        return queryset.annotate(
+            search_rank=Case(
+                When(name__iregex=words[0], then=Value(1.0)),
+                default=Value(0.0),
+                output_field=models.FloatField(),
+            )
+        ).order_by("-search_rank", "-id")
+
+    def update_search_vector(self):
+        """Пересчитывает search_vector (только на PostgreSQL)."""
+        if connection.vendor != "postgresql":
+            return 0
+        return self.update(
+            search_vector=SearchVector(
+                "name", weight="A", config=RECIPE_SEARCH_CONFIG
+            )
+            + SearchVector("text", weight="B", config=RECIPE_SEARCH_CONFIG)
+        )
+
+    def change_counter(self, field, delta):
+        """Атомарно меняет счётчик рецептов (favorites_count и т.п.)."""
+        return self.update(**{field: F(field) + delta})
+
+    def subtract_relations(self, relations):
+        """Вычитает из счётчиков рецептов записи избранного/корзины,
+        которые будут удалены одним запросом (relations)."""
+        field = relations.model.counter_field
+        return self.filter(pk__in=relations.values("recipe")).update(
+            **{field: F(field) - self._count_subquery(relations)}
+        )
+
+    def reset_counters(self):
+        """Пересчитывает счётчики одним UPDATE по таблицам связей."""
+        return self.update(
+            favorites_count=self._count_subquery(Favorite.objects.all()),
+            in_carts_count=self._count_subquery(ShoppingCart.objects.all()),
+        )
+
+    def with_live_counters(self):
+        """Аннотирует счётчики, посчитанные по таблицам связей."""
+        return self.annotate(
+            live_favorites_count=self._count_subquery(Favorite.objects.all()),
+            live_in_carts_count=self._count_subquery(
+                ShoppingCart.objects.all()
+            ),
+        )
+
+    @staticmethod
+    def _count_subquery(relations):
+        return Coalesce(
+            Subquery(
+                relations.filter(recipe=OuterRef("pk"))
+                .order_by()
+                .values("recipe")
+                .annotate(count=Count("pk"))
+                .values("count")
+            ),
+            0,
+        )
+
+
 class Recipe(models.Model):
     """Модель рецепта."""
 
@@ -87,6 +298,13 @@ class Recipe(models.Model):
         help_text="Фото блюда",
         verbose_name="Фото блюда",
     )
+    image_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        help_text="Пути к уменьшенным копиям фото",
+        verbose_name="Превью фото",
+    )
     text = models.TextField(
         help_text="Описание рецепта", verbose_name="Описание"
     )
@@ -114,16 +332,83 @@ class Recipe(models.Model):
     tags = models.ManyToManyField(
         Tag, related_name="recipes", help_text="Тег", verbose_name="Теги"
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        help_text="Время последнего изменения рецепта или его состава",
+        verbose_name="Изменён",
+    )
+    search_vector = SearchVectorField(
+        null=True,
+        editable=False,
+        help_text="Лексемы названия и описания для полнотекстового поиска",
+        verbose_name="Поисковый вектор",
+    )
+    favorites_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text="Сколько пользователей добавили рецепт в избранное",
+        verbose_name="В избранном",
+    )
+    in_carts_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text="Сколько пользователей добавили рецепт в список покупок",
+        verbose_name="В списках покупок",
+    )
+
+    objects = RecipeQuerySet.as_manager()
 
     class Meta:
         verbose_name = "Рецепт"
         verbose_name_plural = "Рецепты"
         ordering = ["-id"]  # сначала новые записи
+        indexes = [
+            models.Index(
+                fields=["-favorites_count", "-id"],
+                name="recipe_favorites_count_idx",
+            ),
+            # Лента подписок: последние рецепты каждого автора.
+            models.Index(
+                fields=["author", "-id"], name="recipe_author_id_idx"
+            ),
+        ]
 
     def __str__(self):
         return self.name
 
 
+class RecipeIngredientQuerySet(models.QuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        """Заполняет normalized_amount, который не считается без save()."""
+        objs = list(objs)
+        factors = dict(
+            Ingredient.objects.filter(
+                pk__in={
+                    obj.ingredient_id
+                    for obj in objs
+                    if not RecipeIngredient.ingredient.is_cached(obj)
+                }
+            ).values_list("pk", "unit_factor")
+        )
+        for obj in objs:
+            obj.normalized_amount = obj.amount * (
+                obj.ingredient.unit_factor
+                if RecipeIngredient.ingredient.is_cached(obj)
+                else factors[obj.ingredient_id]
+            )
+        return super().bulk_create(objs, *args, **kwargs)
+
+    def delete_rows(self):
+        """
+        Удаляет строки одним DELETE, без выборки и сигналов post_delete.
+
+        Для изменений состава через сохранение рецепта: кэши, индекс по
+        ингредиентам и updated_at обновляются сигналами самого рецепта,
+        а ссылок на RecipeIngredient, которые надо удалять каскадом, нет.
+        """
+        return self._raw_delete(self.db)
+
+
 class RecipeIngredient(models.Model):
     """Модель количества ингредиента в рецепте."""
 
@@ -161,6 +446,14 @@ class RecipeIngredient(models.Model):
             ),
         ],
     )
+    normalized_amount = models.PositiveBigIntegerField(
+        default=0,
+        editable=False,
+        help_text="Количество в базовых единицах ингредиента",
+        verbose_name="Количество в базовых единицах",
+    )
+
+    objects = RecipeIngredientQuerySet.as_manager()
 
     class Meta:
         verbose_name = "Ингредиент рецепта"
@@ -176,10 +469,70 @@ class RecipeIngredient(models.Model):
     def __str__(self):
         return f"{self.ingredient.name} — {self.amount} ({self.recipe.name})"
 
+    def save(self, *args, **kwargs):
+        self.normalized_amount = self.amount * self.ingredient.unit_factor
+        super().save(*args, **kwargs)
+
+
+class UserRecipeQuerySet(models.QuerySet):
+    """Идемпотентные добавление и удаление рецептов пользователя пачкой."""
+
+    def add_for_user(self, user, recipe_ids):
+        """
+        Добавляет рецепты одним INSERT ... SELECT ... ON CONFLICT DO
+        NOTHING. Возвращает id рецептов, которых у пользователя ещё не
+        было; несуществующие id пропускаются.
+        """
+        recipe_ids = list(recipe_ids)
+        if not recipe_ids:
+            return []
+        table, user_column, recipe_column, created_column = quote_columns(
+            self.model, "user", "recipe", "created_at", using=self.db
+        )
+        recipe_table, id_column = quote_columns(Recipe, "id", using=self.db)
+        placeholders = ", ".join(["%s"] * len(recipe_ids))
+        created_at = connections[self.db].ops.adapt_datetimefield_value(
+            timezone.now()
+        )
+        return execute_returning(
+            f"INSERT INTO {table} "
+            f"({user_column}, {recipe_column}, {created_column}) "
+            f"SELECT %s, {id_column}, %s FROM {recipe_table} "
+            f"WHERE {id_column} IN ({placeholders}) "
+            f"ON CONFLICT ({user_column}, {recipe_column}) DO NOTHING "
+            f"RETURNING {recipe_column}",
+            [user.pk, created_at, *recipe_ids],
+            using=self.db,
+        )
+
+    def remove_for_user(self, user, recipe_ids=None):
+        """
+        Удаляет рецепты пользователя (все, если recipe_ids не задан)
+        одним DELETE ... RETURNING и возвращает id удалённых.
+        """
+        table, user_column, recipe_column = quote_columns(
+            self.model, "user", "recipe", using=self.db
+        )
+        sql = f"DELETE FROM {table} WHERE {user_column} = %s"
+        params = [user.pk]
+        if recipe_ids is not None:
+            recipe_ids = list(recipe_ids)
+            if not recipe_ids:
+                return []
+            placeholders = ", ".join(["%s"] * len(recipe_ids))
+            sql += f" AND {recipe_column} IN ({placeholders})"
+            params += recipe_ids
+        return execute_returning(
+            f"{sql} RETURNING {recipe_column}", params, using=self.db
+        )
+
 
 class Favorite(models.Model):
     """Модель избранного рецепта."""
 
+    # Счётчик в Recipe, который отражает число таких записей.
+    counter_field = "favorites_count"
+
     user = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -194,6 +547,14 @@ class Favorite(models.Model):
         help_text="Рецепт, добавленный в избранное",
         verbose_name="Рецепт",
     )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        db_index=True,
+        help_text="Когда рецепт добавлен в избранное",
+        verbose_name="Добавлен",
+    )
+
+    objects = UserRecipeQuerySet.as_manager()
 
     class Meta:
         verbose_name = "Избранное"
@@ -212,6 +573,8 @@ class Favorite(models.Model):
 class ShoppingCart(models.Model):
     """Модель корзины."""
 
+    counter_field = "in_carts_count"
+
     user = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -226,6 +589,14 @@ class ShoppingCart(models.Model):
         help_text="Рецепт, добавленный в список покупок",
         verbose_name="Рецепт",
     )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        db_index=True,
+        help_text="Когда рецепт добавлен в список покупок",
+        verbose_name="Добавлен",
+    )
+
+    objects = UserRecipeQuerySet.as_manager()
 
     class Meta:
         verbose_name = "Список покупок"
@@ -239,3 +610,253 @@ class ShoppingCart(models.Model):
 
     def __str__(self):
         return f"{self.user} — {self.recipe}"
+
+
+class ShoppingCartItemTotalManager(models.Manager):
+    """Инкрементальное обновление итогов списка покупок."""
+
+    def apply_deltas(self, user_ids, deltas):
+        """
+        Прибавляет deltas ({ingredient_id: количество в базовых
+        единицах}) к итогам пользователей user_ids.
+
+        Строки пользователей блокируются, чтобы параллельные изменения
+        одной корзины не теряли обновления. Нулевые итоги удаляются.
+        """
+        user_ids = sorted(set(user_ids))
+        deltas = {pk: delta for pk, delta in deltas.items() if delta}
+        if not user_ids or not deltas:
+            return
+        with transaction.atomic():
+            list(
+                User.objects.select_for_update()
+                .filter(pk__in=user_ids)
+                .order_by("pk")
+                .values_list("pk", flat=True)
+            )
+            existing = {
+                (total.user_id, total.ingredient_id): total
+                for total in self.filter(
+                    user_id__in=user_ids, ingredient_id__in=deltas
+                )
+            }
+            to_create, to_update, to_delete = [], [], []
+            for user_id in user_ids:
+                for ingredient_id, delta in deltas.items():
+                    total = existing.get((user_id, ingredient_id))
+                    if total is None:
+                        if delta > 0:
+                            to_create.append(
+                                self.model(
+                                    user_id=user_id,
+                                    ingredient_id=ingredient_id,
+                                    total_amount=delta,
+                                )
+                            )
+                        continue
+                    total.total_amount += delta
+                    if total.total_amount > 0:
+                        to_update.append(total)
+                    else:
+                        to_delete.append(total.pk)
+            self.bulk_create(to_create)
+            self.bulk_update(to_update, ["total_amount"])
+            self.filter(pk__in=to_delete).delete()
+
+    def _recipes_amounts(self, recipe_ids):
+        """Суммарные количества ингредиентов рецептов recipe_ids."""
+        return dict(
+            RecipeIngredient.objects.filter(recipe_id__in=recipe_ids)
+            .order_by()
+            .values("ingredient_id")
+            .annotate(total=models.Sum("normalized_amount"))
+            .values_list("ingredient_id", "total")
+        )
+
+    def add_recipes(self, user, recipe_ids):
+        """Учитывает ингредиенты рецептов, добавленных в корзину."""
+        self.apply_deltas([user.pk], self._recipes_amounts(recipe_ids))
+
+    def remove_recipes(self, user, recipe_ids):
+        """Вычитает ингредиенты рецептов, убранных из корзины."""
+        self.apply_deltas(
+            [user.pk],
+            {
+                ingredient_id: -amount
+                for ingredient_id, amount in self._recipes_amounts(
+                    recipe_ids
+                ).items()
+            },
+        )
+
+    def remove_recipe_for_users(self, user_ids, recipe_id):
+        """Вычитает ингредиенты рецепта из итогов пользователей user_ids."""
+        user_ids = list(user_ids)
+        if not user_ids:
+            return
+        self.apply_deltas(
+            user_ids,
+            {
+                ingredient_id: -amount
+                for ingredient_id, amount in self._recipes_amounts(
+                    [recipe_id]
+                ).items()
+            },
+        )
+
+    def change_recipe_ingredients(self, recipe, deltas):
+        """Переносит изменение состава рецепта в корзины с этим рецептом."""
+        if not any(deltas.values()):
+            return
+        self.apply_deltas(
+            recipe.shopping_carts.values_list("user_id", flat=True), deltas
+        )
+
+    def live_totals(self, user_ids=None):
+        """Итоги, посчитанные напрямую по корзинам и составу рецептов."""
+        # Условие на корзины — в одном filter(), чтобы JOIN был один.
+        carts = (
+            {"recipe__shopping_carts__isnull": False}
+            if user_ids is None
+            else {"recipe__shopping_carts__user_id__in": user_ids}
+        )
+        return (
+            RecipeIngredient.objects.filter(**carts)
+            .values_list("recipe__shopping_carts__user_id", "ingredient_id")
+            .annotate(total_amount=models.Sum("normalized_amount"))
+            .order_by()
+        )
+
+    @transaction.atomic
+    def rebuild(self, ingredient=None, user_ids=None):
+        """
+        Пересчитывает итоги по живой агрегации: все или только по одному
+        ингредиенту и/или пользователям user_ids. Возвращает число итогов.
+        """
+        totals = self.all()
+        live = self.live_totals(user_ids)
+        if user_ids is not None:
+            totals = totals.filter(user_id__in=user_ids)
+        if ingredient is not None:
+            totals = totals.filter(ingredient=ingredient)
+            live = live.filter(ingredient=ingredient)
+        totals.delete()
+        return len(
+            self.bulk_create(
+                self.model(
+                    user_id=user_id,
+                    ingredient_id=ingredient_id,
+                    total_amount=total_amount,
+                )
+                for user_id, ingredient_id, total_amount in live
+            )
+        )
+
+
+class ShoppingCartItemTotal(models.Model):
+    """Итоговое количество ингредиента в списке покупок пользователя."""
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="shopping_cart_totals",
+        help_text="Пользователь, которому принадлежит список покупок",
+        verbose_name="Пользователь",
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        related_name="shopping_cart_totals",
+        help_text="Ингредиент из рецептов в корзине",
+        verbose_name="Ингредиент",
+    )
+    total_amount = models.PositiveBigIntegerField(
+        help_text="Суммарное количество по всем рецептам в корзине",
+        verbose_name="Количество",
+    )
+
+    objects = ShoppingCartItemTotalManager()
+
+    class Meta:
+        verbose_name = "Итог списка покупок"
+        verbose_name_plural = "Итоги списков покупок"
+        ordering = ["user", "ingredient__name"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "ingredient"],
+                name="unique_shopping_cart_item_total",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.user} — {self.ingredient}: {self.total_amount}"
+
+
+class RecipeTrendingScore(models.Model):
+    """
+    Заранее посчитанный рейтинг популярных рецептов.
+
+    Таблица целиком пересобирается командой refresh_trending_recipes;
+    ранги идут подряд с 1, поэтому страница выбирается по диапазону
+    rank без OFFSET.
+    """
+
+    recipe = models.OneToOneField(
+        Recipe,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="trending_score",
+        verbose_name="Рецепт",
+    )
+    rank = models.PositiveIntegerField(unique=True, verbose_name="Место")
+    score = models.FloatField(
+        help_text="Сумма весов событий с экспоненциальным затуханием",
+        verbose_name="Рейтинг",
+    )
+    computed_at = models.DateTimeField(verbose_name="Рассчитан")
+
+    class Meta:
+        verbose_name = "Рейтинг популярности"
+        verbose_name_plural = "Рейтинг популярности"
+        ordering = ["rank"]
+
+    def __str__(self):
+        return f"{self.rank}. {self.recipe}"
+
+
+class ShortLink(models.Model):
+    """
+    Собственный короткий код рецепта, например /s/borsch-2024/.
+
+    Без такой записи код рецепта — его id в base62 (recipes.shortlinks),
+    и он разбирается без обращения к базе.
+    """
+
+    code = models.CharField(
+        max_length=MAX_SHORT_LINK_CODE_LENGTH,
+        unique=True,
+        validators=[
+            MinLengthValidator(MIN_SHORT_LINK_CODE_LENGTH),
+            RegexValidator(
+                f"^[{re.escape(SHORT_LINK_ALPHABET)}_-]+$",
+                message="Допустимы латинские буквы, цифры, «-» и «_».",
+            ),
+        ],
+        help_text="Код в ссылке /s/<код>/",
+        verbose_name="Код",
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name="short_links",
+        verbose_name="Рецепт",
+    )
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Создан")
+
+    class Meta:
+        verbose_name = "Короткая ссылка"
+        verbose_name_plural = "Короткие ссылки"
+        ordering = ["code"]
+
+    def __str__(self):
+        return f"/s/{self.code}/ → {self.recipe}"
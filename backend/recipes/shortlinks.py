@@ -0,0 +1,64 @@
+from common.constants import MAX_SHORT_LINK_CODE_LENGTH, SHORT_LINK_ALPHABET
+
+from .cache import get_custom_short_codes
+
+BASE = len(SHORT_LINK_ALPHABET)
+DIGITS = {char: value for value, char in enumerate(SHORT_LINK_ALPHABET)}
+# Наибольший id рецепта (BigAutoField).
+MAX_RECIPE_ID = 2**63 - 1
+
+
+def encode_id(recipe_id):
+    """Код рецепта по умолчанию: его id в base62."""
+    if recipe_id <= 0:
+        raise ValueError("id рецепта должен быть положительным.")
+    code = []
+    while recipe_id:
+        recipe_id, digit = divmod(recipe_id, BASE)
+        code.append(SHORT_LINK_ALPHABET[digit])
+    return "".join(reversed(code))
+
+
+MAX_ID_CODE_LENGTH = len(encode_id(MAX_RECIPE_ID))
+
+
+def decode_code(code):
+    """
+    id рецепта по коду из encode_id или None. Коды с ведущим нулём не
+    канонические, поэтому у каждого id ровно один код; коды длиннее
+    кода наибольшего id не разбираются.
+    """
+    if (
+        not code
+        or len(code) > MAX_ID_CODE_LENGTH
+        or code[0] == SHORT_LINK_ALPHABET[0]
+    ):
+        return None
+    recipe_id = 0
+    for char in code:
+        digit = DIGITS.get(char)
+        if digit is None:
+            return None
+        recipe_id = recipe_id * BASE + digit
+    return recipe_id if recipe_id <= MAX_RECIPE_ID else None
+
+
+def resolve_code(code):
+    """
+    id рецепта по короткому коду. Собственные коды берутся из кэша,
+    остальные декодируются без обращения к базе.
+    """
+    if len(code) > MAX_SHORT_LINK_CODE_LENGTH:
+        return None
+    recipe_id = get_custom_short_codes().get(code)
+    if recipe_id is None:
+        recipe_id = decode_code(code)
+    return recipe_id
+
+
+def get_short_code(recipe_id):
+    """Собственный код рецепта, если он задан, иначе код по id."""
+    for code, custom_recipe_id in get_custom_short_codes().items():
+        if custom_recipe_id == recipe_id:
+            return code
+    return encode_id(recipe_id)
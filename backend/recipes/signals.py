@@ -0,0 +1,285 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import partial
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from common.constants import RECIPE_IMAGE_VARIANTS
+from common.images import schedule_image_variants, variants_are_stale
+
+from .autocomplete import ingredient_autocomplete
+from .cache import (
+    bump_catalog_generation,
+    bump_recipes_generation,
+    invalidate_author_latest_recipes,
+    invalidate_custom_short_codes,
+    invalidate_tag_map,
+)
+from .ingredient_index import recipe_ingredient_index
+from .models import (
+    Favorite,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    ShoppingCart,
+    ShoppingCartItemTotal,
+    ShortLink,
+    Tag,
+)
+
+User = get_user_model()
+
+
+def deleted_directly(origin, model):
+    """
+    True, если удаление начато с объекта или QuerySet модели model, а не
+    каскадом от связанной записи (origin — аргумент сигналов удаления).
+    """
+    return isinstance(origin, model) or getattr(origin, "model", None) is model
+
+
+@receiver([post_save, post_delete], sender=Ingredient)
+def invalidate_ingredient_autocomplete(sender, **kwargs):
+    ingredient_autocomplete.invalidate()
+
+
+@receiver([post_save, post_delete], sender=Tag)
+def invalidate_tag_map_on_change(sender, **kwargs):
+    transaction.on_commit(invalidate_tag_map)
+
+
+@receiver([post_save, post_delete], sender=Tag)
+@receiver([post_save, post_delete], sender=Ingredient)
+def bump_catalog_generation_on_change(sender, **kwargs):
+    """Названия тегов и ингредиентов входят в ETag рецепта."""
+    transaction.on_commit(bump_catalog_generation)
+
+
+@receiver([post_save, post_delete], sender=ShortLink)
+def invalidate_short_codes_on_change(sender, **kwargs):
+    transaction.on_commit(invalidate_custom_short_codes)
+
+
+# Множество id рецептов, которые отмечаются изменёнными одним UPDATE на
+# выходе из deferred_recipe_touches(); None — отмечать сразу.
+_deferred_touches = ContextVar("deferred_recipe_touches", default=None)
+
+
+def touch_recipes(recipe_ids):
+    deferred = _deferred_touches.get()
+    if deferred is not None:
+        deferred.update(recipe_ids)
+    elif recipe_ids:
+        Recipe.objects.filter(pk__in=recipe_ids).update(
+            updated_at=timezone.now()
+        )
+
+
+@contextmanager
+def deferred_recipe_touches():
+    """
+    Обновляет updated_at рецептов, составы которых меняются построчно
+    (инлайн в админке), одним UPDATE вместо запроса на каждую строку.
+    """
+    recipe_ids = set()
+    token = _deferred_touches.set(recipe_ids)
+    try:
+        yield
+    finally:
+        _deferred_touches.reset(token)
+    touch_recipes(recipe_ids)
+
+
+@receiver(post_save, sender=RecipeIngredient)
+def touch_recipe_on_ingredient_save(sender, instance, **kwargs):
+    touch_recipes([instance.recipe_id])
+
+
+@receiver(post_delete, sender=RecipeIngredient)
+def touch_recipe_on_ingredient_delete(sender, instance, origin, **kwargs):
+    """
+    Каскад от рецепта удаляет и сам рецепт, а смена тегов и
+    ингредиентов справочника меняет поколение каталога в ETag.
+    """
+    if deleted_directly(origin, RecipeIngredient):
+        touch_recipes([instance.recipe_id])
+
+
+@receiver([post_save, post_delete], sender=RecipeIngredient)
+@receiver([post_save, post_delete], sender=Recipe)
+def refresh_recipe_ingredient_index(sender, instance, **kwargs):
+    """
+    Состав рецепта через API пишется bulk-операциями без сигналов,
+    поэтому рецепт перечитывается после фиксации транзакции при любом
+    полном сохранении. При каскадном удалении строк состава рецепт
+    обновляется своим post_delete, а ингредиент справочника сбрасывает
+    индекс целиком.
+    """
+    if sender is Recipe and kwargs.get("update_fields"):
+        return
+    if "origin" in kwargs and sender is RecipeIngredient:
+        if not deleted_directly(kwargs["origin"], RecipeIngredient):
+            return
+    recipe_id = instance.pk if sender is Recipe else instance.recipe_id
+    transaction.on_commit(
+        partial(recipe_ingredient_index.refresh_recipe, recipe_id)
+    )
+
+
+@receiver(post_delete, sender=Ingredient)
+def invalidate_recipe_ingredient_index(sender, **kwargs):
+    transaction.on_commit(recipe_ingredient_index.invalidate)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def touch_recipe_on_tags_change(sender, instance, action, reverse, **kwargs):
+    if not action.startswith("post_"):
+        return
+    touch_recipes((kwargs["pk_set"] or ()) if reverse else [instance.pk])
+
+
+@receiver([post_save, post_delete], sender=Recipe)
+@receiver([post_save, post_delete], sender=RecipeIngredient)
+@receiver([post_save, post_delete], sender=Tag)
+@receiver([post_save, post_delete], sender=Ingredient)
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def bump_recipes_generation_on_change(sender, **kwargs):
+    """Сброс кэша списков рецептов после фиксации транзакции."""
+    transaction.on_commit(bump_recipes_generation)
+
+
+@receiver([post_save, post_delete], sender=Recipe)
+def invalidate_author_feed_list(sender, instance, **kwargs):
+    if kwargs.get("created", True):
+        transaction.on_commit(
+            partial(invalidate_author_latest_recipes, instance.author_id)
+        )
+
+
+@receiver(post_save, sender=User)
+def bump_recipes_generation_on_author_change(sender, update_fields, **kwargs):
+    if update_fields and set(update_fields) <= {"last_login"}:
+        return
+    transaction.on_commit(bump_recipes_generation)
+
+
+@receiver(post_save, sender=Recipe)
+def update_recipe_search_vector(sender, instance, update_fields, **kwargs):
+    if update_fields and not {"name", "text"} & set(update_fields):
+        return
+    Recipe.objects.filter(pk=instance.pk).update_search_vector()
+
+
+@receiver(post_save, sender=Recipe)
+def schedule_recipe_image_variants(sender, instance, **kwargs):
+    if variants_are_stale(instance, "image", "image_variants"):
+        schedule_image_variants(
+            instance, "image", "image_variants", RECIPE_IMAGE_VARIANTS
+        )
+
+
+@receiver(pre_delete, sender=User)
+def subtract_user_relations_from_counters(sender, instance, **kwargs):
+    """Избранное и корзина пользователя удаляются каскадом, минуя API."""
+    for model in (Favorite, ShoppingCart):
+        Recipe.objects.exclude(author=instance).subtract_relations(
+            model.objects.filter(user=instance)
+        )
+    transaction.on_commit(bump_recipes_generation)
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_save, sender=ShoppingCart)
+def add_relation_to_counter(sender, instance, created, **kwargs):
+    """API добавляет записи SQL-запросом без сигналов; здесь — админка."""
+    if created:
+        Recipe.objects.filter(pk=instance.recipe_id).change_counter(
+            sender.counter_field, 1
+        )
+        transaction.on_commit(bump_recipes_generation)
+
+
+@receiver(pre_delete, sender=Favorite)
+@receiver(pre_delete, sender=ShoppingCart)
+def subtract_relation_from_counter(sender, instance, origin, **kwargs):
+    """
+    Прямое удаление записи (админка, QuerySet.delete()). При каскаде от
+    рецепта счётчик удаляется вместе с ним, а от пользователя — учтён
+    subtract_user_relations_from_counters.
+    """
+    if deleted_directly(origin, sender):
+        Recipe.objects.filter(pk=instance.recipe_id).change_counter(
+            sender.counter_field, -1
+        )
+        transaction.on_commit(bump_recipes_generation)
+
+
+@receiver(pre_delete, sender=Recipe)
+def subtract_recipe_from_cart_totals(sender, instance, origin, **kwargs):
+    """Рецепт удаляется вместе с записями корзин всех пользователей."""
+    carts = instance.shopping_carts.all()
+    if isinstance(origin, User):
+        # Итоги самого удаляемого пользователя удалятся каскадом.
+        carts = carts.exclude(user=origin)
+    ShoppingCartItemTotal.objects.remove_recipe_for_users(
+        carts.values_list("user_id", flat=True), instance.pk
+    )
+
+
+@receiver(post_save, sender=ShoppingCart)
+def add_cart_item_to_totals(sender, instance, created, **kwargs):
+    """API добавляет записи SQL-запросом без сигналов; здесь — админка."""
+    if created:
+        ShoppingCartItemTotal.objects.add_recipes(
+            instance.user, [instance.recipe_id]
+        )
+
+
+@receiver(pre_delete, sender=ShoppingCart)
+def subtract_cart_item_from_totals(sender, instance, origin, **kwargs):
+    """
+    Прямое удаление записи корзины (админка, QuerySet.delete()). Каскад
+    от рецепта учитывает subtract_recipe_from_cart_totals, а итоги
+    удаляемого пользователя удаляются вместе с ним.
+    """
+    if deleted_directly(origin, ShoppingCart):
+        ShoppingCartItemTotal.objects.remove_recipe_for_users(
+            [instance.user_id], instance.recipe_id
+        )
+
+
+def rebuild_recipe_cart_totals(recipe_ingredient):
+    """Пересчитывает итоги ингредиента в корзинах с этим рецептом."""
+    user_ids = list(
+        ShoppingCart.objects.filter(
+            recipe_id=recipe_ingredient.recipe_id
+        ).values_list("user_id", flat=True)
+    )
+    if user_ids:
+        ShoppingCartItemTotal.objects.rebuild(
+            ingredient=recipe_ingredient.ingredient_id, user_ids=user_ids
+        )
+
+
+@receiver(post_save, sender=RecipeIngredient)
+def rebuild_cart_totals_on_ingredient_save(sender, instance, **kwargs):
+    """API пишет состав bulk-операциями без сигналов; здесь — админка."""
+    rebuild_recipe_cart_totals(instance)
+
+
+@receiver(post_delete, sender=RecipeIngredient)
+def rebuild_cart_totals_on_ingredient_delete(
+    sender, instance, origin, **kwargs
+):
+    """Каскад от рецепта или ингредиента итоги уже учли."""
+    if deleted_directly(origin, RecipeIngredient):
+        rebuild_recipe_cart_totals(instance)
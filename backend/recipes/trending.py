@@ -0,0 +1,99 @@
+import math
+from datetime import timedelta
+
+from django.db import models, transaction
+from django.db.models import Func, Sum, Value
+from django.db.models.functions import Exp
+from django.utils import timezone
+
+from common.constants import (
+    TRENDING_CART_WEIGHT,
+    TRENDING_FAVORITE_WEIGHT,
+    TRENDING_HALF_LIFE_HOURS,
+    TRENDING_MAX_RECIPES,
+    TRENDING_WINDOW_DAYS,
+)
+
+from .models import Favorite, RecipeTrendingScore, ShoppingCart
+
+BATCH_SIZE = 1000
+
+TRENDING_EVENTS = (
+    (Favorite, TRENDING_FAVORITE_WEIGHT),
+    (ShoppingCart, TRENDING_CART_WEIGHT),
+)
+
+
+class EpochSeconds(Func):
+    """Время как число секунд с начала эпохи Unix."""
+
+    template = "EXTRACT(EPOCH FROM %(expressions)s)"
+    output_field = models.FloatField()
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler,
+            connection,
+            template="CAST(strftime('%%%%s', %(expressions)s) AS REAL)",
+            **extra_context,
+        )
+
+
+def decayed_scores(now, half_life_hours, window_days):
+    """
+    Рейтинг рецептов: сумма весов событий, каждое из которых затухает
+    как exp(-λ·возраст), λ = ln 2 / период полураспада.
+
+    Суммирование выполняется в БД отдельным GROUP BY по каждой таблице
+    событий; старше window_days события не учитываются (их вклад
+    пренебрежимо мал), что позволяет использовать индекс по created_at.
+    """
+    decay = math.log(2) / (half_life_hours * 3600)
+    since = now - timedelta(days=window_days)
+    now_seconds = now.timestamp()
+    scores = {}
+    for model, weight in TRENDING_EVENTS:
+        rows = (
+            model.objects.filter(created_at__gte=since)
+            .order_by()
+            .values("recipe_id")
+            .annotate(
+                score=Sum(
+                    Exp(
+                        (EpochSeconds("created_at") - Value(now_seconds))
+                        * Value(decay)
+                    ),
+                    output_field=models.FloatField(),
+                )
+            )
+            .values_list("recipe_id", "score")
+        )
+        for recipe_id, score in rows:
+            scores[recipe_id] = scores.get(recipe_id, 0) + weight * score
+    return scores
+
+
+def refresh_trending_scores(
+    half_life_hours=TRENDING_HALF_LIFE_HOURS,
+    window_days=TRENDING_WINDOW_DAYS,
+    limit=TRENDING_MAX_RECIPES,
+):
+    """Пересобирает RecipeTrendingScore и возвращает число записей."""
+    now = timezone.now()
+    scores = decayed_scores(now, half_life_hours, window_days)
+    ranked = sorted(scores.items(), key=lambda item: (-item[1], -item[0]))
+    with transaction.atomic():
+        RecipeTrendingScore.objects.all().delete()
+        RecipeTrendingScore.objects.bulk_create(
+            (
+                RecipeTrendingScore(
+                    recipe_id=recipe_id,
+                    rank=rank,
+                    score=score,
+                    computed_at=now,
+                )
+                for rank, (recipe_id, score) in enumerate(ranked[:limit], 1)
+            ),
+            batch_size=BATCH_SIZE,
+        )
+    return min(len(ranked), limit)
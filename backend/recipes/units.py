@@ -0,0 +1,43 @@
+from decimal import Decimal
+
+# Единица измерения (в нижнем регистре) → (базовая единица, множитель).
+# Количества хранятся целыми, поэтому базовая единица — самая мелкая.
+UNIT_CONVERSIONS = {
+    "г": ("г", 1),
+    "гр": ("г", 1),
+    "гр.": ("г", 1),
+    "грамм": ("г", 1),
+    "кг": ("г", 1000),
+    "килограмм": ("г", 1000),
+    "мл": ("мл", 1),
+    "миллилитр": ("мл", 1),
+    "л": ("мл", 1000),
+    "литр": ("мл", 1000),
+    "шт": ("шт.", 1),
+    "шт.": ("шт.", 1),
+    "штука": ("шт.", 1),
+}
+
+# Единицы для вывода: базовая единица → (единица, множитель) по убыванию.
+DISPLAY_UNITS = {
+    "г": (("кг", 1000), ("г", 1)),
+    "мл": (("л", 1000), ("мл", 1)),
+}
+
+
+def normalize_unit(unit):
+    """Базовая единица и множитель для единицы измерения ингредиента."""
+    unit = unit.strip()
+    return UNIT_CONVERSIONS.get(unit.lower(), (unit, 1))
+
+
+def humanize_amount(amount, base_unit):
+    """
+    Количество в базовых единицах → (строка количества, единица):
+    1500 г выводятся как «1,5» кг, 300 г — как «300» г.
+    """
+    for unit, factor in DISPLAY_UNITS.get(base_unit, ()):
+        if amount >= factor:
+            value = Decimal(amount) / factor
+            return f"{value.normalize():f}".replace(".", ","), unit
+    return str(amount), base_unit
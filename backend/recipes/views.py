@@ -0,0 +1,40 @@
+from django.http import (
+    Http404,
+    HttpResponsePermanentRedirect,
+    HttpResponseRedirect,
+)
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import require_safe
+
+from common.constants import (
+    CUSTOM_SHORT_LINK_CACHE_MAX_AGE,
+    SHORT_LINK_CACHE_MAX_AGE,
+    SHORT_LINK_REDIRECT_URL,
+)
+
+from .shortlinks import decode_code, resolve_code
+
+
+@require_safe
+def short_link_redirect(request, code):
+    """
+    Переход по короткой ссылке /s/<код>/ на страницу рецепта.
+
+    Обычный view Django без DRF: код разбирается без запросов к базе,
+    а ответ кэшируется браузерами и nginx. Ссылка по id постоянна
+    (301, сутки в кэше), собственный код можно переназначить, поэтому
+    для него 302 с коротким max-age.
+    Существование рецепта проверяет уже страница фронтенда.
+    """
+    recipe_id = resolve_code(code)
+    if recipe_id is None:
+        raise Http404("Короткая ссылка не найдена.")
+    location = SHORT_LINK_REDIRECT_URL.format(recipe_id)
+    if decode_code(code) == recipe_id:
+        response = HttpResponsePermanentRedirect(location)
+        max_age = SHORT_LINK_CACHE_MAX_AGE
+    else:
+        response = HttpResponseRedirect(location)
+        max_age = CUSTOM_SHORT_LINK_CACHE_MAX_AGE
+    patch_cache_control(response, public=True, max_age=max_age)
+    return response
@@ -7,6 +7,7 @@ from common.constants import (
     MAX_NAME_LENGTH,
     MAX_USERNAME_LENGTH,
 )
+from common.db import execute_returning, quote_columns
 
 
 class UserManager(BaseUserManager):
@@ -79,6 +80,13 @@ class User(AbstractUser):
         help_text="Аватар",
         verbose_name="Аватар",
     )
+    avatar_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        help_text="Пути к уменьшенным копиям аватара",
+        verbose_name="Превью аватара",
+    )
 
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = ["username", "first_name", "last_name"]
@@ -92,6 +100,27 @@ class User(AbstractUser):
         return self.email
 
 
+class SubscriptionQuerySet(models.QuerySet):
+    def subscribe(self, user, author):
+        """
+        Подписывает одним INSERT ... ON CONFLICT DO NOTHING, без гонки
+        между проверкой и созданием. True, если подписки ещё не было.
+        """
+        table, user_column, author_column = quote_columns(
+            self.model, "user", "author", using=self.db
+        )
+        return bool(
+            execute_returning(
+                f"INSERT INTO {table} ({user_column}, {author_column}) "
+                f"VALUES (%s, %s) "
+                f"ON CONFLICT ({user_column}, {author_column}) DO NOTHING "
+                f"RETURNING {author_column}",
+                [user.pk, author.pk],
+                using=self.db,
+            )
+        )
+
+
 class Subscription(models.Model):
     """Модель подписки пользователя на автора."""
 
@@ -110,6 +139,8 @@ class Subscription(models.Model):
         verbose_name="Автор",
     )
 
+    objects = SubscriptionQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Подписка"
         verbose_name_plural = "Подписки"
@@ -0,0 +1,15 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from common.constants import AVATAR_IMAGE_VARIANTS
+from common.images import schedule_image_variants, variants_are_stale
+
+from .models import User
+
+
+@receiver(post_save, sender=User)
+def schedule_avatar_variants(sender, instance, **kwargs):
+    if variants_are_stale(instance, "avatar", "avatar_variants"):
+        schedule_image_variants(
+            instance, "avatar", "avatar_variants", AVATAR_IMAGE_VARIANTS
+        )